@@ -1,21 +1,297 @@
+import hmac
+import json
 import os
-from flask import Flask, request, jsonify
+from contextlib import ExitStack
+from flask import Flask, Response, g, request, jsonify, stream_with_context, url_for
 from flask_cors import CORS
 from dotenv import load_dotenv
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
 
-from services import resume_parser
-from exceptions import ParsingError, InvalidFileTypeError, EmptyFileError, OpenAIFailureError
+from services import content_hash, resume_parser, resume_parser_stream, parse_cache
+from jobs import create_job_queue_from_env
+from batch import iter_batch_items, parse_batch
+from metrics import REGISTRY, ERRORS_TOTAL, IN_FLIGHT, REQUESTS_TOTAL, begin_memory, begin_request, end_memory, end_request, server_timing_header, stage, track_usage
+from profiler import create_profiler_from_env
+from uploads import UploadRequest, spool_copy
+from responses import compress, dump_model
+from ratelimit import api_keys_from_env, bind_tenant, create_rate_limiter_from_env, current_tenant, tenant_key
+from exceptions import ParsingError, InvalidFileTypeError, EmptyFileError, OpenAIFailureError, ServiceOverloadedError, FileTooLargeError
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# Uploads are spooled to disk past UPLOAD_SPOOL_BYTES and checked against
+# their declared type as they arrive (see uploads.py).
+app.request_class = UploadRequest
+
+# Requests with a larger body are rejected with 413; the Content-Length header
+# is checked before any of the body is read.
+app.config['MAX_CONTENT_LENGTH'] = int(
+    os.environ.get('MAX_CONTENT_LENGTH', str(10 * 1024 * 1024)))
+
+# Body limit for POST /parse-resumes, which may carry many files or a ZIP archive.
+BATCH_MAX_CONTENT_LENGTH = int(
+    os.environ.get('BATCH_MAX_CONTENT_LENGTH', str(100 * 1024 * 1024)))
+
 CORS_ORIGINS = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
 CORS(app, resources={
-    r"/parse-resume": {"origins": CORS_ORIGINS.split(',')}
+    r"/parse-resume": {"origins": CORS_ORIGINS.split(','), "expose_headers": ["X-Resume-Hash"]},
+    r"/parse-resumes": {"origins": CORS_ORIGINS.split(',')},
+    r"/jobs/*": {"origins": CORS_ORIGINS.split(',')}
 })
 
+job_queue = create_job_queue_from_env()
+
+# Per-tenant upload budget for POST /parse-resume and each file of /parse-resumes (see ratelimit.py).
+rate_limiter = create_rate_limiter_from_env()
+
+# API keys that identify tenants; any other key a client sends is ignored.
+RATE_LIMIT_API_KEYS = api_keys_from_env()
+
+# Trust X-User-Id and X-Forwarded-For from a reverse proxy when identifying tenants.
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', '').lower() in ('1', 'true', 'yes')
+
+# Seconds between keep-alive comments on an idle job event stream.
+SSE_KEEPALIVE_SECONDS = 15
+
+# Send per-stage timings to the client in a Server-Timing header.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Sampling profiler for slow /parse-resume requests (see profiler.py).
+profiler = create_profiler_from_env()
+
+# Bearer token required by the /admin endpoints; without one they stay closed.
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN')
+
+
+# ==============================
+# Instrumentation
+# ==============================
+
+def _cache_metrics() -> list[str]:
+    stats = parse_cache.stats()
+    return [
+        "# HELP resume_parse_cache_lookups_total Parse-cache lookups by result.",
+        "# TYPE resume_parse_cache_lookups_total counter",
+        f'resume_parse_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'resume_parse_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+    ]
+
+
+REGISTRY.register_collector(_cache_metrics)
+
+
+def _metrics_endpoint_label() -> str | None:
+    if request.url_rule is None:
+        return "unmatched"
+    if request.endpoint == 'metrics_endpoint':
+        return None  # Scrapes are not counted as traffic.
+    return request.url_rule.rule
+
+
+@app.before_request
+def _start_request_metrics():
+    endpoint = _metrics_endpoint_label()
+    if endpoint is None:
+        return
+    g.metrics_endpoint = endpoint
+    g.metrics_token = begin_request()
+    g.memory_mark = begin_memory()
+    IN_FLIGHT.inc(endpoint=endpoint)
+    if request.endpoint == 'parse_resume_endpoint':
+        g.profile = profiler.begin()
+        if g.profile is not None:
+            g.profile_scope = ExitStack()
+            g.profile_usage = g.profile_scope.enter_context(track_usage())
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is None:
+        return response
+    timings = end_request(g.pop('metrics_token'))
+    memory_mark = g.pop('memory_mark')
+    REQUESTS_TOTAL.inc(endpoint=endpoint, status=str(response.status_code))
+    if response.is_streamed:
+        # Streamed bodies are still being produced here, so the request
+        # stays in flight until the response is closed.
+        def finish():
+            IN_FLIGHT.dec(endpoint=endpoint)
+            end_memory(memory_mark, endpoint=endpoint)
+        response.call_on_close(finish)
+    else:
+        IN_FLIGHT.dec(endpoint=endpoint)
+        end_memory(memory_mark, endpoint=endpoint)
+
+    profile = g.pop('profile', None)
+    if profile is not None:
+        _finish_profile(profile, response, timings)
+
+    if SERVER_TIMING and timings:
+        response.headers['Server-Timing'] = server_timing_header(timings)
+        # Browsers only expose Server-Timing to allowed cross-origin pages.
+        response.headers['Timing-Allow-Origin'] = CORS_ORIGINS
+    return response
+
+
+def _finish_profile(profile, response, timings: dict) -> None:
+    profiler.detach(profile)
+    g.pop('profile_scope').close()
+    # The stage timings and token totals are the dicts the parse adds to, so
+    # a streamed parse keeps filling them in until its response is closed.
+    details = dict(status=response.status_code, file_bytes=request.content_length, stages=timings,
+                   usage=g.pop('profile_usage'))
+    if response.is_streamed:
+        response.call_on_close(lambda: profiler.finish(profile, **details))
+    else:
+        profiler.finish(profile, **details)
+
+
+@app.before_request
+def _identify_tenant():
+    g.tenant_token = current_tenant.set(
+        tenant_key(request.headers, request.remote_addr, RATE_LIMIT_TRUST_PROXY, RATE_LIMIT_API_KEYS))
+
+
+@app.teardown_request
+def _forget_tenant(exc):
+    token = g.pop('tenant_token', None)
+    if token is not None:
+        current_tenant.reset(token)
+
+
+def _error_response(e: Exception) -> tuple[dict, int]:
+    """
+    Map an exception to a JSON error payload and HTTP status.
+
+    Args:
+        e (Exception): An exception raised while parsing a resume.
+
+    Returns:
+        tuple[dict, int]: The error payload and its HTTP status code.
+    """
+    ERRORS_TOTAL.inc(exception=type(e).__name__)
+    if isinstance(e, (InvalidFileTypeError, EmptyFileError)):
+        # 400 Bad Request for file-related issues
+        return {"error": str(e)}, 400
+    if isinstance(e, FileTooLargeError):
+        # 413 Content Too Large for files over the size or page limits
+        return {"error": str(e)}, 413
+    if isinstance(e, RequestEntityTooLarge):
+        # 413 for request bodies over MAX_CONTENT_LENGTH
+        return {"error": f"Upload exceeds the maximum size of {request.max_content_length} bytes."}, 413
+    if isinstance(e, ServiceOverloadedError):
+        # 429 Too Many Requests when rate limited or shedding load
+        return {"error": str(e), "retry_after": e.retry_after}, 429
+    if isinstance(e, OpenAIFailureError):
+        # 503 Service Unavailable for AI failures
+        return {"error": str(e)}, 503
+    if isinstance(e, ParsingError):
+        # 422 Unprocessable Entity for general parsing errors
+        return {"error": str(e)}, 422
+    # General catch-all for any other unexpected errors
+    app.logger.error(f"Unexpected error: {e}")  # Log the full error
+    return {"error": "An unexpected server error occurred"}, 500
+
+
+def _json_response(payload: dict, status_code: int):
+    """Build a JSON response, adding Retry-After to 429s."""
+    response = jsonify(payload)
+    if status_code == 429 and "retry_after" in payload:
+        response.headers['Retry-After'] = str(payload["retry_after"])
+    return response, status_code
+
+
+@app.errorhandler(ParsingError)
+@app.errorhandler(RequestEntityTooLarge)
+def _handle_upload_error(e: Exception):
+    """Return JSON for uploads rejected while the request body is being read."""
+    payload, status_code = _error_response(e)
+    return jsonify(payload), status_code
+
+
+def _parse_file(file: FileStorage, local_only: bool = False,
+                previous: str | None = None) -> tuple[dict, int]:
+    """
+    Run the resume parser and map the outcome to a JSON payload and HTTP status.
+
+    Shared by the synchronous endpoint, background jobs and batches so all of
+    them report errors identically.
+
+    Args:
+        file (FileStorage): The uploaded resume file.
+        local_only (bool): Return only locally extracted fields without calling the LLM.
+        previous (str, optional): Content hash of an earlier parse to update incrementally.
+
+    Returns:
+        tuple[dict, int]: The response payload and its HTTP status code.
+    """
+    try:
+        parsed_data = resume_parser(file, local_only=local_only, previous=previous)
+
+        with stage("serialization"):
+            return parsed_data.model_dump(), 200
+
+    except Exception as e:
+        return _error_response(e)
+
+
+def _parse_spooled(upload: FileStorage, local_only: bool = False,
+                   previous: str | None = None) -> tuple[dict, int, str | None]:
+    """
+    Run `_parse_file` as a background job on a spooled copy of the upload
+    (see `uploads.spool_copy`), closing the copy once the job has finished.
+
+    Returns:
+        tuple[dict, int, str | None]: The response payload, its HTTP status
+        code and the content hash a sync response sends in `X-Resume-Hash`.
+    """
+    try:
+        return (*_parse_file(upload, local_only, previous), content_hash())
+    finally:
+        upload.close()
+
+
+def _is_truthy(value: str | None) -> bool:
+    return value is not None and value.lower() in ("1", "true", "yes")
+
+
+def _stream_format(stream: str | None, accept: str | None) -> str | None:
+    """
+    Pick the event format of a streamed parse.
+
+    Args:
+        stream (str, optional): The `stream` query parameter.
+        accept (str, optional): The client's preferred response mimetype.
+
+    Returns:
+        str | None: "sse", "ndjson", or None for a plain JSON response.
+    """
+    if stream == 'sse' or accept == 'text/event-stream':
+        return 'sse'
+    if stream == 'ndjson' or _is_truthy(stream):
+        return 'ndjson'
+    return None
+
+
+STREAM_MIMETYPES = {'sse': 'text/event-stream', 'ndjson': 'application/x-ndjson'}
+
+
+def _format_event(event: dict, stream_format: str) -> str:
+    """Encode a parse event as a Server-Sent Event or an NDJSON line."""
+    if stream_format == 'sse':
+        return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+
+def _error_event(e: Exception) -> dict:
+    payload, status_code = _error_response(e)
+    return {"event": "error", "status": status_code, **payload}
+
 
 @app.route('/parse-resume', methods=['POST'])
 def parse_resume_endpoint():
@@ -24,35 +300,258 @@ def parse_resume_endpoint():
 
     Expects:
         - A POST request with a file.
+        - Optional `async=1` query parameter to queue the parse as a background job.
+        - Optional `mode=local` query parameter to return only the fields the
+          local rule-based extractor finds (contact details and skills),
+          without calling the LLM. Intended for instant previews.
+        - Optional `compact=1` query parameter to leave null fields and empty
+          lists out of the response.
+        - Optional `previous` query parameter: the `X-Resume-Hash` of an
+          earlier parse of the same resume. Only the sections that changed
+          since are re-extracted.
+        - Optional `stream=1` (or `stream=ndjson`) query parameter to receive
+          the result as NDJSON events while the model is still generating,
+          or `stream=sse` (or `Accept: text/event-stream`) for Server-Sent
+          Events. Each complete field is sent as soon as it is validated
+          (`field`, or `item` for one entry of a list), followed by the full
+          `result`, or an `error` event with the HTTP status it would have
+          had. See `services.resume_parser_stream` for the event format.
 
     Returns:
-        - JSON response containing parsed resume data if successful.
+        - JSON response containing parsed resume data if successful, with the
+          content hash of the extracted text in the `X-Resume-Hash` header.
+          Compressed with brotli or gzip if the client accepts it.
+        - With `stream`, an event stream once the text has been extracted;
+          upload errors are still reported with a JSON error status.
+        - With `async=1`, HTTP 202 with the job id and its status URL,
+          or HTTP 429 if the job queue is full. The finished job carries
+          the content hash as `resume_hash`.
+        - HTTP 429 with `Retry-After` if the caller is over its rate limit or
+          the AI service is saturated.
         - Error message with HTTP 400 or 500 if file is missing or invalid.
     """
+    try:
+        # Checked before the body is read, so rejected uploads cost nothing.
+        rate_limiter.check(current_tenant.get())
+    except ServiceOverloadedError as e:
+        return _json_response(*_error_response(e))
 
-    if 'file' not in request.files:
-        return jsonify({"error": "No file in the request"}), 400
+    with stage("upload"):
+        # Accessing request.files reads and parses the multipart body.
+        if 'file' not in request.files:
+            return jsonify({"error": "No file in the request"}), 400
 
-    file = request.files['file']
+        file = request.files['file']
+
+    if _is_truthy(request.args.get('async')):
+        # The request's files are closed once this response is sent, so the
+        # job gets its own spooled copy of the upload.
+        upload = spool_copy(file)
+        try:
+            job = job_queue.submit(bind_tenant(_parse_spooled), upload, request.args.get('mode') == 'local',
+                                   request.args.get('previous'))
+        except ServiceOverloadedError as e:
+            upload.close()
+            return _json_response(*_error_response(e))
+
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": url_for('job_status_endpoint', job_id=job.id)
+        }), 202
+
+    stream_format = _stream_format(request.args.get('stream'), request.accept_mimetypes.best)
+    if stream_format and request.args.get('mode') != 'local':
+        return _stream_parse(file, stream_format)
 
     try:
-        parsed_data = resume_parser(file)
+        parsed_data = resume_parser(
+            file, local_only=request.args.get('mode') == 'local', previous=request.args.get('previous'))
+    except Exception as e:
+        return _json_response(*_error_response(e))
 
-        return jsonify(parsed_data.model_dump()), 200
+    with stage("serialization"):
+        # Serialized straight from the model to bytes, skipping the dict tree.
+        body, encoding = compress(
+            dump_model(parsed_data, compact=_is_truthy(request.args.get('compact'))),
+            request.headers.get('Accept-Encoding'))
+    response = Response(body, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if content_hash():
+        response.headers['X-Resume-Hash'] = content_hash()
+    return response, 200
 
-    except (InvalidFileTypeError, EmptyFileError) as e:
-        # 400 Bad Request for file-related issues
-        return jsonify({"error": str(e)}), 400
-    except OpenAIFailureError as e:
-        # 503 Service Unavailable for AI failures
-        return jsonify({"error": str(e)}), 503
-    except ParsingError as e:
-        # 422 Unprocessable Entity for general parsing errors
-        return jsonify({"error": str(e)}), 422
+
+def _stream_parse(file: FileStorage, stream_format: str):
+    """Respond to `POST /parse-resume?stream=...` with the parse events."""
+    try:
+        events = resume_parser_stream(file, previous=request.args.get('previous'))
     except Exception as e:
-        # General catch-all for any other unexpected errors
-        app.logger.error(f"Unexpected error: {e}")  # Log the full error
-        return jsonify({"error": "An unexpected server error occurred"}), 500
+        return _json_response(*_error_response(e))
+
+    def body():
+        try:
+            for event in events:
+                yield _format_event(event, stream_format)
+        except Exception as e:
+            yield _format_event(_error_event(e), stream_format)
+        finally:
+            events.close()
+
+    response = Response(stream_with_context(body()), mimetype=STREAM_MIMETYPES[stream_format],
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    if content_hash():
+        response.headers['X-Resume-Hash'] = content_hash()
+    return response
+
+
+@app.route('/parse-resumes', methods=['POST'])
+def parse_resumes_endpoint():
+    """
+    API endpoint to parse many resumes in one request.
+
+    Expects:
+        - A POST request with one or more files in the `files` field. Each file
+          may be a PDF, a DOCX or a ZIP archive of PDF/DOCX resumes.
+
+    Returns:
+        - An NDJSON stream with one line per resume, in completion order:
+          `{"filename", "status", "data"}` on success or
+          `{"filename", "status", "error"}` on failure. A failed file never
+          fails the batch. Each file is charged against the caller's rate
+          limit; files over it fail with status 429.
+        - Error message with HTTP 400 if no files are provided.
+    """
+    request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({"error": "No files in the request"}), 400
+
+    items = rate_limiter.charge_each(current_tenant.get(), iter_batch_items(files))
+
+    def results():
+        for result in parse_batch(items, bind_tenant(_parse_file), _error_response):
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id):
+    """
+    API endpoint to poll or stream the status of a background parse job.
+
+    Expects:
+        - A job id returned by `POST /parse-resume?async=1`.
+        - Optional `stream=1` query parameter (or `Accept: text/event-stream`)
+          to receive status changes as Server-Sent Events.
+
+    Returns:
+        - JSON with the job status, plus the parsed result or error once finished.
+        - Error message with HTTP 404 if the job is unknown or has expired.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+
+    wants_stream = _is_truthy(request.args.get('stream')) or \
+        request.accept_mimetypes.best == 'text/event-stream'
+    if not wants_stream:
+        return jsonify(job.to_dict()), 200
+
+    def events():
+        version = -1
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            elif not job_queue.wait(job, version, SSE_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """
+    API endpoint reporting parse-cache hit/miss counts for this worker.
+
+    Returns:
+        - JSON response with the backend name, hits, misses, hit rate and entry count.
+    """
+    return jsonify(parse_cache.stats()), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    API endpoint exposing service metrics in the Prometheus text format.
+
+    Includes per-stage parse latency histograms (upload, extraction, openai,
+    validation, serialization), request and error counters, OpenAI token
+    usage, in-flight gauges and parse-cache lookups for this worker.
+
+    Returns:
+        - Plain-text Prometheus exposition.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _admin_denied():
+    """Return an error response unless the request may use the /admin endpoints."""
+    if not profiler.enabled or not PROFILE_ADMIN_TOKEN:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    if not hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {PROFILE_ADMIN_TOKEN}'):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@app.route('/admin/profiles', methods=['GET'])
+def profiles_endpoint():
+    """
+    API endpoint listing the slow and sampled `/parse-resume` profiles kept by this worker.
+
+    Requires PROFILER=1, PROFILE_ADMIN_TOKEN to be set, and
+    `Authorization: Bearer <PROFILE_ADMIN_TOKEN>`; otherwise 404 or 401.
+
+    Returns:
+        - JSON list, most recent first, of `{"id", "reason", "started_at",
+          "duration", "sampled_from", "samples", "status", "file_bytes",
+          "mimetype", "pages", "stages", "usage"}`. `sampled_from` is how far
+          into the request sampling started; `pages` is only known for PDFs
+          extracted in the worker itself.
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    return jsonify(profiler.profiles()), 200
+
+
+@app.route('/admin/profiles/<profile_id>', methods=['GET'])
+def profile_endpoint(profile_id):
+    """
+    API endpoint downloading one profile as collapsed stacks.
+
+    Returns:
+        - Plain text with one `frame;frame;... count` line per distinct stack,
+          for flamegraph.pl, speedscope or similar tools.
+        - Error message with HTTP 404 if the profile is no longer kept.
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(profile.collapsed(), mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename="profile-{profile.id}.collapsed"'})
 
 
 if __name__ == '__main__':
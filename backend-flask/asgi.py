@@ -0,0 +1,372 @@
+"""
+ASGI variant of the resume parsing API.
+
+Serves the same routes as `app.py`, with the same CORS origins, request limits
+and error mapping, on an event loop instead of a thread per request. Text
+extraction runs in worker threads and OpenAI calls are awaited through the
+LLM gateway, so one process can carry hundreds of concurrent parses while
+they wait on the model.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+or, with several worker processes:
+    gunicorn -k uvicorn.workers.UvicornWorker -w 2 -b 0.0.0.0:5000 asgi:app
+
+Background jobs, batches, the parse cache and metrics are shared with the
+Flask app's implementation, so both deployments behave identically.
+"""
+
+import asyncio
+import json
+import time
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.datastructures import UploadFile
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Match, Route
+from werkzeug.datastructures import FileStorage
+
+from app import (BATCH_MAX_CONTENT_LENGTH, CORS_ORIGINS, RATE_LIMIT_API_KEYS, RATE_LIMIT_TRUST_PROXY,
+                 SERVER_TIMING, SSE_KEEPALIVE_SECONDS, STREAM_MIMETYPES, _error_event, _error_response, _format_event,
+                 _is_truthy, _parse_file, _parse_spooled, _stream_format, app as flask_app, job_queue, rate_limiter)
+from batch import iter_batch_items, parse_batch
+from exceptions import ServiceOverloadedError
+from ratelimit import bind_tenant, current_tenant, tenant_key
+from metrics import (REGISTRY, IN_FLIGHT, REQUESTS_TOTAL, begin_memory, begin_request, current_timings,
+                     end_memory, end_request, server_timing_header)
+from services import content_hash, parse_cache, resume_parser_async, resume_parser_stream_async
+from responses import compress, dump_model
+from uploads import SIGNATURES, check_signature, spool_copy
+
+# Seconds between checks for a status change on a job event stream.
+SSE_POLL_SECONDS = 0.25
+
+MAX_CONTENT_LENGTH = flask_app.config['MAX_CONTENT_LENGTH']
+
+
+def _to_file_storage(upload: UploadFile) -> FileStorage:
+    """
+    Wrap a Starlette upload for the parsing services, checking its signature.
+
+    Raises:
+        InvalidFileTypeError: If the content does not match the declared type.
+    """
+    if upload.content_type in SIGNATURES:
+        upload.file.seek(0)
+        check_signature(upload.file.read(8), upload.content_type)
+        upload.file.seek(0)
+    return FileStorage(upload.file, filename=upload.filename, content_type=upload.content_type)
+
+
+def _json_response(payload: dict, status_code: int) -> JSONResponse:
+    headers = {'Retry-After': str(payload["retry_after"])} \
+        if status_code == 429 and "retry_after" in payload else None
+    return JSONResponse(payload, status_code=status_code, headers=headers)
+
+
+def _error(e: Exception) -> JSONResponse:
+    return _json_response(*_error_response(e))
+
+
+# ==============================
+# Endpoints
+# ==============================
+
+async def parse_resume_endpoint(request: Request) -> Response:
+    """Async counterpart of `app.parse_resume_endpoint`; see there for the API."""
+    try:
+        rate_limiter.check(current_tenant.get())
+    except ServiceOverloadedError as e:
+        return _error(e)
+
+    form = await request.form()
+    try:
+        upload = form.get('file')
+        if not isinstance(upload, UploadFile):
+            return JSONResponse({"error": "No file in the request"}, status_code=400)
+        try:
+            file = _to_file_storage(upload)
+        except Exception as e:
+            return _error(e)
+
+        if _is_truthy(request.query_params.get('async')):
+            upload_copy = await asyncio.to_thread(spool_copy, file)
+            try:
+                job = job_queue.submit(bind_tenant(_parse_spooled), upload_copy,
+                                       request.query_params.get('mode') == 'local',
+                                       request.query_params.get('previous'))
+            except ServiceOverloadedError as e:
+                upload_copy.close()
+                return _error(e)
+            return JSONResponse({
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": request.app.url_path_for('job_status_endpoint', job_id=job.id)
+            }, status_code=202)
+
+        stream_format = _stream_format(request.query_params.get('stream'),
+                                       request.headers.get('accept', '').split(',')[0].strip())
+        if stream_format and request.query_params.get('mode') != 'local':
+            return await _stream_parse(request, file, stream_format)
+
+        try:
+            parsed_data = await resume_parser_async(
+                file, local_only=request.query_params.get('mode') == 'local',
+                previous=request.query_params.get('previous'))
+        except Exception as e:
+            return _error(e)
+        body, encoding = compress(
+            dump_model(parsed_data, compact=_is_truthy(request.query_params.get('compact'))),
+            request.headers.get('accept-encoding'))
+        headers = {'Vary': 'Accept-Encoding'}
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        if content_hash():
+            headers['X-Resume-Hash'] = content_hash()
+        return Response(body, media_type='application/json', headers=headers)
+    finally:
+        await form.close()
+
+
+async def _stream_parse(request: Request, file: FileStorage, stream_format: str) -> Response:
+    """Async counterpart of `app._stream_parse`."""
+    try:
+        events = await resume_parser_stream_async(file, previous=request.query_params.get('previous'))
+    except Exception as e:
+        return _error(e)
+
+    async def body():
+        try:
+            async for event in events:
+                yield _format_event(event, stream_format)
+        except Exception as e:
+            yield _format_event(_error_event(e), stream_format)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if content_hash():
+        headers['X-Resume-Hash'] = content_hash()
+    return StreamingResponse(body(), media_type=STREAM_MIMETYPES[stream_format], headers=headers)
+
+
+async def parse_resumes_endpoint(request: Request) -> Response:
+    """Async counterpart of `app.parse_resumes_endpoint`; see there for the API."""
+    form = await request.form()
+    uploads = [item for item in form.getlist('files') + form.getlist('file')
+               if isinstance(item, UploadFile)]
+    if not uploads:
+        return JSONResponse({"error": "No files in the request"}, status_code=400)
+    try:
+        files = [_to_file_storage(upload) for upload in uploads]
+    except Exception as e:
+        return _error(e)
+
+    parse = bind_tenant(_parse_file)
+    items = rate_limiter.charge_each(current_tenant.get(), iter_batch_items(files))
+
+    def results():
+        # Batches keep their bounded thread pool; Starlette iterates this
+        # generator in a worker thread.
+        try:
+            for result in parse_batch(items, parse, _error_response):
+                yield json.dumps(result) + "\n"
+        finally:
+            for upload in uploads:
+                upload.file.close()
+
+    return StreamingResponse(results(), media_type='application/x-ndjson',
+                             headers={'X-Accel-Buffering': 'no'})
+
+
+async def job_status_endpoint(request: Request) -> Response:
+    """Async counterpart of `app.job_status_endpoint`; see there for the API."""
+    job = job_queue.get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({"error": "Job not found or expired"}, status_code=404)
+
+    wants_stream = _is_truthy(request.query_params.get('stream')) or \
+        request.headers.get('accept', '').split(',')[0].strip() == 'text/event-stream'
+    if not wants_stream:
+        return JSONResponse(job.to_dict())
+
+    async def events():
+        # Poll on the event loop rather than blocking a thread per stream.
+        version = -1
+        last_sent = time.monotonic()
+        while True:
+            if job.version != version:
+                version = job.version
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def cache_stats_endpoint(request: Request) -> Response:
+    return JSONResponse(parse_cache.stats())
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return PlainTextResponse(REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+
+# ==============================
+# Middleware
+# ==============================
+
+class RequestLimitMiddleware:
+    """
+    Reject request bodies over the configured limit with 413.
+
+    The Content-Length header is checked before any of the body is read;
+    bodies without one are counted as they stream in.
+    """
+
+    def __init__(self, app, max_content_length: int, limits: Optional[dict] = None):
+        self.app = app
+        self.max_content_length = max_content_length
+        self.limits = limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = self.limits.get(scope["path"], self.max_content_length)
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            return await self._reject(limit, scope, receive, send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if started:
+                raise
+            await self._reject(limit, scope, receive, send)
+
+    async def _reject(self, limit: int, scope, receive, send):
+        response = JSONResponse(
+            {"error": f"Upload exceeds the maximum size of {limit} bytes."}, status_code=413)
+        await response(scope, receive, send)
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class TenantMiddleware:
+    """Attribute each request to a tenant for rate limiting and LLM scheduling."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        token = current_tenant.set(tenant_key(
+            request.headers, request.client.host if request.client else None, RATE_LIMIT_TRUST_PROXY,
+            RATE_LIMIT_API_KEYS))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
+
+
+class MetricsMiddleware:
+    """Per-request metrics and the optional Server-Timing header, as in `app.py`."""
+
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+
+    def _endpoint(self, scope) -> Optional[str]:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return None if route.name == 'metrics_endpoint' else route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        endpoint = self._endpoint(scope)
+        if endpoint is None:
+            return await self.app(scope, receive, send)
+
+        token = begin_request()
+        memory_mark = begin_memory()
+        IN_FLIGHT.inc(endpoint=endpoint)
+
+        async def instrumented_send(message):
+            if message["type"] == "http.response.start":
+                REQUESTS_TOTAL.inc(endpoint=endpoint, status=str(message["status"]))
+                timings = current_timings()
+                if SERVER_TIMING and timings:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", server_timing_header(timings).encode()),
+                        (b"timing-allow-origin", CORS_ORIGINS.encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, instrumented_send)
+        finally:
+            IN_FLIGHT.dec(endpoint=endpoint)
+            end_request(token)
+            end_memory(memory_mark, endpoint=endpoint)
+
+
+# ==============================
+# Application
+# ==============================
+
+# Same CORS scope as the Flask app: only the parsing and job routes.
+_cors = [Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS.split(','),
+                    allow_methods=["GET", "POST"], allow_headers=["*"],
+                    expose_headers=["X-Resume-Hash"])]
+
+routes = [
+    Route('/parse-resume', parse_resume_endpoint, methods=['POST', 'OPTIONS'], middleware=_cors),
+    Route('/parse-resumes', parse_resumes_endpoint, methods=['POST', 'OPTIONS'], middleware=_cors),
+    Route('/jobs/{job_id}', job_status_endpoint, methods=['GET', 'OPTIONS'],
+          name='job_status_endpoint', middleware=_cors),
+    Route('/cache/stats', cache_stats_endpoint, methods=['GET']),
+    Route('/metrics', metrics_endpoint, methods=['GET'], name='metrics_endpoint'),
+]
+
+app = Starlette(routes=routes, middleware=[
+    Middleware(MetricsMiddleware, routes=routes),
+    Middleware(TenantMiddleware),
+    Middleware(RequestLimitMiddleware, max_content_length=MAX_CONTENT_LENGTH,
+               limits={'/parse-resumes': BATCH_MAX_CONTENT_LENGTH}),
+])
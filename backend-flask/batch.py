@@ -0,0 +1,151 @@
+"""
+Bulk resume parsing for cohort imports.
+
+A batch is a list of uploaded files, any of which may be a ZIP archive of
+resumes. Archives are expanded lazily, every resume is parsed on a bounded
+thread pool, and results are yielded as each one finishes so the endpoint can
+stream them back as NDJSON. A failure on one file is reported in that file's
+result and never aborts the batch.
+"""
+
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Tuple, Union
+
+from werkzeug.datastructures import FileStorage
+
+from exceptions import FileTooLargeError, InvalidFileTypeError
+from uploads import DOCX_MIMETYPE, PDF_MIMETYPE, ZIP_MIMETYPES, UploadSpool
+
+MIMETYPES_BY_EXTENSION = {".pdf": PDF_MIMETYPE, ".docx": DOCX_MIMETYPE}
+
+# Maximum number of resumes in one batch, counting every file inside archives.
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+
+# Maximum uncompressed size of a single resume inside a ZIP archive.
+BATCH_MAX_MEMBER_BYTES = int(
+    os.getenv("BATCH_MAX_MEMBER_BYTES", str(10 * 1024 * 1024)))
+
+# Number of resumes parsed concurrently, which bounds concurrent OpenAI calls.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+_MEMBER_CHUNK_BYTES = 64 * 1024
+
+BatchItem = Tuple[str, Union[FileStorage, Exception]]
+
+
+def _is_zip(file: FileStorage) -> bool:
+    return file.mimetype in ZIP_MIMETYPES or (file.filename or "").lower().endswith(".zip")
+
+
+def _iter_zip_members(file: FileStorage) -> Iterator[BatchItem]:
+    try:
+        archive = zipfile.ZipFile(file.stream)
+    except zipfile.BadZipFile:
+        yield file.filename, InvalidFileTypeError("Invalid or corrupt ZIP file.")
+        return
+
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            extension = os.path.splitext(name)[1].lower()
+            if info.is_dir() or name.startswith("__MACOSX/") or extension not in MIMETYPES_BY_EXTENSION:
+                continue
+            if info.file_size > BATCH_MAX_MEMBER_BYTES:
+                yield name, FileTooLargeError(
+                    f"File is larger than {BATCH_MAX_MEMBER_BYTES} bytes.")
+                continue
+            # Copy in chunks up to one byte past the limit, in case the header
+            # under-reports the size; large members are spooled to disk.
+            spool = UploadSpool()
+            with archive.open(info) as member:
+                while spool.tell() <= BATCH_MAX_MEMBER_BYTES:
+                    chunk = member.read(_MEMBER_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    spool.write(chunk)
+            if spool.tell() > BATCH_MAX_MEMBER_BYTES:
+                spool.close()
+                yield name, FileTooLargeError(
+                    f"File is larger than {BATCH_MAX_MEMBER_BYTES} bytes.")
+                continue
+            spool.seek(0)
+            yield name, FileStorage(spool, filename=name,
+                                    content_type=MIMETYPES_BY_EXTENSION[extension])
+
+
+def iter_batch_items(files: Iterable[FileStorage]) -> Iterator[BatchItem]:
+    """
+    Expand uploaded files and ZIP archives into individual resumes.
+
+    Args:
+        files (Iterable[FileStorage]): The uploaded files.
+
+    Yields:
+        tuple[str, FileStorage | Exception]: The resume's name and either the
+        file to parse or the error that prevents parsing it.
+    """
+    count = 0
+    for file in files:
+        items = _iter_zip_members(file) if _is_zip(file) else [
+            (file.filename, file)]
+        for name, item in items:
+            count += 1
+            if count > BATCH_MAX_FILES:
+                yield name, FileTooLargeError(
+                    f"Batch exceeds the maximum of {BATCH_MAX_FILES} files.")
+                return
+            yield name, item
+
+
+def parse_batch(items: Iterable[BatchItem],
+                parse: Callable[[FileStorage], Tuple[dict, int]],
+                error_response: Callable[[Exception], Tuple[dict, int]],
+                concurrency: int = BATCH_CONCURRENCY) -> Iterator[dict]:
+    """
+    Parse resumes concurrently and yield each result as soon as it finishes.
+
+    At most `concurrency` files are in flight at once, and archives are only
+    expanded as slots free up.
+
+    Args:
+        items (Iterable[BatchItem]): Output of `iter_batch_items`.
+        parse (Callable): Maps a file to a `(payload, status_code)` tuple.
+        error_response (Callable): Maps an exception to a `(payload, status_code)` tuple.
+        concurrency (int): Maximum number of files parsed at once.
+
+    Yields:
+        dict: `{"filename", "status", "data"}` on success or
+        `{"filename", "status", "error"}` on failure, in completion order.
+    """
+    def result(name: str, payload: dict, status_code: int) -> dict:
+        if status_code < 400:
+            return {"filename": name, "status": status_code, "data": payload}
+        return {"filename": name, "status": status_code, "error": payload.get("error")}
+
+    items = iter(items)
+    executor = ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="parse-batch")
+    in_flight = {}
+    try:
+        exhausted = False
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < concurrency:
+                try:
+                    name, item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if isinstance(item, Exception):
+                    yield result(name, *error_response(item))
+                else:
+                    in_flight[executor.submit(parse, item)] = name
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield result(in_flight.pop(future), *future.result())
+    finally:
+        # Runs when the client disconnects too: drop anything not yet started.
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,126 @@
+"""
+Latency summaries and baseline comparison shared by the benchmark scripts.
+
+Results are stored in benchmarks/baseline.json as
+`{suite: {case: {"p50_ms", "p95_ms", "p99_ms", "per_second"}}}`. A case
+regresses when its p50 or p95 latency grows, or its throughput drops, by more
+than the tolerance. Baselines are machine-specific: refresh them with
+`--update-baseline` on the machine that runs the comparison.
+"""
+
+import json
+import statistics
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+DEFAULT_TOLERANCE = 0.25
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Return the `q` quantile (0-100) of `samples` by linear interpolation."""
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: Sequence[float], elapsed: float = None) -> Dict[str, float]:
+    """
+    Summarize latencies in seconds.
+
+    Args:
+        samples (Sequence[float]): One latency per operation, in seconds.
+        elapsed (float, optional): Wall-clock seconds for the whole run. When
+            omitted, operations are assumed to have run back to back.
+
+    Returns:
+        dict[str, float]: p50/p95/p99 in milliseconds and operations per second.
+    """
+    elapsed = elapsed if elapsed is not None else sum(samples)
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "per_second": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    width = max(len(name) for name in results)
+    print(f"{'case':<{width}} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for name, row in results.items():
+        print(f"{name:<{width}} {row['p50_ms']:>10.3f} {row['p95_ms']:>10.3f} "
+              f"{row['p99_ms']:>10.3f} {row['per_second']:>10.1f}")
+
+
+def load_baseline(suite: str, path: Path = BASELINE_PATH) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get(suite, {})
+
+
+def save_baseline(suite: str, results: Dict[str, Dict[str, float]], path: Path = BASELINE_PATH) -> None:
+    """Replace `suite` in the baseline file, keeping the other suites."""
+    data = json.loads(path.read_text()) if path.exists() else {}
+    data[suite] = results
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Current summaries by case.
+        baseline (dict): Stored summaries by case; cases missing on either side are skipped.
+        tolerance (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list[str]: One message per regression; empty if none.
+    """
+    regressions = []
+    for name, row in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if reference[metric] and row[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {row[metric]:.2f} vs baseline {reference[metric]:.2f}")
+        if reference["per_second"] and row["per_second"] < reference["per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: per_second {row['per_second']:.1f} vs baseline {reference['per_second']:.1f}")
+    return regressions
+
+
+def report(suite: str, results: Dict[str, Dict[str, float]], update: bool, tolerance: float) -> int:
+    """
+    Print results, then update or check the baseline.
+
+    Returns:
+        int: Process exit code; 1 if any case regressed.
+    """
+    print_table(results)
+    if update:
+        save_baseline(suite, results)
+        print(f"\nBaseline for '{suite}' updated in {BASELINE_PATH.name}.")
+        return 0
+
+    baseline = load_baseline(suite)
+    if not baseline:
+        print(f"\nNo baseline for '{suite}'; run with --update-baseline to record one.")
+        return 0
+    regressions = compare(results, baseline, tolerance)
+    if regressions:
+        print(f"\nRegressions (tolerance {tolerance:.0%}):")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print(f"\nNo regressions against baseline (tolerance {tolerance:.0%}).")
+    return 0
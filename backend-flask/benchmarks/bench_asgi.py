@@ -0,0 +1,44 @@
+"""
+Compare the sync (Flask on threaded gunicorn workers) and ASGI (asgi.py on
+uvicorn workers) deployments under the same high-concurrency load.
+
+Both run with the same number of worker processes against the fake OpenAI
+server, so the difference shows how many parses each can keep in flight
+while waiting on the model.
+
+Usage:
+    python benchmarks/bench_asgi.py [--requests 400] [--concurrency 200]
+        [--latency 0.8] [--workers 2] [--threads 8] [--pages 1]
+"""
+
+import argparse
+
+from load_test import run
+
+COLUMNS = ("p50_ms", "p95_ms", "p99_ms", "per_second", "errors")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    rows = []
+    for server in ("sync", "asgi"):
+        results = run(server, args.pages, args.requests, args.concurrency,
+                      args.latency, args.jitter, args.workers, args.threads)
+        rows.extend((server, case, row) for case, row in results.items())
+
+    print(f"{'server':<7} {'case':<28} " + " ".join(f"{column:>10}" for column in COLUMNS))
+    for server, case, row in rows:
+        print(f"{server:<7} {case:<28} " + " ".join(f"{row[column]:>10.1f}" for column in COLUMNS))
+
+
+if __name__ == "__main__":
+    main()
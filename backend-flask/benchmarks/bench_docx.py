@@ -0,0 +1,158 @@
+"""
+Benchmark streaming DOCX extraction against python-docx on table-heavy resumes.
+
+Generates resumes the way many CV templates lay them out: name and contact
+details in the page header, skills in a two-column table and each job as a
+table row of dates, role and achievements. Each is extracted with the old
+python-docx path (`Document(file).paragraphs`) and with
+`docx_stream.iter_docx_lines`. For a like-for-like comparison, python-docx
+is also timed reading headers and table cells through its object model.
+The script reports:
+
+    - extraction latency per document size, compared with the stored baseline,
+    - peak traced memory (tracemalloc) per extraction,
+    - the share of header and table text each path recovers.
+
+Usage:
+    python benchmarks/bench_docx.py [--entries 5 20 80 320] [--repeat N]
+        [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from docx import Document  # noqa: E402
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from bench_micro import time_calls  # noqa: E402
+from corpus import COMPANIES, HEADER  # noqa: E402
+from docx_stream import iter_docx_lines  # noqa: E402
+
+DEFAULT_ENTRIES = (5, 20, 80, 320)
+
+SKILLS = [
+    ("Languages", "Python, TypeScript, Go, SQL"),
+    ("Frameworks", "Flask, FastAPI, React, Django"),
+    ("Data", "PostgreSQL, Redis, Kafka, Airflow"),
+    ("Cloud", "AWS, Docker, Kubernetes, Terraform"),
+    ("Soft skills", "Leadership, Mentoring, Communication"),
+]
+
+
+def table_resume(entries: int) -> Tuple[bytes, List[str]]:
+    """
+    Build a table-heavy DOCX resume with `entries` jobs.
+
+    Returns:
+        tuple[bytes, list[str]]: The DOCX file and the header and table cell
+        texts an extractor should recover.
+    """
+    document = Document()
+    expected = []
+
+    header = document.sections[0].header.paragraphs[0]
+    header.text = HEADER[0]
+    document.sections[0].header.add_paragraph(HEADER[2])
+    expected += [HEADER[0], HEADER[2]]
+
+    document.add_paragraph("Professional Summary")
+    document.add_paragraph(HEADER[5])
+    document.add_paragraph("Technical Skills")
+    skills = document.add_table(rows=0, cols=2)
+    for category, items in SKILLS:
+        cells = skills.add_row().cells
+        cells[0].text, cells[1].text = category, items
+        expected += [category, items]
+
+    document.add_paragraph("Work Experience")
+    jobs = document.add_table(rows=0, cols=3)
+    for index in range(entries):
+        company = COMPANIES[index % len(COMPANIES)]
+        start = 2024 - index
+        cells = jobs.add_row().cells
+        cells[0].text = f"{start - 1} - {start}"
+        cells[1].text = f"Software Engineer, {company}"
+        cells[2].text = f"Cut p95 latency of the {company} ingestion service by {10 + index % 50}%."
+        expected += [cell.text for cell in cells]
+
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue(), expected
+
+
+def python_docx_text(data: bytes) -> str:
+    """The previous extraction path: paragraphs only."""
+    return "\n".join(paragraph.text for paragraph in Document(io.BytesIO(data)).paragraphs)
+
+
+def python_docx_full_text(data: bytes) -> str:
+    """python-docx reading the same content as the streaming extractor: headers, paragraphs and tables."""
+    document = Document(io.BytesIO(data))
+    lines = [paragraph.text for section in document.sections for paragraph in section.header.paragraphs]
+    lines += [paragraph.text for paragraph in document.paragraphs]
+    lines += [" | ".join(cell.text for cell in row.cells) for table in document.tables for row in table.rows]
+    return "\n".join(lines)
+
+
+def streamed_text(data: bytes) -> str:
+    return "\n".join(iter_docx_lines(io.BytesIO(data)))
+
+
+EXTRACTORS = {"python-docx": python_docx_text, "python-docx+tables": python_docx_full_text,
+              "stream": streamed_text}
+
+
+def peak_memory(func: Callable[[bytes], str], data: bytes) -> int:
+    """Peak traced allocation in bytes during one call."""
+    tracemalloc.start()
+    try:
+        func(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def coverage(text: str, expected: List[str]) -> float:
+    return sum(1 for snippet in expected if snippet in text) / len(expected)
+
+
+def run(entry_counts: List[int], repeat: int) -> Tuple[dict, list]:
+    results = {}
+    rows = []
+    for entries in entry_counts:
+        data, expected = table_resume(entries)
+        for name, extract in EXTRACTORS.items():
+            results[f"{name}:{entries}jobs"] = summarize(time_calls(lambda: extract(data), repeat))
+            rows.append((f"{name}:{entries}jobs", len(data), peak_memory(extract, data),
+                         coverage(extract(data), expected)))
+    return results, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, nargs="+", default=list(DEFAULT_ENTRIES))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results, rows = run(args.entries, args.repeat)
+    width = max(len(row[0]) for row in rows)
+    print(f"{'case':<{width}} {'file KiB':>10} {'peak KiB':>10} {'coverage':>10}")
+    for name, size, peak, covered in rows:
+        print(f"{name:<{width}} {size / 1024:>10.1f} {peak / 1024:>10.1f} {covered:>10.0%}")
+    print()
+    sys.exit(report("docx", results, args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmarks for the CPU-bound parts of the parse path.
+
+Times `_extract_text_from_pdf` and `_extract_text_from_docx` over a generated
+corpus of 1-10 page resumes, plus `ResumeData` validation and JSON
+serialization, and compares the results with the stored baseline.
+
+Usage:
+    python benchmarks/bench_micro.py [--repeat N] [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import services  # noqa: E402
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from corpus import build_corpus  # noqa: E402
+from fake_openai import RESUME  # noqa: E402
+
+EXTRACTORS = {".pdf": services._extract_text_from_pdf, ".docx": services._extract_text_from_docx}
+
+
+def time_calls(func, repeat: int) -> list[float]:
+    func()  # Warm up imports and caches.
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for path in build_corpus(Path(directory)):
+            data = path.read_bytes()
+            extract = EXTRACTORS[path.suffix]
+            results[f"extract:{path.name}"] = summarize(
+                time_calls(lambda: extract(io.BytesIO(data)), repeat))
+
+    payload = json.dumps(RESUME)
+    model = services.ResumeData.model_validate_json(payload)
+    results["validate:ResumeData"] = summarize(
+        time_calls(lambda: services.ResumeData.model_validate_json(payload), repeat * 50))
+    results["serialize:model_dump"] = summarize(time_calls(model.model_dump, repeat * 50))
+    results["serialize:model_dump_json"] = summarize(time_calls(model.model_dump_json, repeat * 50))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    sys.exit(report("micro", run(args.repeat), args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
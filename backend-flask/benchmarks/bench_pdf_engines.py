@@ -0,0 +1,74 @@
+"""
+Benchmark the PDF text engines on the fixture resumes.
+
+For every PDF in tests/fixtures/resumes, each engine ("pdfium", "pdfplumber"
+and "auto") extracts the document repeatedly. The report shows the median
+per-page latency and a quality score: the word-level similarity of the
+engine's output to pdfplumber's layout-aware output (1.0 means identical).
+
+Usage:
+    python benchmarks/bench_pdf_engines.py [--repeat N] [--fixtures DIR]
+"""
+
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import pypdfium2 as pdfium  # noqa: E402
+
+import services  # noqa: E402
+
+ENGINES = ("pdfium", "pdfplumber", "auto")
+
+
+def quality(text: str, reference: str) -> float:
+    """Word-sequence similarity between an engine's output and the reference."""
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def bench_file(path: Path, repeat: int) -> list[dict]:
+    data = path.read_bytes()
+    page_count = len(pdfium.PdfDocument(data))
+    reference = "\n".join(services._iter_pdf_page_texts(data, "pdfplumber"))
+
+    rows = []
+    for engine in ENGINES:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = "\n".join(services._iter_pdf_page_texts(data, engine))
+            timings.append(time.perf_counter() - start)
+        rows.append({
+            "file": path.name,
+            "engine": engine,
+            "pages": page_count,
+            "ms_per_page": statistics.median(timings) / page_count * 1000,
+            "quality": quality(text, reference),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixtures", type=Path,
+                        default=BACKEND_ROOT / "tests" / "fixtures" / "resumes")
+    args = parser.parse_args()
+
+    print(f"{'file':<24} {'engine':<11} {'pages':>5} {'ms/page':>9} {'quality':>8}")
+    for path in sorted(args.fixtures.glob("*.pdf")):
+        for row in bench_file(path, args.repeat):
+            print(f"{row['file']:<24} {row['engine']:<11} {row['pages']:>5} "
+                  f"{row['ms_per_page']:>9.2f} {row['quality']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark the cost of the sampling profiler on CPU-bound extraction.
+
+Extracts the fixture PDF with pdfplumber (pure Python, so the request thread
+holds the GIL and competes with the sampler) and the fixture DOCX, with the
+profiler off and with the request profiled at several sampling intervals,
+and reports:
+
+    - extraction latency per case, compared with the stored baseline,
+    - the overhead of each sampled case relative to "off".
+
+Usage:
+    python benchmarks/bench_profiler.py [--intervals 0.005 0.001] [--repeat N]
+        [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from profiler import Profiler  # noqa: E402
+from services import _extract_text_from_docx, _extract_text_from_pdf  # noqa: E402
+
+FIXTURES = BACKEND_ROOT / "tests" / "fixtures" / "resumes"
+
+WORKLOADS = {
+    "pdfplumber": lambda data: _extract_text_from_pdf(io.BytesIO(data), engine="pdfplumber"),
+    "docx": lambda data: _extract_text_from_docx(io.BytesIO(data)),
+}
+INPUTS = {"pdfplumber": "resume.pdf", "docx": "resume.docx"}
+
+
+def profiled(profiler: Profiler, func, data: bytes) -> None:
+    profile = profiler.begin()
+    try:
+        func(data)
+    finally:
+        if profile is not None:
+            profiler.detach(profile)
+            profiler.finish(profile)
+
+
+def run(intervals: List[float], repeat: int) -> tuple:
+    results = {}
+    overheads = []
+    for name, func in WORKLOADS.items():
+        data = (FIXTURES / INPUTS[name]).read_bytes()
+        cases = {"off": lambda: func(data)}
+        for interval in intervals:
+            profiler = Profiler(sample_rate=1, interval=interval, capacity=1)
+            cases[f"{interval * 1000:g}ms"] = lambda profiler=profiler: profiled(profiler, func, data)
+        # Interleave the cases so that drift in machine load affects them alike.
+        samples = {case: [] for case in cases}
+        for case, call in cases.items():
+            call()  # Warm up imports and caches.
+        for _ in range(repeat):
+            for case, call in cases.items():
+                start = time.perf_counter()
+                call()
+                samples[case].append(time.perf_counter() - start)
+        for case, timings in samples.items():
+            results[f"{name}:{case}"] = summarize(timings)
+        for case in list(cases)[1:]:
+            overheads.append((f"{name}:{case}",
+                              results[f"{name}:{case}"]["p50_ms"] / results[f"{name}:off"]["p50_ms"] - 1))
+    return results, overheads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.005, 0.001],
+                        help="Sampling intervals in seconds")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results, overheads = run(args.intervals, args.repeat)
+    width = max(len(name) for name, _ in overheads)
+    print(f"{'case':<{width}} {'overhead':>10}")
+    for name, overhead in overheads:
+        print(f"{name:<{width}} {overhead:>10.1%}")
+    print()
+    sys.exit(report("profiler", results, args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
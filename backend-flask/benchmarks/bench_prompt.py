@@ -0,0 +1,158 @@
+"""
+Report the input tokens and latency saved by the cache-friendly prompt layout.
+
+Parses the fixture resumes and generated variants of them (PDF and DOCX,
+with different contact details found locally, and DOCX bullets and spacing
+as word processors write them) through `resume_parser`, against the fake
+OpenAI server with its prompt cache simulation on (benchmarks/fake_openai.py),
+once per prompt layout:
+
+    - narrowed: PROMPT_LAYOUT="narrowed" without text compaction, as before,
+    - static: PROMPT_LAYOUT="static" with compacted text,
+    - static+examples: the same with PROMPT_EXAMPLES.
+
+The cache is cleared between layouts, so each one's first parse finds it cold.
+The report shows, per parse, the prompt tokens sent, how many were cached
+and how many were not, the share of each document text compaction removed
+(whitespace runs cost characters but not tokens in `estimate_tokens`), and
+the parse latency compared with the stored baseline.
+
+Usage:
+    python benchmarks/bench_prompt.py [--passes N] [--latency 0.5]
+        [--prefill 0.0001] [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["PARSE_CACHE_BACKEND"] = "none"
+os.environ["PARSE_COALESCE_BACKEND"] = "none"
+
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from corpus import build_docx, build_pdf, resume_lines  # noqa: E402
+from fake_openai import FakeOpenAI  # noqa: E402
+
+FIXTURES = BACKEND_ROOT / "tests" / "fixtures" / "resumes"
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Contact lines of the generated resumes, each leaving different fields to the model.
+CONTACTS = [
+    "jane.doe@example.com | +44 7700 900123 | linkedin.com/in/janedoe | github.com/janedoe",
+    "jane.doe@example.com | +44 7700 900123",
+    "jane.doe@example.com | github.com/janedoe",
+    "London, UK",
+]
+
+CASES = {
+    "narrowed": dict(PROMPT_LAYOUT="narrowed", TEXT_COMPACTION=False, PROMPT_EXAMPLES=False),
+    "static": dict(PROMPT_LAYOUT="static", TEXT_COMPACTION=True, PROMPT_EXAMPLES=False),
+    "static+examples": dict(PROMPT_LAYOUT="static", TEXT_COMPACTION=True, PROMPT_EXAMPLES=True),
+}
+
+
+def documents() -> List[Tuple[str, bytes, str]]:
+    """(name, contents, mimetype) of every document parsed."""
+    docs = [("resume.pdf", (FIXTURES / "resume.pdf").read_bytes(), PDF),
+            ("resume.docx", (FIXTURES / "resume.docx").read_bytes(), DOCX)]
+    for pages in (1, 3):
+        for index, contact in enumerate(CONTACTS):
+            lines = resume_lines(pages)
+            lines[2] = contact
+            docs.append((f"resume_{pages}p_c{index}.pdf", build_pdf(lines), PDF))
+            # Word bullets and spacing, as DOCX extraction yields them.
+            lines = [f"•\t{line[2:]}" if line.startswith("- ") else line.replace(", ", ",  ") for line in lines]
+            docs.append((f"resume_{pages}p_c{index}.docx", build_docx(lines), DOCX))
+    return docs
+
+
+def configure(services, settings: Dict[str, object]) -> None:
+    for name, value in settings.items():
+        setattr(services, name, value)
+    services._static_prefix.cache_clear()
+
+
+def compaction_savings(services, docs: list) -> Tuple[float, float]:
+    """Mean fractions of a document's characters and estimated tokens removed by text compaction."""
+    from text_pipeline import estimate_tokens
+    chars, tokens = [], []
+    for name, data, mimetype in docs:
+        extract = services._EXTRACTORS[mimetype]
+        texts = []
+        for compact in (False, True):
+            services.TEXT_COMPACTION = compact
+            texts.append(extract(io.BytesIO(data)))
+        chars.append(1 - len(texts[1]) / len(texts[0]))
+        tokens.append(1 - estimate_tokens(texts[1]) / estimate_tokens(texts[0]))
+    return statistics.fmean(chars), statistics.fmean(tokens)
+
+
+def run(passes: int, latency: float, prefill: float) -> tuple:
+    fake = FakeOpenAI(latency=latency, prompt_cache=True, prefill=prefill).start()
+    os.environ["OPENAI_BASE_URL"] = fake.url
+    import services
+    from metrics import track_usage
+
+    services.warmup()
+    docs = documents()
+    results, tokens = {}, {}
+    try:
+        for case, settings in CASES.items():
+            configure(services, settings)
+            fake.clear_cache()
+            timings, usages = [], []
+            for _ in range(passes):
+                for name, data, mimetype in docs:
+                    file = FileStorage(io.BytesIO(data), filename=name, content_type=mimetype)
+                    started = time.perf_counter()
+                    with track_usage() as usage:
+                        services.resume_parser(file)
+                    timings.append(time.perf_counter() - started)
+                    usages.append(usage)
+            results[case] = summarize(timings)
+            tokens[case] = {kind: statistics.fmean(usage[kind] for usage in usages)
+                            for kind in ("prompt", "cached")}
+    finally:
+        fake.close()
+
+    savings = compaction_savings(services, docs)
+    return results, tokens, savings, len(docs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--passes", type=int, default=2, help="Times each document is parsed per layout")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake OpenAI seconds per call")
+    parser.add_argument("--prefill", type=float, default=0.0001, help="Fake seconds per uncached prompt token")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results, tokens, savings, count = run(args.passes, args.latency, args.prefill)
+    reference = tokens["narrowed"]["prompt"] - tokens["narrowed"]["cached"]
+    print(f"{count} documents, {args.passes} passes; text compaction removed {savings[0]:.1%} of "
+          f"document characters, {savings[1]:.1%} of estimated tokens\n")
+    print(f"{'layout':<16} {'prompt':>8} {'cached':>8} {'uncached':>9} {'vs narrowed':>12} {'p50 vs narrowed':>16}")
+    for case, counts in tokens.items():
+        uncached = counts["prompt"] - counts["cached"]
+        latency = results[case]["p50_ms"] / results["narrowed"]["p50_ms"] - 1
+        print(f"{case:<16} {counts['prompt']:>8.0f} {counts['cached']:>8.0f} {uncached:>9.0f} "
+              f"{uncached / reference - 1:>12.1%} {latency:>16.1%}")
+    print()
+    sys.exit(report("prompt", results, args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
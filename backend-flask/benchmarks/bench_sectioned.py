@@ -0,0 +1,82 @@
+"""
+Compare single-call and sectioned parsing against the live OpenAI API.
+
+For every fixture resume, both modes parse the same extracted text (the parse
+cache is bypassed) and the report shows the wall-clock time of each mode and
+how many leaf fields of the sectioned result match the single-call result.
+Requires a real OPENAI_API_KEY.
+
+Usage:
+    python benchmarks/bench_sectioned.py [--repeat N] [--fixtures DIR]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+import services  # noqa: E402
+
+
+def flatten(value, prefix=""):
+    """Flatten a model dump into {"experience.0.company": value} leaf fields."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {prefix: value}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def agreement(result, reference) -> float:
+    """Share of the reference's non-empty leaf fields that the result reproduces."""
+    expected = {k: v for k, v in flatten(reference.model_dump()).items() if v not in (None, "")}
+    actual = flatten(result.model_dump())
+    if not expected:
+        return 1.0
+    return sum(1 for k, v in expected.items() if actual.get(k) == v) / len(expected)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fixtures", type=Path,
+                        default=BACKEND_ROOT / "tests" / "fixtures" / "resumes")
+    args = parser.parse_args()
+
+    print(f"{'file':<24} {'single s':>9} {'sectioned s':>12} {'agreement':>10}")
+    for path in sorted(args.fixtures.iterdir()):
+        if path.suffix not in (".pdf", ".docx"):
+            continue
+        with open(path, "rb") as f:
+            extract = services._extract_text_from_pdf if path.suffix == ".pdf" else services._extract_text_from_docx
+            text = extract(f)
+
+        single_times, sectioned_times, scores = [], [], []
+        for _ in range(args.repeat):
+            single, elapsed = timed(services._parse_single, text)
+            single_times.append(elapsed)
+            sectioned, elapsed = timed(services._parse_sectioned, text)
+            sectioned_times.append(elapsed)
+            scores.append(agreement(sectioned, single) if sectioned else 0.0)
+
+        print(f"{path.name:<24} {statistics.median(single_times):>9.2f} "
+              f"{statistics.median(sectioned_times):>12.2f} {statistics.mean(scores):>10.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark response serialization and compression for large resumes.
+
+Times the old `jsonify(model_dump())` path against `dump_model` (straight
+from the Pydantic model to bytes), with and without compact output, plus gzip
+and brotli compression of the result. Prints the response size for each
+variant and compares timings with the stored baseline.
+
+Usage:
+    python benchmarks/bench_serialization.py [--repeat N] [--entries 40]
+        [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import responses  # noqa: E402
+from app import app  # noqa: E402
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from bench_micro import time_calls  # noqa: E402
+from fake_openai import RESUME  # noqa: E402
+from flask import jsonify  # noqa: E402
+from services import ResumeData  # noqa: E402
+
+
+def large_resume(entries: int) -> ResumeData:
+    """A resume with `entries` education, experience and project entries, about half the fields null."""
+    data = dict(RESUME)
+    data["education"] = [dict(RESUME["education"][0], grade=None) for _ in range(entries)]
+    data["experience"] = [dict(RESUME["experience"][0], description=RESUME["experience"][0]["description"] * 4,
+                               end_date=None if i % 2 else "2024") for i in range(entries)]
+    data["projects"] = [dict(RESUME["projects"][0], technologies=[] if i % 2 else ["Python"])
+                        for i in range(entries)]
+    data["skills"] = {"technical": [f"Skill {i}" for i in range(entries)], "soft": []}
+    return ResumeData.model_validate(data)
+
+
+def run(repeat: int, entries: int) -> tuple[dict, dict]:
+    model = large_resume(entries)
+    sizes = {}
+    results = {}
+
+    with app.app_context():
+        body = jsonify(model.model_dump()).get_data()
+        sizes["jsonify(model_dump)"] = len(body)
+        results["serialize:jsonify(model_dump)"] = summarize(
+            time_calls(lambda: jsonify(model.model_dump()).get_data(), repeat))
+
+    for name, compact in (("dump_model", False), ("dump_model(compact)", True)):
+        body = responses.dump_model(model, compact=compact)
+        sizes[name] = len(body)
+        results[f"serialize:{name}"] = summarize(
+            time_calls(lambda: responses.dump_model(model, compact=compact), repeat))
+
+    compact_body = responses.dump_model(model, compact=True)
+    sizes["dump_model(compact)+gzip"] = len(gzip.compress(compact_body, responses.GZIP_LEVEL))
+    results["compress:gzip"] = summarize(
+        time_calls(lambda: gzip.compress(compact_body, responses.GZIP_LEVEL), repeat))
+    if responses.brotli is not None:
+        brotli = responses.brotli
+        sizes["dump_model(compact)+br"] = len(brotli.compress(compact_body, quality=responses.BROTLI_QUALITY))
+        results["compress:brotli"] = summarize(
+            time_calls(lambda: brotli.compress(compact_body, quality=responses.BROTLI_QUALITY), repeat))
+    return results, sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=40)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results, sizes = run(args.repeat, args.entries)
+    width = max(len(name) for name in sizes)
+    print(f"{'response':<{width}} {'bytes':>10}")
+    for name, size in sizes.items():
+        print(f"{name:<{width}} {size:>10}")
+    print()
+    sys.exit(report("serialization", results, args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
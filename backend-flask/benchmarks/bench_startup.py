@@ -0,0 +1,107 @@
+"""
+Benchmark worker start-up: import time of the Flask app and of warmup.
+
+Each run starts a fresh interpreter with `python -X importtime`, as a new
+gunicorn worker (without preload) or an extraction pool worker would, and
+reports:
+
+    - `import app`: total import time of the app, from the importtime report,
+    - `import services`: what an extraction pool worker imports,
+    - `warmup`: `services.warmup()` after import, i.e. what preloading moves
+      out of the workers' first request,
+    - the packages that take longest to import with the app.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--top 10]
+        [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+
+WARMUP_STATEMENT = "import time; started = time.perf_counter(); services.warmup(); print(time.perf_counter() - started)"
+
+
+def importtime(module: str, statement: str = "") -> Tuple[float, Dict[str, float], str]:
+    """
+    Import `module`, then run `statement`, in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        tuple[float, dict[str, float], str]: Seconds to import `module`; the
+        cumulative import seconds of each package it pulled in, keyed by
+        top-level package name; and the statement's standard output.
+    """
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}; {statement}"],
+                             cwd=BACKEND_ROOT, env=env, capture_output=True, text=True, check=True)
+    total = 0.0
+    packages = {}
+    subtree = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        seconds = int(cumulative) / 1_000_000
+        package = name.strip().split(".")[0]
+        subtree[package] = max(subtree.get(package, 0.0), seconds)
+        # A top-level import is reported after everything it imported
+        # (nested imports are indented), which closes its subtree.
+        if not name[1:].startswith(" "):
+            if name.strip() == module:
+                total, packages = seconds, subtree
+            subtree = {}
+    packages.pop(module, None)
+    return total, packages, process.stdout
+
+
+def run(repeat: int) -> Tuple[dict, Dict[str, float], Dict[str, bool]]:
+    samples = defaultdict(list)
+    packages = defaultdict(list)
+    for _ in range(repeat):
+        total, app_packages, _ = importtime("app")
+        samples["import app"].append(total)
+        for name, seconds in app_packages.items():
+            packages[name].append(seconds)
+
+        samples["import services"].append(importtime("services")[0])
+
+        _, _, output = importtime("services", WARMUP_STATEMENT)
+        samples["warmup"].append(float(output.strip().splitlines()[-1]))
+    loaded = {name: name in app_packages for name in ("openai", "pdfplumber", "pypdfium2", "docx")}
+    top = {name: statistics.median(times) for name, times in packages.items()}
+    return {name: summarize(times) for name, times in samples.items()}, top, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results, top, loaded = run(args.repeat)
+    slowest = sorted(top.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    width = max(len("package (import app)"), *(len(name) for name, _ in slowest))
+    print(f"{'package (import app)':<{width}} {'ms':>10}")
+    for name, seconds in slowest:
+        print(f"{name:<{width}} {seconds * 1000:>10.1f}")
+    print("\nImported by `import app`: " + ", ".join(
+        f"{name} {'yes' if imported else 'no'}" for name, imported in loaded.items()) + "\n")
+    sys.exit(report("startup", results, args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark time to first useful field for streamed vs buffered parses.
+
+Posts a resume to `/parse-resume` through the Flask app against the fake
+OpenAI server (benchmarks/fake_openai.py), once as a plain JSON request and
+once with `stream=1`, and reports:
+
+    - buffered: time until the JSON response arrives,
+    - stream:first_field: time until the first event (locally extracted fields),
+    - stream:first_model_field: time until the first field from the model,
+    - stream:result: time until the final result event.
+
+The parse cache is disabled so every request reaches the model.
+
+Usage:
+    python benchmarks/bench_streaming.py [--repeat N] [--latency 3.0]
+        [--first-token 0.4] [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["PARSE_CACHE_BACKEND"] = "none"
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from fake_openai import FakeOpenAI  # noqa: E402
+
+RESUME_PATH = BACKEND_ROOT / "tests" / "fixtures" / "resumes" / "resume.pdf"
+
+
+def post(client, query: str):
+    with open(RESUME_PATH, "rb") as f:
+        return client.post(f"/parse-resume{query}", data={"file": (f, "resume.pdf", "application/pdf")},
+                           buffered=False)
+
+
+def run(repeat: int, latency: float, first_token: float) -> dict:
+    fake = FakeOpenAI(latency=latency, first_token=first_token).start()
+    os.environ["OPENAI_BASE_URL"] = fake.url
+    import services
+    from app import app
+
+    services.warmup()
+    client = app.test_client()
+    post(client, "").get_data()  # Open the upstream connection.
+
+    samples = defaultdict(list)
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = post(client, "")
+            response.get_data()
+            assert response.status_code == 200, response.get_data(as_text=True)
+            samples["buffered"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = post(client, "?stream=1")
+            first_model_field = None
+            for index, line in enumerate(response.response):
+                elapsed = time.perf_counter() - started
+                event = json.loads(line)
+                if index == 0:
+                    samples["stream:first_field"].append(elapsed)
+                if first_model_field is None and event.get("source") != "local" and event["event"] != "result":
+                    first_model_field = elapsed
+                if event["event"] == "result":
+                    samples["stream:result"].append(elapsed)
+                assert event["event"] != "error", event
+            samples["stream:first_model_field"].append(first_model_field)
+    finally:
+        fake.close()
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=3.0, help="Seconds for the fake model's whole answer")
+    parser.add_argument("--first-token", type=float, default=0.4, help="Seconds to the fake model's first token")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    sys.exit(report("streaming", run(args.repeat, args.latency, args.first_token),
+                    args.update_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+A local stand-in for the OpenAI chat completions API.
+
+Answers every POST with a fixed structured-output completion after a
+configurable delay, so load tests exercise the service's real OpenAI client,
+connection pool and parsing path without network calls or API costs. Point
+the service at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Requests with `"stream": true` get the same completion as server-sent chunks:
+the first after `--first-token` seconds, the rest spread evenly over the
+remaining latency.
+
+With `--prompt-cache`, prompts are cached the way OpenAI caches them: the
+longest prefix (response format, then messages) shared with an earlier
+request counts as cached once it reaches 1024 tokens, in 128-token steps,
+and is reported in `usage.prompt_tokens_details.cached_tokens`. `--prefill`
+adds a delay per uncached prompt token. Tokens are counted as 4 characters.
+
+Usage:
+    python benchmarks/fake_openai.py [--port 8765] [--latency 0.8] [--jitter 0.2]
+        [--first-token 0.2] [--prompt-cache] [--prefill 0.0001]
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESUME = {
+    "personal": {"name": "Jane Doe", "job_title": "Senior Software Engineer", "location": "London"},
+    "professional_summary": "Backend engineer building document processing pipelines.",
+    "education": [{"degree": "BSc Computer Science", "institution": "University of Manchester",
+                   "start_date": "2012", "end_date": "2015", "grade": "First Class Honours"}],
+    "experience": [{"job_title": "Software Engineer", "company": "Acme Corp", "start_date": "2023",
+                    "end_date": "2024", "description": "Designed and operated the ingestion service."}],
+    "skills": {"technical": ["Python", "Flask"], "soft": ["Leadership"]},
+    "projects": [{"name": "Resume Parser", "description": "Flask service turning CVs into JSON.",
+                  "technologies": ["Python", "Flask"]}],
+    "certifications": [],
+}
+
+
+# OpenAI caches prompt prefixes of at least this many tokens, in CACHE_STEP increments.
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP = 128
+
+
+def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> dict:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+def completion_body(content: dict, prompt_tokens: int, cached_tokens: int = 0) -> bytes:
+    """A chat.completion payload whose message content is `content` as JSON."""
+    message = json.dumps(content)
+    return json.dumps({
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "logprobs": None,
+            "message": {"role": "assistant", "content": message, "refusal": None},
+        }],
+        "usage": _usage(prompt_tokens, len(message) // 4, cached_tokens),
+    }).encode()
+
+
+def completion_chunks(content: dict, prompt_tokens: int, cached_tokens: int = 0, size: int = 16) -> list:
+    """The `chat.completion.chunk` payloads streaming `content` as JSON, `size` characters at a time."""
+    message = json.dumps(content)
+
+    def chunk(choices: list, usage: dict = None) -> bytes:
+        return json.dumps({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                           "model": "gpt-4o-mini", "choices": choices, "usage": usage}).encode()
+
+    chunks = [chunk([{"index": 0, "delta": {"content": message[start:start + size]}, "finish_reason": None}])
+              for start in range(0, len(message), size)]
+    chunks.append(chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+    chunks.append(chunk([], _usage(prompt_tokens, len(message) // 4, cached_tokens)))
+    return chunks
+
+
+class FakeOpenAI:
+    """
+    Threaded HTTP server answering chat completion requests.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one.
+        latency (float): Mean seconds before each response.
+        jitter (float): Each delay is drawn uniformly from latency ± jitter.
+        first_token (float): Seconds before the first chunk of a streamed response.
+        prompt_cache (bool): Report prefixes shared with earlier prompts as cached.
+        prefill (float): Extra seconds per uncached prompt token.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.8, jitter: float = 0.0, first_token: float = 0.2,
+                 prompt_cache: bool = False, prefill: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.first_token = first_token
+        self.prompt_cache = prompt_cache
+        self.prefill = prefill
+        self.requests = 0
+        self._prompts: deque = deque(maxlen=256)
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real API.
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                request = json.loads(body or b"{}")
+                fake.requests += 1
+                prompt_tokens = len(body) // 4
+                cached_tokens = min(fake.cached_tokens(request), prompt_tokens)
+                latency = max(random.uniform(fake.latency - fake.jitter, fake.latency + fake.jitter), 0)
+                latency += fake.prefill * (prompt_tokens - cached_tokens)
+                if request.get("stream"):
+                    self._stream(completion_chunks(RESUME, prompt_tokens, cached_tokens), latency)
+                    return
+                time.sleep(latency)
+                response = completion_body(RESUME, prompt_tokens, cached_tokens)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def _stream(self, chunks: list, latency: float) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                first_token = min(fake.first_token, latency)
+                time.sleep(first_token)
+                interval = (latency - first_token) / len(chunks)
+                for payload in chunks + [b"[DONE]"]:
+                    event = b"data: " + payload + b"\n\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                    self.wfile.flush()
+                    time.sleep(interval)
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 resets connections under high concurrency.
+            request_queue_size = 1024
+
+        self.server = Server(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def cached_tokens(self, request: dict) -> int:
+        """Tokens of `request`'s prompt prefix cached by earlier requests; remembers its prompt."""
+        if not self.prompt_cache:
+            return 0
+        prompt = json.dumps(request.get("response_format")) + "".join(
+            json.dumps(message) for message in request.get("messages", []))
+        with self._lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._prompts), default=0)
+            self._prompts.append(prompt)
+        tokens = shared // 4
+        if tokens < CACHE_MIN_TOKENS:
+            return 0
+        return CACHE_MIN_TOKENS + (tokens - CACHE_MIN_TOKENS) // CACHE_STEP * CACHE_STEP
+
+    def clear_cache(self) -> None:
+        """Forget every prompt seen so far, as if the cache had expired."""
+        with self._lock:
+            self._prompts.clear()
+
+    def start(self) -> "FakeOpenAI":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--first-token", type=float, default=0.2)
+    parser.add_argument("--prompt-cache", action="store_true")
+    parser.add_argument("--prefill", type=float, default=0.0, help="Seconds per uncached prompt token")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.port, args.latency, args.jitter, args.first_token, args.prompt_cache, args.prefill)
+    print(f"Fake OpenAI listening on {fake.url} (latency {args.latency}s ± {args.jitter}s)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
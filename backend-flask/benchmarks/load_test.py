@@ -0,0 +1,158 @@
+"""
+Load-test POST /parse-resume under gunicorn against a fake OpenAI server.
+
+Starts benchmarks/fake_openai.py in-process, launches gunicorn with the
+service pointed at it (parse cache disabled, so every request reaches the
+"model"), then fires requests from a pool of concurrent clients. Reports
+end-to-end p50/p95/p99 latency and requests per second for each resume in the
+generated corpus, and compares them with the stored baseline.
+
+`--server sync` (default) runs the Flask app on threaded workers;
+`--server asgi` runs asgi.py on uvicorn workers. Each has its own baseline.
+
+Usage:
+    python benchmarks/load_test.py [--server sync|asgi] [--requests 200]
+        [--concurrency 16] [--latency 0.8] [--jitter 0.2] [--workers 2]
+        [--threads 8] [--pages 1 5] [--update-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from baseline import DEFAULT_TOLERANCE, report, summarize  # noqa: E402
+from corpus import build_corpus  # noqa: E402
+from fake_openai import FakeOpenAI  # noqa: E402
+
+MIMETYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+SERVERS = {
+    "sync": lambda threads: ["--threads", str(threads), "app:app"],
+    "asgi": lambda threads: ["-k", "uvicorn.workers.UvicornWorker", "asgi:app"],
+}
+
+SUITES = {"sync": "load", "asgi": "load-asgi"}
+
+
+def start_gunicorn(port: int, openai_url: str, workers: int, threads: int,
+                   server: str = "sync") -> subprocess.Popen:
+    env = dict(os.environ,
+               OPENAI_API_KEY="benchmark",
+               OPENAI_BASE_URL=openai_url,
+               PARSE_CACHE_BACKEND="none")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}",
+         "--workers", str(workers)] + SERVERS[server](threads),
+        cwd=BACKEND_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {process.stderr.read().decode()}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 30 seconds")
+
+
+def load(url: str, path: Path, total: int, concurrency: int) -> dict:
+    """Send `total` uploads of `path` with `concurrency` clients and summarize latency."""
+    data = path.read_bytes()
+    files = {"file": (path.name, data, MIMETYPES[path.suffix])}
+    failures = []
+
+    with httpx.Client(timeout=120, limits=httpx.Limits(max_connections=concurrency)) as client:
+        def one(_) -> float:
+            start = time.perf_counter()
+            try:
+                response = client.post(url, files=files)
+            except httpx.TransportError as e:
+                failures.append(type(e).__name__)
+            else:
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(one, range(concurrency)))  # Warm up connections and workers.
+            failures.clear()
+            start = time.perf_counter()
+            latencies = list(executor.map(one, range(total)))
+            elapsed = time.perf_counter() - start
+
+    summary = summarize(latencies, elapsed)
+    summary["errors"] = len(failures)
+    return summary
+
+
+def run(server: str, pages, total: int, concurrency: int, latency: float, jitter: float,
+        workers: int, threads: int) -> dict:
+    """Start a fake OpenAI server and the service, load-test each corpus file, and stop both."""
+    fake = FakeOpenAI(latency=latency, jitter=jitter).start()
+    port = _free_port()
+    process = start_gunicorn(port, fake.url, workers, threads, server)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for path in build_corpus(Path(directory), pages):
+                results[f"parse-resume:{path.name}"] = load(
+                    f"http://127.0.0.1:{port}/parse-resume", path, total, concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+        fake.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--server", choices=sorted(SERVERS), default="sync")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.8,
+                        help="Mean fake OpenAI response time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.server, args.pages, args.requests, args.concurrency,
+                  args.latency, args.jitter, args.workers, args.threads)
+
+    errors = sum(row.pop("errors") for row in results.values())
+    status = report(SUITES[args.server], results, args.update_baseline, args.tolerance)
+    if errors:
+        print(f"\n{errors} request(s) failed.")
+        status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Replay recorded parses against a new prompt or model.
+
+Reads the corpus written by the parse recorder (PARSE_RECORDING=true, see
+recorder.py), re-parses every recorded text concurrently, and reports:
+
+    - field-level accuracy of the new results against the recorded responses,
+    - token usage and cost, recorded vs replayed,
+    - LLM latency percentiles, recorded vs replayed.
+
+The parse cache is bypassed. Requires an OPENAI_API_KEY (or OPENAI_BASE_URL
+pointing at a compatible server, e.g. benchmarks/fake_openai.py).
+
+Usage:
+    python benchmarks/replay.py [--db parse_records.sqlite3] [--model NAME]
+        [--prompt FILE] [--mode single|sectioned] [--concurrency 8] [--limit N]
+        [--min-accuracy 0.9] [--diffs]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+import services  # noqa: E402
+from baseline import percentile  # noqa: E402
+from metrics import track_usage  # noqa: E402
+from recorder import ParseRecorder, field_accuracy  # noqa: E402
+
+# USD per million tokens for gpt-4o-mini; override with --price-* for other models.
+PRICE_INPUT = 0.15
+PRICE_CACHED = 0.075
+PRICE_OUTPUT = 0.60
+
+
+async def reparse(text: str, mode: str, prompt: Optional[str]) -> services.ResumeData:
+    """Parse `text` the way `resume_parser` would, with the system prompt optionally replaced."""
+    local = services.extract_local(text) if services.LOCAL_PREEXTRACT else {}
+    if mode == "sectioned":
+        parsed = await services._parse_sectioned_async(text)
+        if parsed is not None:
+            return parsed
+    request = services._single_request(text, local)
+    if prompt is not None:
+        request["messages"][0]["content"] = prompt
+    response = await services.gateway.parse(**request)
+    return services._single_result(response, request["response_format"])
+
+
+async def replay(records: list, args: argparse.Namespace, prompt: Optional[str]) -> list:
+    """Re-parse every record, at most `args.concurrency` at a time."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(record: dict) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            with track_usage() as usage:
+                try:
+                    parsed = await reparse(record["text"], args.mode or record["parse_mode"], prompt)
+                except Exception as e:
+                    return {"record": record, "error": str(e)}
+            return {
+                "record": record,
+                "scores": field_accuracy(services.ResumeData.model_validate_json(record["response"]), parsed),
+                "usage": usage,
+                "latency_ms": (time.perf_counter() - started) * 1000,
+            }
+
+    return await asyncio.gather(*(one(record) for record in records))
+
+
+def cost(prompt_tokens: int, cached_tokens: int, completion_tokens: int, args: argparse.Namespace) -> float:
+    return ((prompt_tokens - cached_tokens) * args.price_input + cached_tokens * args.price_cached
+            + completion_tokens * args.price_output) / 1_000_000
+
+
+def delta(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.1%}" if before else "n/a"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="parse_records.sqlite3", help="Recorded parses")
+    parser.add_argument("--model", help="Model to replay with (default: services.MODEL)")
+    parser.add_argument("--prompt", type=Path, help="File with a replacement single-call system prompt")
+    parser.add_argument("--mode", choices=("single", "sectioned"),
+                        help="Parse mode (default: the recorded mode)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--recorded-model", help="Only replay records made with this model")
+    parser.add_argument("--recorded-prompt-version", help="Only replay records made with this prompt version")
+    parser.add_argument("--price-input", type=float, default=PRICE_INPUT)
+    parser.add_argument("--price-cached", type=float, default=PRICE_CACHED)
+    parser.add_argument("--price-output", type=float, default=PRICE_OUTPUT)
+    parser.add_argument("--min-accuracy", type=float, default=0.0,
+                        help="Exit with status 1 if overall accuracy falls below this")
+    parser.add_argument("--diffs", action="store_true", help="List the fields that differ per record")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"No recordings at {args.db}; record some with PARSE_RECORDING=true.")
+        return 1
+    records = list(ParseRecorder(args.db).records(
+        limit=args.limit, model=args.recorded_model, prompt_version=args.recorded_prompt_version))
+    if not records:
+        print("No matching recordings.")
+        return 1
+    if args.model:
+        services.MODEL = args.model
+    prompt = args.prompt.read_text() if args.prompt else None
+
+    started = time.perf_counter()
+    results = services.gateway.run(replay(records, args, prompt))
+    elapsed = time.perf_counter() - started
+
+    done = [result for result in results if "error" not in result]
+    failed = [result for result in results if "error" in result]
+    print(f"Replayed {len(done)} of {len(records)} recordings in {elapsed:.1f}s with "
+          f"{services.MODEL}{', prompt ' + str(args.prompt) if args.prompt else ''}"
+          f" ({len(failed)} failed)\n")
+    for result in failed:
+        print(f"  #{result['record']['id']}: {result['error']}")
+    if not done:
+        return 1
+
+    fields = list(done[0]["scores"])
+    accuracy = {name: statistics.fmean(result["scores"][name] for result in done) for name in fields}
+    overall = statistics.fmean(accuracy.values())
+    width = max(len(name) for name in fields)
+    print(f"{'field':<{width}} {'accuracy':>9}")
+    for name, score in accuracy.items():
+        print(f"{name:<{width}} {score:>9.1%}")
+    print(f"{'overall':<{width}} {overall:>9.1%}\n")
+
+    if args.diffs:
+        for result in done:
+            differing = [name for name, score in result["scores"].items() if score < 1]
+            if differing:
+                print(f"  #{result['record']['id']}: {', '.join(differing)}")
+        print()
+
+    recorded = {
+        "calls": sum(result["record"]["calls"] for result in done),
+        "prompt": sum(result["record"]["prompt_tokens"] for result in done),
+        "cached": sum(result["record"]["cached_tokens"] for result in done),
+        "completion": sum(result["record"]["completion_tokens"] for result in done),
+    }
+    replayed = {kind: sum(result["usage"][kind] for result in done) for kind in recorded}
+    rows = [(f"{kind} tokens" if kind != "calls" else "LLM calls", recorded[kind], replayed[kind])
+            for kind in recorded]
+    rows.append(("cost USD", cost(recorded["prompt"], recorded["cached"], recorded["completion"], args),
+                 cost(replayed["prompt"], replayed["cached"], replayed["completion"], args)))
+    for q in (50, 95):
+        rows.append((f"latency p{q} ms",
+                     percentile([result["record"]["latency_ms"] for result in done], q),
+                     percentile([result["latency_ms"] for result in done], q)))
+
+    print(f"{'':<18} {'recorded':>12} {'replay':>12} {'delta':>8}")
+    for name, before, after in rows:
+        fmt = ">12.4f" if name == "cost USD" else ">12.0f"
+        print(f"{name:<18} {before:{fmt}} {after:{fmt}} {delta(before, after):>8}")
+
+    if overall < args.min_accuracy:
+        print(f"\nOverall accuracy {overall:.1%} is below --min-accuracy {args.min_accuracy:.1%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+Content-addressed cache for parsed resume results.
+
+Parsed results are keyed on a hash of the normalized extracted text plus the
+prompt, model and schema versions, so re-uploads of the same resume skip the
+OpenAI call entirely. Values are stored as JSON strings so that any backend can
+hold them without knowing about the Pydantic models.
+
+Backends:
+    - MemoryBackend: in-process LRU with TTL and size-based eviction.
+    - SQLiteBackend: on-disk store shared by every gunicorn worker on the host.
+    - NullBackend: disables caching.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlite_local import LocalConnections
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different extractions hash identically."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_key(text: str, *parts: str) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        text (str): The extracted resume text.
+        *parts (str): Version identifiers (prompt, model, schema) mixed into the key.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ==============================
+# Backends
+# ==============================
+
+
+class CacheBackend:
+    """Interface every cache backend implements."""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class NullBackend(CacheBackend):
+    """A backend that never stores anything."""
+
+    name = "none"
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU cache with a TTL and entry/byte limits.
+
+    Args:
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Maximum number of entries before LRU eviction.
+        max_bytes (int): Maximum total size of stored values before LRU eviction.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    On-disk cache shared across processes through a SQLite database in WAL mode.
+
+    Args:
+        path (str): Location of the database file.
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Maximum number of rows before least-recently-used rows are deleted.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._db = LocalConnections(path)
+        with self._db.get() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS parse_cache_accessed ON parse_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._db.get()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM parse_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < now:
+            conn.execute("DELETE FROM parse_cache WHERE key = ?", (key,))
+            return None
+        conn.execute(
+            "UPDATE parse_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._db.get()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO parse_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl, now),
+        )
+        conn.execute("DELETE FROM parse_cache WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM parse_cache WHERE key IN ("
+            " SELECT key FROM parse_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        self._db.get().execute("DELETE FROM parse_cache")
+
+    def __len__(self) -> int:
+        return self._db.get().execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+
+
+# ==============================
+# Cache Front-End
+# ==============================
+
+
+class ParseCache:
+    """
+    Wraps a backend with hit/miss accounting.
+
+    Backend failures are logged and treated as misses so that a broken cache
+    never breaks parsing.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.peek(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[str]:
+        """Look up `key` without counting a hit or miss, e.g. for a lookup that is not a parse."""
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Parse cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Parse cache store failed: {e}")
+
+    def clear(self) -> None:
+        """Remove every entry and reset the hit/miss counters."""
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counts for this process along with the backend size."""
+        lookups = self.hits + self.misses
+        try:
+            entries = len(self.backend)
+        except Exception:
+            entries = None
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+def create_cache_from_env(prefix: str = "PARSE_CACHE") -> ParseCache:
+    """
+    Build a ParseCache from environment variables.
+
+    Parse results, the texts kept for incremental re-parsing and OCR output
+    each get their own cache (prefixes "PARSE_CACHE", "TEXT_CACHE" and
+    "OCR_CACHE"), so they neither evict one another nor mix their hit rates.
+
+    Args:
+        prefix (str): Prefix of the environment variables below.
+
+    Environment:
+        <prefix>_BACKEND: "memory", "sqlite" or "none" (default PARSE_CACHE_BACKEND, else "memory").
+        <prefix>_TTL: Entry lifetime in seconds (default 86400).
+        <prefix>_MAX_ENTRIES: Maximum number of entries (default 1024).
+        <prefix>_MAX_BYTES: Maximum in-memory size in bytes (default 64 MiB).
+        <prefix>_PATH: SQLite database path (default "<prefix in lower case>.sqlite3",
+                       e.g. "parse_cache.sqlite3").
+    """
+    backend_name = os.getenv(f"{prefix}_BACKEND", os.getenv("PARSE_CACHE_BACKEND", "memory")).lower()
+    ttl = float(os.getenv(f"{prefix}_TTL", "86400"))
+    max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", "1024"))
+
+    if backend_name == "none":
+        backend = NullBackend()
+    elif backend_name == "sqlite":
+        backend = SQLiteBackend(
+            os.getenv(f"{prefix}_PATH", f"{prefix.lower()}.sqlite3"), ttl=ttl, max_entries=max_entries)
+    elif backend_name == "memory":
+        backend = MemoryBackend(
+            ttl=ttl,
+            max_entries=max_entries,
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+    else:
+        raise ValueError(f"Unknown {prefix}_BACKEND: {backend_name}")
+
+    return ParseCache(backend)
@@ -0,0 +1,378 @@
+"""
+Single-flight coalescing of identical concurrent parses.
+
+Double-clicks and client retries often send the same resume two or three
+times within a second. SingleFlight runs one call per key at a time: callers
+that arrive while a call for their key is in flight wait for it and get its
+outcome, the same result or the same error, instead of starting their own.
+
+Within a process, waiters block until the first caller's call returns
+(`do`), or await it without blocking the event loop (`do_async`). Calls
+that cannot be wrapped in one function, such as a stream passed on as it
+runs, take their turn with `lead` or `lead_async` instead.
+Across gunicorn workers on one host, a lease row in a SQLite database stops
+a second worker from starting the same call: the worker holding the lease
+stores the outcome in it, and workers waiting on the lease poll for it. A
+lease whose holder died lapses after `lease_seconds`, and a waiting worker
+then runs the call itself.
+
+Outcomes are passed as strings, so the caller serializes its own result.
+Only the exceptions defined in exceptions.py are handed to other workers;
+after any other error, waiting workers run the call themselves.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import exceptions
+from exceptions import ParsingError, ServiceOverloadedError
+from metrics import COALESCED_TOTAL
+from sqlite_local import LocalConnections
+
+logger = logging.getLogger(__name__)
+
+# Errors every caller of a coalesced parse should see alike.
+SHARED_ERRORS = (ParsingError, ServiceOverloadedError)
+
+
+def _encode_error(error: Exception) -> str:
+    return json.dumps({"error": type(error).__name__, "message": str(error),
+                       "retry_after": getattr(error, "retry_after", None)})
+
+
+def _decode(outcome: str) -> str:
+    """Return the value stored by `SQLiteLeases.finish`, or raise the error stored instead."""
+    data = json.loads(outcome)
+    if "value" in data:
+        return data["value"]
+    error = getattr(exceptions, data["error"])(data["message"])
+    if data["retry_after"] is not None:
+        error.retry_after = data["retry_after"]
+    raise error
+
+
+# ==============================
+# Cross-Worker Leases
+# ==============================
+
+
+class SQLiteLeases:
+    """
+    Leases on keys, shared by every process on the host through a SQLite database.
+
+    Args:
+        path (str): Location of the database file.
+        lease_seconds (float): How long a lease holds before another process may take it over.
+        poll_interval (float): Seconds between checks while waiting on another process's lease.
+    """
+
+    # How long a finished outcome stays readable by processes still polling for it.
+    RETENTION = 10.0
+
+    def __init__(self, path: str, lease_seconds: float = 90, poll_interval: float = 0.05):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._db = LocalConnections(path)
+        self._db.get().execute(
+            "CREATE TABLE IF NOT EXISTS flights ("
+            " key TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " outcome TEXT)"
+        )
+
+    def acquire(self, key: str) -> Optional[str]:
+        """
+        Take the lease on `key` unless another process holds it.
+
+        A finished lease counts as free: its outcome is only for processes
+        that were already waiting on it.
+
+        Returns:
+            str | None: An owner token for `finish` and `release`, or None if
+            the lease is held elsewhere.
+        """
+        conn = self._db.get()
+        now = time.time()
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM flights WHERE expires_at < ?", (now,))
+            row = conn.execute("SELECT outcome FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] is None:
+                return None
+            conn.execute("INSERT OR REPLACE INTO flights (key, owner, expires_at, outcome) VALUES (?, ?, ?, NULL)",
+                         (key, owner, now + self.lease_seconds))
+            return owner
+        finally:
+            conn.execute("COMMIT")
+
+    def finish(self, key: str, owner: str, outcome: str) -> None:
+        """Store the outcome of the call made under the lease, for the processes waiting on it."""
+        self._db.get().execute("UPDATE flights SET outcome = ?, expires_at = ? WHERE key = ? AND owner = ?",
+                                (outcome, time.time() + self.RETENTION, key, owner))
+
+    def release(self, key: str, owner: str) -> None:
+        """Give up the lease without an outcome, so a waiting process runs the call itself."""
+        self._db.get().execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, owner))
+
+    def wait(self, key: str) -> Optional[str]:
+        """
+        Wait for the process holding the lease on `key` to finish.
+
+        Returns:
+            str | None: The stored outcome, or None if the lease was released or lapsed.
+        """
+        conn = self._db.get()
+        while True:
+            time.sleep(self.poll_interval)
+            row = conn.execute("SELECT outcome, expires_at FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[0] is None and row[1] < time.time()):
+                return None
+            if row[0] is not None:
+                return row[0]
+
+
+# ==============================
+# Single Flight
+# ==============================
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class Turn:
+    """
+    A caller's turn at a coalesced call (see `SingleFlight.lead`).
+
+    Attributes:
+        outcome (str | None): The result of the call. Set on entry if another
+            caller made the call; otherwise the caller makes it and passes the
+            result to `finish`.
+    """
+
+    def __init__(self, outcome: Optional[str] = None):
+        self.outcome = outcome
+
+    def finish(self, value: str) -> None:
+        self.outcome = value
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, sharing its outcome with concurrent callers.
+
+    Args:
+        leases (SQLiteLeases, optional): Also coalesce with other processes on the host.
+        enabled (bool): With False, every call runs on its own.
+    """
+
+    def __init__(self, leases: Optional[SQLiteLeases] = None, enabled: bool = True):
+        self.leases = leases
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], str]) -> str:
+        """
+        Call `func`, or wait for the call already in flight for `key`.
+
+        Returns:
+            str: The result of the call.
+
+        Raises:
+            Whatever the call raised.
+        """
+        with self.lead(key) as turn:
+            if turn.outcome is None:
+                turn.finish(func())
+        return turn.outcome
+
+    async def do_async(self, key: str, func: Callable[[], Awaitable[str]]) -> str:
+        """Async version of `do`, awaiting `func()`; waiting does not block the event loop."""
+        async with self.lead_async(key) as turn:
+            if turn.outcome is None:
+                turn.finish(await func())
+        return turn.outcome
+
+    @contextmanager
+    def lead(self, key: str) -> Iterator[Turn]:
+        """
+        Take the turn to make the call for `key`, or get the outcome of the call in flight.
+
+        For calls that cannot be wrapped in one function, e.g. a stream whose
+        events are passed on while it runs. An error raised in the block is
+        shared with waiting callers as in `do`; if the block is interrupted
+        (e.g. a generator closed early) or leaves without calling
+        `Turn.finish`, a waiting caller makes the call itself.
+
+        Yields:
+            Turn: The outcome to reuse, or the turn to make the call.
+        """
+        if not self.enabled:
+            yield Turn()
+            return
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                break
+            COALESCED_TOTAL.inc(scope="process")
+            flight.done.wait()
+            outcome = self._followed(flight)
+            if outcome is not None:
+                yield Turn(outcome)
+                return
+
+        turn = Turn()
+        try:
+            owner, outcome = self._lease(key) if self.leases is not None else (None, None)
+            if outcome is not None:
+                turn.outcome = _decode(outcome)
+            try:
+                yield turn
+            except BaseException as e:
+                self._settle(key, owner, turn, e)
+                raise
+            self._settle(key, owner, turn)
+            flight.value = turn.outcome
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._leave(key, flight)
+
+    @asynccontextmanager
+    async def lead_async(self, key: str) -> AsyncIterator[Turn]:
+        """Async version of `lead`; waiting and leases run on worker threads."""
+        if not self.enabled:
+            yield Turn()
+            return
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                break
+            COALESCED_TOTAL.inc(scope="process")
+            await asyncio.to_thread(flight.done.wait)
+            outcome = self._followed(flight)
+            if outcome is not None:
+                yield Turn(outcome)
+                return
+
+        turn = Turn()
+        try:
+            owner, outcome = await asyncio.to_thread(self._lease, key) if self.leases is not None else (None, None)
+            if outcome is not None:
+                turn.outcome = _decode(outcome)
+            try:
+                yield turn
+            except BaseException as e:
+                await asyncio.to_thread(self._settle, key, owner, turn, e)
+                raise
+            await asyncio.to_thread(self._settle, key, owner, turn)
+            flight.value = turn.outcome
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._leave(key, flight)
+
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        """Return the flight for `key` and whether this caller starts it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                return flight, True
+            return flight, False
+
+    def _leave(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            del self._flights[key]
+        flight.done.set()
+
+    @staticmethod
+    def _followed(flight: _Flight) -> Optional[str]:
+        """The outcome of a finished flight, None if it was abandoned, or its error raised."""
+        if isinstance(flight.error, SHARED_ERRORS):
+            # A copy, so concurrent raises don't grow one shared traceback.
+            raise copy.copy(flight.error)
+        if isinstance(flight.error, Exception):
+            raise flight.error
+        return flight.value
+
+    def _lease(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Take the host-wide lease on `key`, or wait for another process's outcome.
+
+        Returns:
+            tuple: `(owner, None)` with the lease, `(None, outcome)` if another
+            process made the call, or `(None, None)` if the lease failed and
+            the call should run without one.
+        """
+        try:
+            owner = self.leases.acquire(key)
+            while owner is None:
+                outcome = self.leases.wait(key)
+                if outcome is not None:
+                    COALESCED_TOTAL.inc(scope="host")
+                    return None, outcome
+                owner = self.leases.acquire(key)
+            return owner, None
+        except sqlite3.Error as e:
+            logger.warning(f"Coalescing lease failed: {e}")
+            return None, None
+
+    def _settle(self, key: str, owner: Optional[str], turn: Turn, error: Optional[BaseException] = None) -> None:
+        """Store the outcome of a call made under a lease for waiting processes, or give the lease up."""
+        if owner is None:
+            return
+        # A lease that cannot be settled lapses on its own; the call's outcome stands.
+        try:
+            if isinstance(error, SHARED_ERRORS):
+                self.leases.finish(key, owner, _encode_error(error))
+            elif error is None and turn.outcome is not None:
+                self.leases.finish(key, owner, json.dumps({"value": turn.outcome}))
+            else:
+                self.leases.release(key, owner)
+        except sqlite3.Error as e:
+            logger.warning(f"Coalescing lease failed: {e}")
+
+
+def create_single_flight_from_env() -> SingleFlight:
+    """
+    Build a SingleFlight from environment variables.
+
+    Environment:
+        PARSE_COALESCE_BACKEND: "memory" (default) coalesces within a process,
+            "sqlite" also across processes on the host, "none" disables it.
+        PARSE_COALESCE_PATH: SQLite database path (default "parse_coalesce.sqlite3").
+        PARSE_COALESCE_LEASE: Seconds before a lease whose holder never
+            finished may be taken over (default 90).
+        PARSE_COALESCE_POLL: Seconds between checks on another process's lease (default 0.05).
+    """
+    backend_name = os.getenv("PARSE_COALESCE_BACKEND", "memory").lower()
+    if backend_name == "none":
+        return SingleFlight(enabled=False)
+    if backend_name == "memory":
+        return SingleFlight()
+    if backend_name == "sqlite":
+        return SingleFlight(SQLiteLeases(
+            os.getenv("PARSE_COALESCE_PATH", "parse_coalesce.sqlite3"),
+            lease_seconds=float(os.getenv("PARSE_COALESCE_LEASE", "90")),
+            poll_interval=float(os.getenv("PARSE_COALESCE_POLL", "0.05")),
+        ))
+    raise ValueError(f"Unknown PARSE_COALESCE_BACKEND: {backend_name}")
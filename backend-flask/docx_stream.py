@@ -0,0 +1,177 @@
+"""
+Streaming text extraction from DOCX files.
+
+A DOCX file is a zip archive whose body text lives in `word/document.xml`.
+Rather than building python-docx's object model for the whole document, the
+part is decompressed and parsed incrementally with lxml, and each element is
+discarded once its text has been read, so memory stays flat however long the
+document is, and extraction can stop as soon as the caller has enough text.
+
+Unlike python-docx's `Document.paragraphs`, the output also covers:
+    - tables, one line per row with cells separated by " | ",
+    - text boxes (their paragraphs come just before the paragraph they are anchored to),
+    - page headers, which many CV templates use for the name and contact details.
+"""
+
+import posixpath
+import zipfile
+from typing import BinaryIO, Iterator, List
+
+from lxml import etree
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+_RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_HEADER = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/header"
+
+_P = _W + "p"
+_T = _W + "t"
+_TBL = _W + "tbl"
+_TR = _W + "tr"
+_TC = _W + "tc"
+# Alternative renderings of the same content (e.g. a text box as DrawingML
+# and again as VML for older readers); only the preferred one is read.
+_FALLBACK = _MC + "Fallback"
+
+# Run content other than text that reads as a character.
+_RUN_CHARACTERS = {
+    _W + "tab": "\t",
+    _W + "br": "\n",
+    _W + "cr": "\n",
+    _W + "noBreakHyphen": "-",
+}
+
+# Only these elements are reported by the parser; formatting and other
+# markup, most of a typical document, never reaches Python.
+_EVENT_TAGS = [_P, _T, _TBL, _TR, _TC, _FALLBACK, *_RUN_CHARACTERS]
+
+CELL_SEPARATOR = " | "
+
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+
+def _iter_part_lines(source: BinaryIO) -> Iterator[str]:
+    """
+    Yield the lines of one WordprocessingML part (document body or header) in reading order.
+
+    Every paragraph outside a table is a line; every table row is a line of
+    its non-empty cells, each cell being its paragraphs joined by spaces.
+    """
+    paragraphs: List[List[str]] = []  # Text runs of each open paragraph.
+    cells: List[List[str]] = []  # Paragraphs of each open table cell.
+    rows: List[List[str]] = []  # Cells of each open table row.
+    fallback_depth = 0
+
+    for event, element in etree.iterparse(source, events=("start", "end"), tag=_EVENT_TAGS,
+                                          resolve_entities=False, no_network=True):
+        tag = element.tag
+        if tag == _FALLBACK:
+            fallback_depth += 1 if event == "start" else -1
+            continue
+        if fallback_depth:
+            continue
+
+        if event == "start":
+            if tag == _P:
+                paragraphs.append([])
+            elif tag == _TC:
+                cells.append([])
+            elif tag == _TR:
+                rows.append([])
+            continue
+
+        if tag == _T:
+            if paragraphs:
+                paragraphs[-1].append(element.text or "")
+        elif tag in _RUN_CHARACTERS:
+            if paragraphs:
+                paragraphs[-1].append(_RUN_CHARACTERS[tag])
+        elif tag == _P:
+            line = "".join(paragraphs.pop())
+            if cells:
+                cells[-1].append(line)
+            else:
+                yield line
+        elif tag == _TC:
+            rows[-1].append(" ".join(line.strip() for line in cells.pop() if line.strip()))
+        elif tag == _TR:
+            line = CELL_SEPARATOR.join(cell for cell in rows.pop() if cell)
+            if cells:  # A table nested in a cell.
+                cells[-1].append(line)
+            elif line:
+                yield line
+        else:
+            continue
+
+        # The element's text has been consumed: drop it, and its finished
+        # siblings, so the tree only ever holds the path to the current element.
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> List[tuple]:
+    """
+    Read the relationships of a part (or of the package, for part "").
+
+    Returns:
+        list[tuple[str, str]]: (relationship type, target part name) pairs, in file order.
+    """
+    directory, name = posixpath.split(part)
+    rels_name = posixpath.join(directory, "_rels", name + ".rels")
+    try:
+        data = archive.read(rels_name)
+    except KeyError:
+        return []
+    root = etree.fromstring(data, etree.XMLParser(resolve_entities=False, no_network=True))
+    relationships = []
+    for rel in root.iter(_RELS + "Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(directory, target))
+        relationships.append((rel.get("Type"), target))
+    return relationships
+
+
+def iter_docx_lines(file: BinaryIO) -> Iterator[str]:
+    """
+    Yield the text of a DOCX file line by line: page headers first, then the body.
+
+    Identical headers (e.g. first-page and default headers with the same
+    content) are only emitted once.
+
+    Args:
+        file (BinaryIO): A seekable binary file-like object holding the DOCX file.
+
+    Yields:
+        str: One paragraph or table row, possibly empty.
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a zip archive.
+        KeyError: If the archive has no document part.
+        lxml.etree.XMLSyntaxError: If a part is not well-formed XML.
+    """
+    with zipfile.ZipFile(file) as archive:
+        document = next((target for rel_type, target in _relationships(archive, "")
+                         if rel_type == _OFFICE_DOCUMENT), DEFAULT_DOCUMENT_PART)
+
+        seen_headers = set()
+        for rel_type, target in _relationships(archive, document):
+            if rel_type != _HEADER or target not in archive.NameToInfo:
+                continue
+            with archive.open(target) as part:
+                lines = tuple(line for line in _iter_part_lines(part) if line.strip())
+            if lines and lines not in seen_headers:
+                seen_headers.add(lines)
+                yield from lines
+
+        with archive.open(document) as part:
+            yield from _iter_part_lines(part)
@@ -21,3 +21,31 @@ class EmptyFileError(ParsingError):
 class OpenAIFailureError(ParsingError):
     """Raised when the OpenAI API call fails or returns invalid data."""
     pass
+
+
+class ServiceOverloadedError(Exception):
+    """Raised when the service sheds load instead of accepting more work."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FileTooLargeError(ParsingError):
+    """Raised when a file exceeds the configured size or page limits."""
+    pass
+
+
+class ExtractionTimeoutError(ParsingError):
+    """Raised when text extraction does not finish within the time limit."""
+    pass
+
+
+class CircuitOpenError(OpenAIFailureError):
+    """Raised without calling OpenAI while the circuit breaker is open."""
+    pass
+
+
+class InvalidAIResponseError(OpenAIFailureError):
+    """Raised when the AI answers, but with nothing usable."""
+    pass
@@ -0,0 +1,237 @@
+"""
+Process pool for CPU-bound resume text extraction.
+
+pdfminer (behind pdfplumber) is pure Python, so running it on a request thread holds the GIL and stalls everything else in the worker.
+ExtractionPool runs extraction in separate processes instead. Workers import
+the parsing libraries once when they start, uploads are streamed to a worker
+in chunks rather than read into memory first, and each task gets a hard
+timeout, counted from when a worker picks it up. A task over its timeout (or
+one that crashes its worker) only costs that worker, which is terminated and
+replaced; tasks running on the other workers are unaffected.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any, BinaryIO, Callable, List, Optional, Sequence, Set
+
+from exceptions import ExtractionTimeoutError, ParsingError
+
+# Bytes per message when streaming an upload to a worker.
+_CHUNK_BYTES = 1024 * 1024
+
+
+def _warm_worker() -> None:
+    """Import the extraction stack before the first task arrives."""
+    import pdfplumber  # noqa: F401
+    import pypdfium2  # noqa: F401
+    import services  # noqa: F401
+
+
+def _receive_file(conn: Connection) -> BinaryIO:
+    """Spool an upload streamed by `ExtractionPool.run_file` (see `uploads.UploadSpool`)."""
+    from uploads import UploadSpool
+    spool = UploadSpool()
+    while True:
+        chunk = conn.recv_bytes()
+        if not chunk:
+            break
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def _serve(conn: Connection) -> None:
+    """Worker process main loop: run `(func, args, streamed)` tasks until told to stop."""
+    _warm_worker()
+    conn.send(None)
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        func, args, streamed = task
+        file = _receive_file(conn) if streamed else None
+        try:
+            reply = (True, func(file, *args) if streamed else func(*args))
+        except Exception as e:
+            reply = (False, e)
+        finally:
+            if file is not None:
+                file.close()
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled.
+            conn.send((False, ParsingError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    """One worker process and the pipe it takes tasks on."""
+
+    def __init__(self, context: multiprocessing.context.BaseContext):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        # Wait until the worker has imported the extraction stack, so that
+        # start-up does not count against the first task's timeout.
+        self.conn.recv()
+
+    def stop(self, terminate: bool = False) -> None:
+        if not terminate:
+            try:
+                self.conn.send(None)
+            except OSError:
+                terminate = True
+        if terminate:
+            self.process.terminate()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    A lazily started process pool with a per-task timeout.
+
+    Args:
+        workers (int): Number of worker processes; 0 disables the pool.
+        timeout (float): Seconds a single task may run once a worker has picked it up.
+        start_method (str): multiprocessing start method for the workers.
+    """
+
+    def __init__(self, workers: int = 0, timeout: float = 30, start_method: str = "spawn"):
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._idle: List[_Worker] = []
+        self._all: Set[_Worker] = set()
+        self._slots = threading.BoundedSemaphore(max(workers, 1))
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _acquire(self) -> _Worker:
+        """Wait for a free slot and return an idle worker, starting one if needed."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            worker = _Worker(multiprocessing.get_context(self.start_method))
+            with self._lock:
+                self._all.add(worker)
+            return worker
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: _Worker, broken: bool) -> None:
+        with self._lock:
+            if broken:
+                self._all.discard(worker)
+            else:
+                self._idle.append(worker)
+        if broken:
+            # The stuck or crashed worker is replaced on the next call.
+            worker.stop(terminate=True)
+        self._slots.release()
+
+    def warm(self) -> None:
+        """Start every worker process now rather than on the first upload."""
+        workers = [self._acquire() for _ in range(self.workers)]
+        for worker in workers:
+            self._release(worker, broken=False)
+
+    def _call(self, func: Callable[..., Any], args: tuple, file: Optional[BinaryIO] = None) -> Any:
+        worker = self._acquire()
+        broken = True
+        try:
+            worker.conn.send((func, args, file is not None))
+            if file is not None:
+                file.seek(0)
+                while True:
+                    chunk = file.read(_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    worker.conn.send_bytes(chunk)
+                worker.conn.send_bytes(b"")
+            if not worker.conn.poll(self.timeout):
+                raise ExtractionTimeoutError(
+                    "Text extraction took too long. The file may be too complex to process.")
+            ok, result = worker.conn.recv()
+            broken = False
+        except (EOFError, OSError):
+            # The worker died mid-task, e.g. a native library crashed on the file.
+            raise ParsingError("Text extraction failed. The file may be corrupt.")
+        finally:
+            self._release(worker, broken)
+        if not ok:
+            raise result
+        return result
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `func(*args)` in a worker process and return its result.
+
+        Exceptions raised by `func` are re-raised in the caller.
+
+        Raises:
+            ExtractionTimeoutError: If the task does not finish within `timeout`.
+            ParsingError: If the worker process dies while running the task.
+        """
+        return self._call(func, args)
+
+    def run_file(self, func: Callable[..., Any], file: BinaryIO, *args: Any) -> Any:
+        """
+        Run `func(spooled_copy, *args)` in a worker process and return its result.
+
+        `file` is streamed to the worker in chunks and spooled there, so the
+        caller never holds the whole upload in memory.
+
+        Raises:
+            ExtractionTimeoutError: If the task does not finish within `timeout`.
+            ParsingError: If the worker process dies while running the task.
+        """
+        return self._call(func, args, file)
+
+    def run_all(self, func: Callable[..., Any], arg_list: Sequence[tuple]) -> List[Any]:
+        """
+        Run `func(*args)` for each argument tuple in parallel and return the results in order.
+
+        Each task has its own `timeout`, counted from when a worker picks it up.
+
+        Raises:
+            ExtractionTimeoutError: If a task does not finish within `timeout`.
+            ParsingError: If a worker process dies while running a task.
+        """
+        if len(arg_list) <= 1:
+            return [self._call(func, args) for args in arg_list]
+        with ThreadPoolExecutor(max_workers=min(len(arg_list), self.workers)) as threads:
+            return list(threads.map(lambda args: self._call(func, args), arg_list))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._all = self._all, set()
+            idle, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop(terminate=worker not in idle)
+
+
+def create_extraction_pool_from_env() -> ExtractionPool:
+    """
+    Build an ExtractionPool from environment variables.
+
+    Environment:
+        EXTRACTION_WORKERS: Worker processes; 0 (default) extracts inline.
+        EXTRACTION_TIMEOUT: Per-file timeout in seconds, from when a worker starts on it (default 30).
+        EXTRACTION_START_METHOD: multiprocessing start method (default "spawn").
+    """
+    return ExtractionPool(
+        workers=int(os.getenv("EXTRACTION_WORKERS", "0")),
+        timeout=float(os.getenv("EXTRACTION_TIMEOUT", "30")),
+        start_method=os.getenv("EXTRACTION_START_METHOD", "spawn"),
+    )
@@ -0,0 +1,32 @@
+"""
+gunicorn settings for the Flask app.
+
+The app is imported once in the master (`preload_app`) and warmed up there
+before the workers are forked, so a new or recycled worker serves its first
+request without importing the OpenAI client or building request schemas.
+Workers share the preloaded memory copy-on-write.
+
+Command-line flags (e.g. `-b`, `--threads`) override these settings.
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+
+# With several workers, they coalesce duplicate uploads with each other, not
+# only within themselves (see coalesce.py). A single worker coalesces in
+# process, without the SQLite lease round-trips. The app is loaded before
+# `-w` is read, so set PARSE_COALESCE_BACKEND yourself when using it.
+if workers > 1:
+    os.environ.setdefault("PARSE_COALESCE_BACKEND", "sqlite")
+
+
+def when_ready(server):
+    import services
+
+    timings = services.warmup()
+    server.log.info("Warmed up in %.0f ms (%s)", sum(timings.values()) * 1000,
+                    ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items()))
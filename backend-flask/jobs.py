@@ -0,0 +1,172 @@
+"""
+In-process job queue for asynchronous resume parsing.
+
+`POST /parse-resume?async=1` submits work here and returns a job id at once;
+a bounded thread pool runs the parse while clients poll `GET /jobs/<id>` or
+subscribe to its Server-Sent Events stream. Submissions beyond the pending
+limit are rejected with ServiceOverloadedError, and finished jobs are
+forgotten after a configurable TTL.
+
+Job state lives in the worker process, so it is only visible to requests
+served by the same process.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from exceptions import ServiceOverloadedError
+from metrics import begin_memory, end_memory
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """A single parse job and its outcome."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.payload: Optional[dict] = None
+        self.status_code: Optional[int] = None
+        # Content hash of the parsed text, for the client's next `previous=`.
+        self.resume_hash: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Bumped on every status change so streaming clients can wait for the next one.
+        self.version = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> dict:
+        """Serialize the job for the polling and streaming endpoints."""
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == DONE:
+            data["result"] = self.payload
+            if self.resume_hash:
+                data["resume_hash"] = self.resume_hash
+        elif self.status == FAILED:
+            data["error"] = (self.payload or {}).get("error")
+            data["status_code"] = self.status_code
+        return data
+
+
+class JobQueue:
+    """
+    Runs jobs on a bounded thread pool with backpressure and result expiry.
+
+    Args:
+        max_workers (int): Number of jobs that run concurrently.
+        max_pending (int): Maximum queued plus running jobs before submissions are rejected.
+        result_ttl (float): Seconds a finished job's result is kept.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, result_ttl: float = 600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, func: Callable[..., tuple], *args) -> Job:
+        """
+        Queue `func(*args)` for execution.
+
+        `func` must return a `(payload, status_code)` tuple, or
+        `(payload, status_code, resume_hash)`; a status below 400 marks the
+        job as done, anything else as failed.
+
+        Raises:
+            ServiceOverloadedError: If the pending limit has been reached.
+        """
+        with self._cond:
+            self._expire()
+            if self._pending >= self.max_pending:
+                raise ServiceOverloadedError(
+                    "Too many resumes are being processed. Please try again shortly.",
+                    retry_after=5,
+                )
+            if self._executor is None:
+                # Created lazily so gunicorn forks before any threads exist.
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="parse-job")
+            job = Job()
+            self._jobs[job.id] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def _run(self, job: Job, func: Callable[..., tuple], args: tuple) -> None:
+        self._update(job, RUNNING)
+        # Jobs run outside any request, so they are measured on their own.
+        memory_mark = begin_memory()
+        try:
+            payload, status_code, *rest = func(*args)
+            job.resume_hash = rest[0] if rest else None
+        except Exception as e:
+            payload, status_code = {"error": str(e)}, 500
+        finally:
+            end_memory(memory_mark, endpoint="job")
+        self._update(job, DONE if status_code < 400 else FAILED,
+                     payload, status_code)
+
+    def _update(self, job: Job, status: str, payload: Optional[dict] = None, status_code: Optional[int] = None) -> None:
+        with self._cond:
+            job.status = status
+            job.payload = payload
+            job.status_code = status_code
+            job.version += 1
+            if job.finished:
+                job.finished_at = time.time()
+                self._pending -= 1
+            self._cond.notify_all()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job, or None if it is unknown or its result has expired."""
+        with self._cond:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def wait(self, job: Job, version: int, timeout: float) -> bool:
+        """
+        Block until the job changes past `version` or `timeout` elapses.
+
+        Returns:
+            bool: True if the job changed, False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: job.version > version, timeout=timeout)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def create_job_queue_from_env() -> JobQueue:
+    """
+    Build a JobQueue from environment variables.
+
+    Environment:
+        JOB_WORKERS: Concurrent parse jobs per process (default 4).
+        JOB_MAX_PENDING: Queue depth before returning 429 (default 32).
+        JOB_RESULT_TTL: Seconds finished results are kept (default 600).
+    """
+    return JobQueue(
+        max_workers=int(os.getenv("JOB_WORKERS", "4")),
+        max_pending=int(os.getenv("JOB_MAX_PENDING", "32")),
+        result_ttl=float(os.getenv("JOB_RESULT_TTL", "600")),
+    )
@@ -0,0 +1,538 @@
+"""
+Gateway for all OpenAI calls made by the service.
+
+Wraps an `AsyncOpenAI` client with:
+    - a tuned httpx connection pool shared by every request in the process,
+    - exponential-backoff retries that honour `Retry-After` headers,
+    - a per-request deadline covering all retries,
+    - optional hedged duplicate requests once a call runs past a latency threshold,
+    - a circuit breaker that fails fast while the upstream is down,
+    - an optional concurrency governor that queues calls fairly per tenant,
+    - response-format JSON schemas built once per model class rather than per call.
+
+The gateway owns a background event loop thread, so synchronous callers
+(Flask views, job and batch threads) can share one pool of connections via
+`parse_sync`, while async callers await `parse` directly.
+
+The openai package takes over half a second to import, so it is only
+imported on first use (or by `services.warmup`), keeping it out of
+processes that never call the API, such as extraction pool workers.
+"""
+
+import asyncio
+import contextvars
+import email.utils
+import functools
+import os
+import queue
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import httpx
+
+from exceptions import CircuitOpenError, InvalidAIResponseError, OpenAIFailureError
+from metrics import OPENAI_IN_FLIGHT, record_usage
+from ratelimit import ConcurrencyGovernor, create_governor_from_env
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+@functools.cache
+def retryable_errors() -> tuple:
+    """Errors worth retrying: network failures, timeouts, rate limits and 5xx responses."""
+    import openai
+    return openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError
+
+
+@functools.lru_cache(maxsize=None)
+def response_format_param(response_format: type) -> dict:
+    """
+    Build the strict JSON schema request parameter for a Pydantic model.
+
+    `beta.chat.completions.parse` rebuilds it on every call, which costs
+    several milliseconds of CPU for ResumeData; built once here and reused.
+    """
+    from openai.lib._parsing._completions import type_to_response_format_param
+    return type_to_response_format_param(response_format)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the server's requested delay from `retry-after-ms` or `retry-after`."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            parsed = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        return max(parsed.timestamp() - time.time(), 0)
+    return None
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures.
+
+    While open, calls fail immediately. After `reset_timeout` seconds one trial
+    call is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial already running.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(
+            "AI service is temporarily unavailable. Please try again shortly.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """Return the `q` quantile (0-1), or None until enough samples exist."""
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class LLMGateway:
+    """
+    Resilient async access to the OpenAI API.
+
+    Args:
+        api_key (str): OpenAI API key.
+        base_url (str, optional): API base URL, e.g. a local stub server in tests.
+        deadline (float): Seconds a `parse` call may take, including retries.
+        max_retries (int): Retries after the first attempt for transient errors.
+        backoff_base (float): First retry delay in seconds; doubles each retry.
+        backoff_max (float): Upper bound for a single retry delay.
+        hedge_after (str, optional): "p95" to hedge after the observed p95
+            latency, a number of seconds, or None to disable hedging.
+        max_connections (int): httpx connection pool size.
+        max_keepalive_connections (int): Idle connections kept open.
+        breaker (CircuitBreaker, optional): Circuit breaker; one is created if omitted.
+        governor (ConcurrencyGovernor, optional): Limits concurrent calls
+            across tenants; None leaves them unlimited.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str] = None, deadline: float = 60,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8,
+                 hedge_after: Optional[str] = None, max_connections: int = 50,
+                 max_keepalive_connections: int = 20, breaker: Optional[CircuitBreaker] = None,
+                 governor: Optional[ConcurrencyGovernor] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.breaker = breaker or CircuitBreaker()
+        self.governor = governor
+        self.latency = LatencyTracker()
+        # httpx connections are bound to the loop that opened them, so each
+        # event loop gets its own client.
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = \
+            weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_pid: Optional[int] = None
+        self._loop_lock = threading.Lock()
+
+    # ------------------------------
+    # Async API
+    # ------------------------------
+
+    def _client(self) -> "AsyncOpenAI":
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # Retries are handled here so they share one deadline.
+                http_client=httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=httpx.Timeout(self.deadline, connect=5),
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_after:
+            return None
+        if self.hedge_after == "p95":
+            return self.latency.percentile(0.95)
+        return float(self.hedge_after)
+
+    async def _attempt(self, kwargs: dict) -> Any:
+        start = time.monotonic()
+        response_format = kwargs.get("response_format")
+        with OPENAI_IN_FLIGHT.track_inprogress():
+            if isinstance(response_format, type):
+                # Same as `beta.chat.completions.parse`, with the schema built once.
+                from openai import NOT_GIVEN
+                from openai.lib._parsing._completions import parse_chat_completion
+                completion = await self._client().chat.completions.create(
+                    **dict(kwargs, response_format=response_format_param(response_format)))
+                response = parse_chat_completion(response_format=response_format, chat_completion=completion,
+                                                 input_tools=kwargs.get("tools", NOT_GIVEN))
+            else:
+                response = await self._client().beta.chat.completions.parse(**kwargs)
+        self.latency.record(time.monotonic() - start)
+        record_usage(response.usage)
+        return response
+
+    async def _hedged_attempt(self, kwargs: dict) -> Any:
+        """Run one attempt, racing a duplicate request if it is slower than the hedge delay."""
+        delay = self._hedge_delay()
+        primary = asyncio.ensure_future(self._attempt(kwargs))
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        tasks = {primary, asyncio.ensure_future(self._attempt(kwargs))}
+        try:
+            first_error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def parse(self, **kwargs: Any) -> Any:
+        """
+        Call `chat.completions.parse` with retries, deadline, hedging and circuit breaking.
+
+        With a governor, the call first waits for a slot on behalf of the
+        current tenant; the deadline starts once it has one.
+
+        Args:
+            **kwargs: Arguments for `client.beta.chat.completions.parse`.
+
+        Returns:
+            ParsedChatCompletion: The OpenAI response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            ServiceOverloadedError: If the governor sheds the call.
+            OpenAIFailureError: If the deadline passes before a response arrives.
+            openai.OpenAIError: The last error if retries are exhausted or the
+                                error is not retryable.
+        """
+        if self.governor is None:
+            return await self._parse(kwargs)
+        async with self.governor.slot():
+            return await self._parse(kwargs)
+
+    async def _parse(self, kwargs: dict) -> Any:
+        self.breaker.before_call()
+        deadline_at = asyncio.get_running_loop().time() + self.deadline
+        response = await self._with_retries(lambda: self._hedged_attempt(kwargs), deadline_at)
+        self.breaker.record_success()
+        return response
+
+    def _record_transient(self, error: Exception) -> None:
+        """
+        Report a transient error that was not retried away to the circuit breaker.
+
+        Connection errors and 5xx responses count as failures. A 429 only means
+        this client is being throttled by a healthy upstream, so it counts like
+        any other answer instead of opening the circuit for all traffic.
+        """
+        import openai
+        if isinstance(error, openai.RateLimitError):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def _with_retries(self, call: Callable[[], Awaitable], deadline_at: float) -> Any:
+        """
+        Await `call()` until it succeeds, retrying transient errors until `deadline_at` (loop time).
+
+        Failures are reported to the circuit breaker; success is left to the caller.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - loop.time()
+            try:
+                return await asyncio.wait_for(call(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise OpenAIFailureError(
+                    f"AI service did not respond within {self.deadline:g} seconds.")
+            except retryable_errors() as e:
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+                    delay *= random.uniform(0.5, 1)  # Jitter so workers don't retry in lockstep.
+                if attempt == self.max_retries or loop.time() + delay >= deadline_at:
+                    self._record_transient(e)
+                    raise
+                await asyncio.sleep(delay)
+            except Exception:
+                # Non-transient errors (bad request, auth, validation) say nothing
+                # about upstream health, but must release a half-open trial.
+                self.breaker.record_success()
+                raise
+
+    async def stream(self, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding its content as it is generated.
+
+        Retries, the deadline, circuit breaking and the governor apply as for
+        `parse`, except that transient errors are only retried until the
+        response starts arriving, and streamed calls are never hedged.
+
+        Args:
+            **kwargs: Arguments for `client.chat.completions.create`; a Pydantic
+                model as `response_format` is sent as its strict JSON schema.
+
+        Yields:
+            str: Content deltas.
+
+        Raises:
+            Same as `parse`, and InvalidAIResponseError if the response is cut
+            off by the token limit or the content filter.
+        """
+        if self.governor is None:
+            async for delta in self._stream(kwargs):
+                yield delta
+            return
+        async with self.governor.slot():
+            async for delta in self._stream(kwargs):
+                yield delta
+
+    async def _stream(self, kwargs: dict) -> AsyncIterator[str]:
+        self.breaker.before_call()
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        response_format = kwargs.get("response_format")
+        if isinstance(response_format, type):
+            kwargs = dict(kwargs, response_format=response_format_param(response_format))
+        kwargs = dict(kwargs, stream=True, stream_options={"include_usage": True})
+
+        start = time.monotonic()
+        with OPENAI_IN_FLIGHT.track_inprogress():
+            chunks = await self._with_retries(lambda: self._client().chat.completions.create(**kwargs), deadline_at)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(chunks), timeout=deadline_at - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    # Only the last chunk carries usage.
+                    record_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.delta.content:
+                        yield choice.delta.content
+                    if choice.finish_reason in ("length", "content_filter"):
+                        raise InvalidAIResponseError(f"AI response was cut off ({choice.finish_reason}).")
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise OpenAIFailureError(
+                    f"AI service did not respond within {self.deadline:g} seconds.")
+            except retryable_errors() as e:
+                self._record_transient(e)
+                raise
+            except (Exception, GeneratorExit):
+                # The upstream answered; the stream was rejected or abandoned here.
+                self.breaker.record_success()
+                raise
+            finally:
+                await chunks.close()
+        self.latency.record(time.monotonic() - start)
+        self.breaker.record_success()
+
+    # ------------------------------
+    # Sync bridge
+    # ------------------------------
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            # Started lazily, and again after a fork, since threads do not survive fork().
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-gateway",
+                                 daemon=True).start()
+                self._loop = loop
+                self._loop_pid = os.getpid()
+            return self._loop
+
+    def run(self, coro: Awaitable) -> Any:
+        """
+        Run a coroutine on the gateway's event loop and wait for its result.
+
+        The caller's context variables are visible inside the coroutine.
+        """
+        loop = self._get_loop()
+        future: Future = Future()
+        context = contextvars.copy_context()
+
+        def start() -> None:
+            task = asyncio.ensure_future(coro)
+
+            def done(task: asyncio.Task) -> None:
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+
+            task.add_done_callback(done)
+
+        loop.call_soon_threadsafe(start, context=context)
+        return future.result()
+
+    def parse_sync(self, **kwargs: Any) -> Any:
+        """Blocking version of `parse` for synchronous callers."""
+        return self.run(self.parse(**kwargs))
+
+    def iterate(self, iterator: AsyncIterator) -> Iterator:
+        """
+        Consume an async iterator on the gateway's event loop from synchronous code.
+
+        The whole iteration runs as one task, so context managers in an async
+        generator may span its yields. The caller's context variables are
+        visible inside it. Items are buffered until the caller takes them, and
+        closing the returned iterator early cancels the task.
+        """
+        items: queue.SimpleQueue = queue.SimpleQueue()
+        end = object()
+
+        async def pump() -> None:
+            try:
+                async for item in iterator:
+                    items.put((item, None))
+            except Exception as e:
+                items.put((end, e))
+            else:
+                items.put((end, None))
+            finally:
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+
+        # Scheduled from this thread, so the task starts from a copy of its context.
+        task: Future = asyncio.run_coroutine_threadsafe(pump(), self._get_loop())
+        try:
+            while True:
+                item, error = items.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            task.cancel()
+
+
+def create_gateway_from_env() -> LLMGateway:
+    """
+    Build an LLMGateway from environment variables.
+
+    Environment:
+        OPENAI_API_KEY: API key.
+        OPENAI_BASE_URL: Optional API base URL.
+        LLM_DEADLINE: Seconds per request including retries (default 60).
+        LLM_MAX_RETRIES: Retries for transient errors (default 3).
+        LLM_HEDGE_AFTER: "p95", a number of seconds, or empty to disable (default).
+        LLM_MAX_CONNECTIONS: Connection pool size (default 50).
+        LLM_MAX_KEEPALIVE: Idle keep-alive connections (default 20).
+        LLM_BREAKER_THRESHOLD: Consecutive failures that open the circuit (default 5).
+        LLM_BREAKER_RESET: Seconds before a trial call is allowed (default 30).
+
+    See `ratelimit.create_governor_from_env` for the concurrency governor settings.
+    """
+    return LLMGateway(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        deadline=float(os.getenv("LLM_DEADLINE", "60")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        hedge_after=os.getenv("LLM_HEDGE_AFTER") or None,
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+        ),
+        governor=create_governor_from_env(),
+    )
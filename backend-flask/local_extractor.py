@@ -0,0 +1,210 @@
+"""
+Rule-based extraction of resume fields that do not need a language model.
+
+Contact details (email, phone, LinkedIn and GitHub URLs) follow rigid formats
+and are pulled out with regular expressions; skills are matched against a
+dictionary within the resume's skills section. The result is a partial
+ResumeData that serves instant "local-only" previews and fills fields the
+LLM left empty.
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+from sectioning import PERSONAL, SKILLS, heading_section, split_sections
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+
+PHONE_RE = re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{5,}\d(?![\w/])")
+
+_YEAR_RANGE_RE = re.compile(r"(19|20)\d{2}\s*[-–]\s*(19|20)\d{2}")
+
+# Fewer digits than this is a date, a grade or an ID rather than a phone number.
+_MIN_PHONE_DIGITS = 7
+
+LINKEDIN_RE = re.compile(
+    r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/in/[\w%-]+/?", re.IGNORECASE)
+
+GITHUB_RE = re.compile(
+    r"(?:https?://)?(?:www\.)?github\.com/[\w-]+(?![\w/-])/?", re.IGNORECASE)
+
+TECHNICAL_SKILLS = [
+    # Languages
+    "Python", "JavaScript", "TypeScript", "Java", "C", "C++", "C#", "Go", "Rust", "Ruby", "PHP",
+    "Swift", "Kotlin", "Scala", "R", "MATLAB", "Perl", "Dart", "Elixir", "Haskell", "Lua",
+    "SQL", "NoSQL", "HTML", "CSS", "Sass", "Bash", "PowerShell", "GraphQL", "Solidity",
+    # Frameworks and libraries
+    "React", "Next.js", "Vue", "Vue.js", "Nuxt", "Angular", "Svelte", "Redux", "jQuery",
+    "Node.js", "Express", "NestJS", "Django", "Flask", "FastAPI", "Spring", "Spring Boot",
+    "Rails", "Ruby on Rails", "Laravel", ".NET", "ASP.NET", "Tailwind", "Tailwind CSS", "Bootstrap",
+    "React Native", "Flutter", "Electron", "TensorFlow", "PyTorch", "Keras", "scikit-learn",
+    "Pandas", "NumPy", "SciPy", "Matplotlib", "Spark", "Hadoop", "Kafka", "Airflow",
+    "Pydantic", "Celery", "Jest", "Mocha", "Cypress", "Selenium", "Playwright", "pytest", "JUnit",
+    # Data stores
+    "PostgreSQL", "MySQL", "SQLite", "MongoDB", "Redis", "Elasticsearch", "Cassandra",
+    "DynamoDB", "Firebase", "Supabase", "Oracle", "SQL Server", "Snowflake", "BigQuery",
+    # Cloud and tooling
+    "AWS", "Azure", "GCP", "Google Cloud", "Lambda", "S3", "EC2", "Docker", "Kubernetes",
+    "Terraform", "Ansible", "Jenkins", "GitHub Actions", "GitLab CI", "CircleCI", "CI/CD",
+    "Git", "Linux", "Nginx", "Webpack", "Vite", "Babel", "Figma", "Jira", "Postman",
+    "REST", "gRPC", "WebSocket", "WebSockets", "Microservices", "OpenAI", "LangChain",
+    "Machine Learning", "Deep Learning", "NLP", "Computer Vision", "Data Analysis",
+]
+
+SOFT_SKILLS = [
+    "Communication", "Leadership", "Teamwork", "Team Collaboration", "Collaboration",
+    "Problem-Solving", "Problem Solving", "Critical Thinking", "Time Management",
+    "Adaptability", "Creativity", "Attention to Detail", "Mentoring", "Project Management",
+    "Stakeholder Management", "Public Speaking", "Negotiation", "Conflict Resolution",
+    "Decision Making", "Emotional Intelligence", "Organisation", "Organization",
+    "Self-Motivated", "Work Ethic", "Customer Service", "Presentation Skills",
+]
+
+# Separators between items in a skills list, e.g. "Python, SQL | Docker • Git".
+_SKILL_SEPARATORS_RE = re.compile(r"[,;|•·/\n()]+")
+
+_SKILL_LABEL_RE = re.compile(r"^[^:\n]{1,30}:", re.MULTILINE)
+
+
+# Skills that are also everyday words ("Go", "Express", "Spring"); like terms
+# of up to three characters ("C", "R"), they only match in their own casing.
+AMBIGUOUS_SKILLS = {
+    "Go", "Express", "Swift", "Spring", "Rust", "Ruby", "Dart", "Rails", "Electron", "Flutter",
+    "Spark", "Lambda", "Oracle", "Jest", "Mocha", "Babel", "Celery", "Angular", "Elixir", "Keras",
+}
+
+
+def _skill_pattern(skill: str) -> re.Pattern:
+    # \b does not work next to symbols like "C++" or ".NET", so look for
+    # non-word-ish characters around the term instead.
+    flags = 0 if len(skill) <= 3 or skill in AMBIGUOUS_SKILLS else re.IGNORECASE
+    return re.compile(r"(?<![\w.+#-])" + re.escape(skill) + r"(?![\w+#-]|\.\w)", flags)
+
+
+_SKILL_PATTERNS = {skill: _skill_pattern(skill)
+                   for skill in TECHNICAL_SKILLS + SOFT_SKILLS}
+
+_KNOWN_SKILLS = {skill.lower() for skill in TECHNICAL_SKILLS + SOFT_SKILLS}
+
+
+def _first(pattern: re.Pattern, text: str) -> Optional[str]:
+    match = pattern.search(text)
+    return match.group(0).strip() if match else None
+
+
+def _find_phone(text: str) -> Optional[str]:
+    for match in PHONE_RE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = sum(c.isdigit() for c in candidate)
+        # "2018 - 2020 (2 years)" is a date range, not a number.
+        if digits < _MIN_PHONE_DIGITS or _YEAR_RANGE_RE.search(candidate) \
+                or candidate.count("(") != candidate.count(")"):
+            continue
+        return candidate
+    return None
+
+
+def _match_skills(text: str, dictionary: List[str]) -> List[str]:
+    positions = {}
+    for skill in dictionary:
+        match = _SKILL_PATTERNS[skill].search(text)
+        if match:
+            positions[skill] = match.start()
+    # Report skills in the order the resume lists them.
+    found = sorted(positions, key=positions.get)
+    # Drop terms that only matched as part of a longer one ("Collaboration"
+    # inside "Team Collaboration").
+    return [skill for skill in found
+            if not any(other != skill and f" {skill.lower()} " in f" {other.lower()} " for other in found)]
+
+
+def _looks_like_name(line: str) -> bool:
+    words = line.split()
+    return 2 <= len(words) <= 4 and all(word[:1].isupper() and word.replace("-", "").replace("'", "").isalpha()
+                                        for word in words)
+
+
+def extract_personal(text: str) -> Dict[str, str]:
+    """
+    Extract contact fields with regular expressions.
+
+    Args:
+        text (str): The extracted resume text.
+
+    Returns:
+        dict[str, str]: Any of "name", "email", "phone", "linkedin" and "github"
+        that were found.
+    """
+    sections = split_sections(text)
+    header = sections.get(PERSONAL, "")
+
+    fields = {
+        "email": _first(EMAIL_RE, header) or _first(EMAIL_RE, text),
+        "phone": _find_phone(header) or _find_phone(text),
+        "linkedin": _first(LINKEDIN_RE, text),
+        "github": _first(GITHUB_RE, text),
+    }
+
+    first_line = next((line.strip()
+                      for line in header.split("\n") if line.strip()), "")
+    if _looks_like_name(first_line):
+        fields["name"] = first_line
+
+    return {key: value for key, value in fields.items() if value}
+
+
+def extract_skills(text: str) -> Dict[str, List[str]]:
+    """
+    Match technical and soft skills against the skills dictionary.
+
+    Only the skills section is searched: elsewhere, terms like "Go" or
+    "Spring" are as likely to be ordinary words.
+
+    Args:
+        text (str): The extracted resume text.
+
+    Returns:
+        dict[str, list[str]]: "technical" and/or "soft" skill lists, if any matched.
+    """
+    source = split_sections(text).get(SKILLS)
+    if not source:
+        return {}
+    skills = {
+        "technical": _match_skills(source, TECHNICAL_SKILLS),
+        "soft": _match_skills(source, SOFT_SKILLS),
+    }
+    return {key: value for key, value in skills.items() if value}
+
+
+def skills_fully_covered(text: str) -> bool:
+    """
+    Return True if every item in the resume's skills section is a known skill.
+
+    When this holds, the dictionary result is complete and the LLM does not
+    need to extract skills at all.
+    """
+    section = split_sections(text).get(SKILLS)
+    if not section:
+        return False
+
+    items: Set[str] = set()
+    for line in section.split("\n"):
+        if heading_section(line):
+            continue
+        line = _SKILL_LABEL_RE.sub("", line)
+        items.update(item.strip().lower()
+                     for item in _SKILL_SEPARATORS_RE.split(line) if item.strip())
+    return bool(items) and items <= _KNOWN_SKILLS
+
+
+def extract_local(text: str) -> dict:
+    """
+    Build a partial ResumeData payload from rule-based extraction alone.
+
+    Args:
+        text (str): The extracted resume text.
+
+    Returns:
+        dict: `{"personal": {...}, "skills": {...}}` with only the fields found.
+    """
+    return {"personal": extract_personal(text), "skills": extract_skills(text)}
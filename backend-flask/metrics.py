@@ -0,0 +1,429 @@
+"""
+Lightweight Prometheus-style instrumentation for the parse path.
+
+Provides counters, gauges and histograms rendered in the Prometheus text
+exposition format, plus per-request stage timing:
+
+    with stage("extraction"):
+        text = _extract_text(file)
+
+Inside a request started with `begin_request`, stage durations are summed
+per stage and observed once when the request ends, so the same totals can be
+sent to the client in a `Server-Timing` header. Outside a request (job and
+batch threads) each stage is observed as it finishes.
+
+With MEMORY_ACCOUNTING=1, Python allocations are traced and the peak heap
+growth of requests and jobs is recorded as well, to help size containers.
+The traced peak is process-wide, so only those that ran alone in their
+worker are measured (see `begin_memory`).
+
+Metrics live in process memory, so each gunicorn worker reports its own values.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+MEMORY_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(0, 11))  # 1 MiB - 1 GiB
+
+TOKEN_BUCKETS = (0, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [bucket counts, sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(
+                key, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.label_names, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Add a callback returning extra exposition lines, evaluated at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "resume_parse_stage_seconds", "Time spent in each stage of the parse path.", labels=("stage",)))
+
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by endpoint and status code.", labels=("endpoint", "status")))
+
+ERRORS_TOTAL = REGISTRY.register(Counter(
+    "resume_parse_errors_total", "Parse failures by exception class.", labels=("exception",)))
+
+OPENAI_TOKENS_TOTAL = REGISTRY.register(Counter(
+    "openai_tokens_total", "Tokens reported by OpenAI responses.", labels=("kind",)))
+
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served.", labels=("endpoint",)))
+
+OPENAI_IN_FLIGHT = REGISTRY.register(Gauge(
+    "openai_requests_in_flight", "OpenAI requests currently awaiting a response."))
+
+OPENAI_QUEUED = REGISTRY.register(Gauge(
+    "openai_requests_queued", "OpenAI requests waiting for a concurrency slot."))
+
+SHED_TOTAL = REGISTRY.register(Counter(
+    "requests_shed_total", "Requests rejected with 429 by reason.", labels=("reason",)))
+
+REQUEST_PEAK_MEMORY = REGISTRY.register(Histogram(
+    "http_request_peak_memory_bytes",
+    "Peak Python heap growth of a request or job that ran alone in this worker.",
+    labels=("endpoint",), buckets=MEMORY_BUCKETS))
+
+REQUEST_MEMORY_SKIPPED = REGISTRY.register(Counter(
+    "http_request_peak_memory_skipped_total",
+    "Requests and jobs not measured because another one overlapped them.", labels=("endpoint",)))
+
+STREAM_FIRST_FIELD_SECONDS = REGISTRY.register(Histogram(
+    "resume_stream_first_field_seconds",
+    "Time from the start of a streamed parse's LLM call to the first field from the model."))
+
+COALESCED_TOTAL = REGISTRY.register(Counter(
+    "resume_parse_coalesced_total",
+    "Parses that waited on an identical one in flight, by where it ran (process, host).", labels=("scope",)))
+
+PARSE_TOKENS = REGISTRY.register(Histogram(
+    "resume_parse_tokens", "OpenAI tokens per parse by kind (prompt, cached, completion).",
+    labels=("kind",), buckets=TOKEN_BUCKETS))
+
+ROUTES_TOTAL = REGISTRY.register(Counter(
+    "model_routes_total", "Model tier attempts by tier and outcome (accepted, escalated, failed).",
+    labels=("tier", "outcome")))
+
+
+# ==============================
+# Per-Request Stage Timing
+# ==============================
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None)
+
+
+def begin_request() -> Token:
+    """Start collecting stage timings for the current request."""
+    return _request_timings.set({})
+
+
+def end_request(token: Token) -> Dict[str, float]:
+    """
+    Stop collecting stage timings, observe them and return them.
+
+    Returns:
+        dict[str, float]: Seconds spent per stage during the request.
+    """
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    for name, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=name)
+    return timings
+
+
+def current_timings() -> Dict[str, float]:
+    """Return the stage timings collected so far in the current request."""
+    return dict(_request_timings.get() or {})
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block of code as one stage of the parse path."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = _request_timings.get()
+        if timings is None:
+            STAGE_SECONDS.observe(elapsed, stage=name)
+        else:
+            timings[name] = timings.get(name, 0) + elapsed
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format stage timings as a `Server-Timing` header value (durations in ms)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+# ==============================
+# Per-Parse Token Usage
+# ==============================
+
+_usage_totals: ContextVar[Tuple[Dict[str, int], ...]] = ContextVar("usage_totals", default=())
+
+
+@contextmanager
+def track_usage() -> Iterator[Dict[str, int]]:
+    """
+    Add up the tokens of every OpenAI call made inside the block.
+
+    Blocks may be nested; calls count towards every enclosing block.
+
+    Yields:
+        dict[str, int]: Running "calls", "prompt", "completion" and "cached" totals.
+    """
+    totals = {"calls": 0, "prompt": 0, "completion": 0, "cached": 0}
+    token = _usage_totals.set(_usage_totals.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _usage_totals.reset(token)
+
+
+def record_usage(usage) -> None:
+    """Count prompt, cached and completion tokens from an OpenAI `usage` object."""
+    if usage is None:
+        return
+    prompt = usage.prompt_tokens or 0
+    completion = usage.completion_tokens or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) if details else None) or 0
+    OPENAI_TOKENS_TOTAL.inc(prompt, kind="prompt")
+    OPENAI_TOKENS_TOTAL.inc(completion, kind="completion")
+    if cached:
+        OPENAI_TOKENS_TOTAL.inc(cached, kind="cached")
+
+    for totals in _usage_totals.get():
+        totals["calls"] += 1
+        totals["prompt"] += prompt
+        totals["completion"] += completion
+        totals["cached"] += cached
+
+
+def observe_parse_usage(totals: Dict[str, int]) -> None:
+    """Observe one parse's token totals from `track_usage`, so prompt cache hit rates show per parse."""
+    for kind in ("prompt", "cached", "completion"):
+        PARSE_TOKENS.observe(totals.get(kind, 0), kind=kind)
+
+
+# ==============================
+# Memory Accounting
+# ==============================
+
+# Trace Python allocations to record the peak heap growth of requests. Tracing
+# slows allocation-heavy code, so it is opt-in.
+MEMORY_ACCOUNTING = os.getenv("MEMORY_ACCOUNTING", "").lower() in ("1", "true", "yes")
+
+if MEMORY_ACCOUNTING:
+    tracemalloc.start()
+
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # Linux reports KiB.
+
+
+def _process_memory() -> List[str]:
+    max_rss = _max_rss_bytes()
+    if max_rss is None:
+        return []
+    return [
+        "# HELP process_max_resident_memory_bytes Peak resident set size of this worker.",
+        "# TYPE process_max_resident_memory_bytes gauge",
+        f"process_max_resident_memory_bytes {max_rss}",
+    ]
+
+
+REGISTRY.register_collector(_process_memory)
+
+
+class MemoryMark:
+    """A request or job being measured (see `begin_memory`)."""
+
+    __slots__ = ("start", "shared")
+
+    def __init__(self, start: int, shared: bool):
+        self.start = start
+        # Set once another measured request or job overlaps this one.
+        self.shared = shared
+
+
+_memory_lock = threading.Lock()
+_memory_marks: Set[MemoryMark] = set()
+
+
+def begin_memory() -> Optional[MemoryMark]:
+    """
+    Start measuring a request's or job's peak memory.
+
+    tracemalloc keeps one peak for the whole process, so concurrent requests
+    would reset and read each other's. A request or job is only measured if
+    no other one is in flight in this worker for its whole duration; the
+    others are counted in `http_request_peak_memory_skipped_total`. Only
+    Python allocations are traced: native memory (PDFium, lxml) shows in
+    `process_max_resident_memory_bytes` instead.
+
+    Returns:
+        MemoryMark | None: The measurement to pass to `end_memory`, or None
+        if MEMORY_ACCOUNTING is off.
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    with _memory_lock:
+        shared = bool(_memory_marks)
+        for other in _memory_marks:
+            other.shared = True
+        if not shared:
+            tracemalloc.reset_peak()
+        mark = MemoryMark(tracemalloc.get_traced_memory()[0], shared)
+        _memory_marks.add(mark)
+    return mark
+
+
+def end_memory(mark: Optional[MemoryMark], **labels: str) -> Optional[int]:
+    """
+    Observe the heap growth since `begin_memory` and return it in bytes.
+
+    Returns:
+        int | None: The growth, or None if the request was not measured.
+    """
+    if mark is None:
+        return None
+    with _memory_lock:
+        _memory_marks.discard(mark)
+        if mark.shared or not tracemalloc.is_tracing():
+            REQUEST_MEMORY_SKIPPED.inc(**labels)
+            return None
+        _, peak = tracemalloc.get_traced_memory()
+    growth = max(peak - mark.start, 0)
+    REQUEST_PEAK_MEMORY.observe(growth, **labels)
+    return growth
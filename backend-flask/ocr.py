@@ -0,0 +1,161 @@
+"""
+Optional OCR for PDF pages without a text layer.
+
+Scanned resumes are images wrapped in a PDF, so text extraction finds
+nothing. When OCR is enabled, the extractor renders those pages with PDFium
+and passes the bitmaps to `PageOCR`, which recognizes them with Tesseract in
+parallel on a process pool. CPU cost is bounded by a rendering DPI, a pixel
+cap per page and a maximum number of OCR'd pages per document, and results
+are cached by a hash of the rendered page so re-uploads skip recognition.
+
+Requires the `pytesseract` package and the Tesseract binary
+(`apt-get install tesseract-ocr`); without them OCR stays disabled.
+"""
+
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+from typing import List, Optional
+
+from PIL import Image
+
+from cache import ParseCache, create_cache_from_env
+from exceptions import ExtractionTimeoutError
+from extraction_pool import ExtractionPool
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+
+def _recognize(mode: str, size: tuple, data: bytes, lang: str) -> str:
+    """Recognize the text in a raw bitmap. Runs in OCR pool worker processes."""
+    return pytesseract.image_to_string(Image.frombytes(mode, size, data), lang=lang)
+
+
+class PageOCR:
+    """
+    Recognizes text in rendered PDF pages.
+
+    Args:
+        enabled (bool): Whether OCR was requested; it also needs pytesseract.
+        dpi (int): Rendering resolution for pages sent to OCR.
+        max_pages (int): Pages per document that may be OCR'd; the rest stay empty.
+        max_pixels (int): Pixel cap per rendered page; larger pages are rendered at a lower DPI.
+        lang (str): Tesseract language(s), e.g. "eng" or "eng+deu".
+        pool (ExtractionPool, optional): Worker processes for recognition;
+            pages are recognized one after another in-process without one.
+        cache (ParseCache, optional): Cache for recognized text by page hash.
+    """
+
+    def __init__(self, enabled: bool = False, dpi: int = 200, max_pages: int = 3,
+                 max_pixels: int = 4_000_000, lang: str = "eng",
+                 pool: Optional[ExtractionPool] = None, cache: Optional[ParseCache] = None):
+        self.requested = enabled
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.max_pixels = max_pixels
+        self.lang = lang
+        self.pool = pool
+        self.cache = cache
+
+    @property
+    def enabled(self) -> bool:
+        return self.requested and pytesseract is not None and self.max_pages > 0
+
+    def render_scale(self, width: float, height: float) -> float:
+        """
+        Return the PDFium render scale for a page of `width` x `height` points.
+
+        Pages are rendered at `dpi`, reduced so the bitmap stays within `max_pixels`.
+        """
+        scale = self.dpi / 72
+        pixels = width * height * scale * scale
+        if pixels > self.max_pixels:
+            scale *= math.sqrt(self.max_pixels / pixels)
+        return scale
+
+    def _key(self, image: Image.Image) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{self.lang}\0{image.mode}\0{image.size}\0".encode("utf-8"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def recognize(self, images: List[Image.Image]) -> List[str]:
+        """
+        Recognize the text in each page image, in parallel when a pool is configured.
+
+        Pages that fail to recognize come back empty.
+
+        Args:
+            images (list[PIL.Image.Image]): Rendered pages.
+
+        Returns:
+            list[str]: The text of each page, in order.
+
+        Raises:
+            ExtractionTimeoutError: If pooled recognition exceeds the pool's timeout.
+        """
+        keys = [self._key(image) for image in images]
+        texts: List[Optional[str]] = [
+            self.cache.get(key) if self.cache is not None else None for key in keys]
+        missing = [index for index, text in enumerate(texts) if text is None]
+        if not missing:
+            return texts
+
+        args = [(images[index].mode, images[index].size, images[index].tobytes(), self.lang)
+                for index in missing]
+        try:
+            # Pool workers cannot start pools of their own, so nested calls
+            # (e.g. from an extraction pool worker) recognize in-process.
+            if self.pool is not None and self.pool.enabled and multiprocessing.parent_process() is None:
+                results = self.pool.run_all(_recognize, args)
+            else:
+                results = [_recognize(*arguments) for arguments in args]
+        except ExtractionTimeoutError:
+            raise
+        except Exception as e:
+            # E.g. the Tesseract binary is missing or rejects the language.
+            logger.warning(f"OCR failed: {e}")
+            return [text or "" for text in texts]
+
+        for index, text in zip(missing, results):
+            texts[index] = text.strip()
+            if self.cache is not None:
+                self.cache.set(keys[index], texts[index])
+        return texts
+
+
+def create_ocr_from_env() -> PageOCR:
+    """
+    Build a PageOCR from environment variables.
+
+    Recognized text is kept in a cache of its own, configured with the
+    OCR_CACHE_* variables (see `cache.create_cache_from_env`).
+
+    Environment:
+        OCR_ENABLED: "true" to OCR pages without a text layer (default "false").
+        OCR_DPI: Rendering resolution (default 200).
+        OCR_MAX_PAGES: Pages per document that may be OCR'd (default 3).
+        OCR_MAX_PIXELS: Pixel cap per rendered page (default 4000000).
+        OCR_LANG: Tesseract language(s) (default "eng").
+        OCR_WORKERS: Worker processes for recognition; 0 recognizes in-process (default 2).
+        OCR_TIMEOUT: Seconds recognizing one page may take (default 60).
+    """
+    return PageOCR(
+        enabled=os.getenv("OCR_ENABLED", "false").lower() in ("1", "true", "yes"),
+        dpi=int(os.getenv("OCR_DPI", "200")),
+        max_pages=int(os.getenv("OCR_MAX_PAGES", "3")),
+        max_pixels=int(os.getenv("OCR_MAX_PIXELS", "4000000")),
+        lang=os.getenv("OCR_LANG", "eng"),
+        pool=ExtractionPool(
+            workers=int(os.getenv("OCR_WORKERS", "2")),
+            timeout=float(os.getenv("OCR_TIMEOUT", "60")),
+        ),
+        cache=create_cache_from_env("OCR_CACHE"),
+    )
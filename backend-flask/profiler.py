@@ -0,0 +1,230 @@
+"""
+Flight recorder for slow requests: a statistical profiler with a ring buffer.
+
+A background thread samples the Python stacks of the request threads being
+profiled every `interval` seconds, via `sys._current_frames()`, and counts
+identical stacks. Nothing is instrumented, so a profiled request runs at
+full speed and the sampler's cost does not grow with the work done.
+
+Which requests are profiled:
+    - a random `sample_rate` fraction of requests, from their start, to show
+      what a typical request spends its time on;
+    - every request still running after `slow_seconds`, from that point on.
+      Slow parses are usually slow in one place (a long OpenAI call, a PDF
+      that keeps pdfminer busy), which the rest of the request then shows.
+
+Finished profiles are kept in two ring buffers, slow and sampled, so routine
+samples never push slow requests out. Each holds the stage timings, file
+size, page count and token usage of its request, and its stacks can be
+downloaded in the collapsed format read by flamegraph.pl and speedscope:
+
+    services.py:resume_parser;llm_gateway.py:LLMGateway.run;... 42
+
+Only Python frames of the request thread are seen. Time in extraction pool
+processes shows up as waiting in extraction_pool.py, and time on the LLM
+gateway's event loop as waiting in llm_gateway.py.
+
+Like the metrics, profiles live in process memory, so each gunicorn worker
+keeps its own.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+_BACKEND_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+def annotate(**values) -> None:
+    """Attach details (e.g. `pages=3`) to the profile of the current request, if it is profiled."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.details.update(values)
+
+
+class Profile:
+    """The samples and details of one profiled request."""
+
+    def __init__(self, thread_id: int, selected: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.thread_id = thread_id
+        self.selected = selected
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.sampled_from: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.stacks: Counter = Counter()
+        self.details: dict = {}
+        self.token: Optional[Token] = None
+
+    @property
+    def reason(self) -> str:
+        return "sampled" if self.selected else "slow"
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "sampled_from": self.sampled_from,
+            "samples": sum(self.stacks.values()),
+            **self.details,
+        }
+
+    def collapsed(self) -> str:
+        """The stacks in collapsed format: root-to-leaf frames joined by ";", then the sample count."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class Profiler:
+    """
+    Samples in-flight requests and keeps the profiles of slow and sampled ones.
+
+    Args:
+        sample_rate (float): Fraction of requests profiled from their start.
+        slow_seconds (float): Requests running longer are profiled from then on and kept.
+        interval (float): Seconds between samples.
+        capacity (int): Profiles kept in each ring buffer.
+        enabled (bool): With False, `begin` profiles nothing.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, slow_seconds: float = 5.0, interval: float = 0.005,
+                 capacity: int = 50, enabled: bool = True):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.interval = interval
+        self.enabled = enabled
+        self.slow: deque = deque(maxlen=capacity)
+        self.sampled: deque = deque(maxlen=capacity)
+        self._active: Dict[int, Profile] = {}
+        self._labels: Dict[object, str] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def begin(self) -> Optional[Profile]:
+        """
+        Start watching the current thread's request.
+
+        Returns:
+            Profile | None: Pass it to `finish` when the request ends; None if disabled.
+        """
+        if not self.enabled:
+            return None
+        profile = Profile(threading.get_ident(), selected=random.random() < self.sample_rate)
+        profile.token = _current_profile.set(profile)
+        with self._cond:
+            self._ensure_sampler()
+            self._active[id(profile)] = profile
+            self._cond.notify()
+        return profile
+
+    def detach(self, profile: Profile) -> None:
+        """
+        Stop attributing `annotate` calls in the current context to `profile`.
+
+        Call in the same context as `begin`. Sampling goes on until `finish`,
+        which may come later, e.g. once a streamed response is closed.
+        """
+        if profile.token is not None:
+            _current_profile.reset(profile.token)
+            profile.token = None
+
+    def finish(self, profile: Profile, **details) -> None:
+        """Stop sampling `profile` and keep it if it was sampled or slow."""
+        with self._cond:
+            self._active.pop(id(profile), None)
+        profile.duration = time.perf_counter() - profile.started
+        profile.details.update(details)
+        if profile.selected:
+            self.sampled.appendleft(profile)
+        elif profile.duration >= self.slow_seconds and profile.stacks:
+            self.slow.appendleft(profile)
+
+    def profiles(self) -> List[dict]:
+        """Summaries of the kept profiles, most recent first."""
+        kept = sorted([*self.slow, *self.sampled], key=lambda profile: profile.started_at, reverse=True)
+        return [profile.summary() for profile in kept]
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in [*self.slow, *self.sampled]:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def _ensure_sampler(self) -> None:
+        # Workers fork after import, so each process starts its own thread.
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            with self._cond:
+                for profile in self._active.values():
+                    frame = frames.get(profile.thread_id)
+                    if frame is None or (not profile.selected and now - profile.started < self.slow_seconds):
+                        continue
+                    if profile.sampled_from is None:
+                        profile.sampled_from = now - profile.started
+                    profile.stacks[self._collapse(frame)] += 1
+            del frames
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+def _label(code) -> str:
+    """`path:qualified.name` with the path relative to the app or to site-packages."""
+    path = code.co_filename
+    if path.startswith(_BACKEND_ROOT):
+        path = path[len(_BACKEND_ROOT):]
+    elif "site-packages" + os.sep in path:
+        path = path.rsplit("site-packages" + os.sep, 1)[1]
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{getattr(code, 'co_qualname', code.co_name)}".replace(" ", "_").replace(";", ":")
+
+
+def create_profiler_from_env() -> Profiler:
+    """
+    Build a Profiler from environment variables.
+
+    Environment:
+        PROFILER: Set to 1 to profile `/parse-resume` requests (default off).
+        PROFILE_SAMPLE_RATE: Fraction of requests profiled from the start (default 0.01).
+        PROFILE_SLOW_SECONDS: Requests running longer are profiled and kept (default 5).
+        PROFILE_INTERVAL: Seconds between samples (default 0.005).
+        PROFILE_CAPACITY: Slow and sampled profiles kept, each (default 50).
+    """
+    return Profiler(
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0.01")),
+        slow_seconds=float(os.getenv("PROFILE_SLOW_SECONDS", "5")),
+        interval=float(os.getenv("PROFILE_INTERVAL", "0.005")),
+        capacity=int(os.getenv("PROFILE_CAPACITY", "50")),
+        enabled=os.getenv("PROFILER", "").lower() in ("1", "true", "yes"),
+    )
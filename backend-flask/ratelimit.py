@@ -0,0 +1,491 @@
+"""
+Per-tenant rate limiting and fair scheduling of OpenAI calls.
+
+Each request is attributed to a tenant (API key, user or client IP). Uploads
+pass through a token bucket per tenant before any work is done, and every
+OpenAI call then waits for a slot from a process-wide concurrency governor
+that serves waiting tenants round-robin. A tenant re-uploading in a loop
+therefore spends its own budget and queues behind its own calls, rather than
+starving everyone else. Both shed load with ServiceOverloadedError, which the
+API maps to 429 with a `Retry-After` header.
+
+Bucket backends:
+    - MemoryBucketStore: per-process buckets.
+    - SQLiteBucketStore: buckets shared by every gunicorn worker on the host.
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AbstractSet, AsyncIterator, Callable, Deque, Iterable, Iterator, Mapping, Optional, Tuple
+
+from exceptions import ServiceOverloadedError
+from metrics import OPENAI_QUEUED, SHED_TOTAL
+from sqlite_local import LocalConnections
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = "anonymous"
+
+# Tenant the current request (or job/batch task) is running on behalf of.
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default=ANONYMOUS)
+
+
+# ==============================
+# Tenants
+# ==============================
+
+
+def _digest(value: str) -> str:
+    # Keys and user ids end up in logs and on disk, so only a digest is kept.
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def tenant_key(headers: Mapping[str, str], remote_addr: Optional[str], trust_proxy: bool = False,
+               api_keys: AbstractSet[str] = frozenset()) -> str:
+    """
+    Identify the tenant a request is made on behalf of.
+
+    A known API key (`X-API-Key` or a bearer token listed in `api_keys`)
+    takes precedence, then the `X-User-Id` header and the first
+    `X-Forwarded-For` address when a trusted proxy sets them, and finally the
+    peer address. Unknown keys are ignored, so a client cannot get a fresh
+    bucket by sending a new key with every request.
+
+    Args:
+        headers (Mapping[str, str]): Case-insensitive request headers.
+        remote_addr (str, optional): Address of the connecting peer.
+        trust_proxy (bool): Whether identity headers set by a proxy are trusted.
+        api_keys (AbstractSet[str]): The API keys issued to tenants.
+
+    Returns:
+        str: A key such as "key:<digest>", "user:<digest>" or "ip:<address>".
+    """
+    api_key = headers.get("X-API-Key")
+    authorization = headers.get("Authorization", "")
+    if not api_key and authorization.lower().startswith("bearer "):
+        api_key = authorization[7:].strip()
+    if api_key and api_key in api_keys:
+        return f"key:{_digest(api_key)}"
+
+    if trust_proxy:
+        user_id = headers.get("X-User-Id")
+        if user_id:
+            return f"user:{_digest(user_id)}"
+        forwarded = headers.get("X-Forwarded-For", "").split(",")[0].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+
+    return f"ip:{remote_addr}" if remote_addr else ANONYMOUS
+
+
+def api_keys_from_env() -> frozenset:
+    """The API keys in RATE_LIMIT_API_KEYS (comma-separated) that `tenant_key` recognizes."""
+    return frozenset(key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip())
+
+
+def bind_tenant(func: Callable) -> Callable:
+    """Wrap `func` to run as the current tenant, e.g. on a job or batch thread."""
+    tenant = current_tenant.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_tenant.set(tenant)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current_tenant.reset(token)
+
+    return wrapper
+
+
+# ==============================
+# Token Bucket Stores
+# ==============================
+
+
+def _refill(tokens: float, elapsed: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(elapsed, 0) * rate)
+
+
+class BucketStore:
+    """Interface every token bucket backend implements."""
+
+    name = "base"
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        """
+        Take `cost` tokens from the bucket for `key` if it holds enough.
+
+        Args:
+            key (str): Tenant key.
+            rate (float): Tokens added per second.
+            burst (float): Bucket capacity; new buckets start full.
+            cost (float): Tokens to take.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they
+                   will be available. Nothing is taken on refusal.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Buckets held in this process, evicting the least recently used past `max_keys`.
+
+    Args:
+        max_keys (int): Maximum number of tenants tracked at once.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = _refill(tokens, now - updated_at, rate, burst)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                # An evicted tenant starts over with a full bucket.
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Buckets shared across processes through a SQLite database in WAL mode.
+
+    Each take is a single immediate transaction, so concurrent workers never
+    spend the same tokens twice.
+
+    Args:
+        path (str): Location of the database file.
+        prune_every (int): Takes between deletions of buckets idle long enough to be full.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.path = path
+        self.prune_every = prune_every
+        self._takes = 0
+        self._db = LocalConnections(path)
+        conn = self._db.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            " key TEXT PRIMARY KEY,"
+            " tokens REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS rate_limit_buckets_updated ON rate_limit_buckets (updated_at)")
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        conn = self._db.get()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else _refill(row[0], now - row[1], rate, burst)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                conn.execute(
+                    "DELETE FROM rate_limit_buckets WHERE updated_at < ?", (now - burst / rate,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def clear(self) -> None:
+        self._db.get().execute("DELETE FROM rate_limit_buckets")
+
+
+class RateLimiter:
+    """
+    Token-bucket limit on requests per tenant.
+
+    Store failures are logged and the request is let through, so a broken
+    limiter never blocks parsing.
+
+    Args:
+        store (BucketStore, optional): Bucket backend; None disables limiting.
+        per_minute (float): Sustained requests per minute per tenant.
+        burst (float): Requests a tenant may make back to back.
+    """
+
+    def __init__(self, store: Optional[BucketStore], per_minute: float = 30, burst: float = 10):
+        self.store = store
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    def check(self, key: str, cost: float = 1) -> None:
+        """
+        Spend `cost` requests from the tenant's budget.
+
+        Raises:
+            ServiceOverloadedError: If the tenant is over its limit.
+        """
+        if self.store is None or self.rate <= 0:
+            return
+        try:
+            wait = self.store.take(key, self.rate, self.burst, cost)
+        except Exception as e:
+            logger.warning(f"Rate limiter lookup failed: {e}")
+            return
+        if wait > 0:
+            SHED_TOTAL.inc(reason="rate_limit")
+            raise ServiceOverloadedError(
+                "Too many requests. Please try again shortly.", retry_after=math.ceil(wait))
+
+    def charge_each(self, key: str, items: Iterable[Tuple[str, object]]) -> Iterator[Tuple[str, object]]:
+        """
+        Spend one request per batch item as it is taken, before it is parsed.
+
+        Args:
+            key (str): Tenant key.
+            items (Iterable[tuple[str, FileStorage | Exception]]): Output of `batch.iter_batch_items`.
+
+        Yields:
+            tuple[str, FileStorage | Exception]: Each item, or the rate limit
+            error in place of a file the tenant has no budget left for.
+        """
+        for name, item in items:
+            if not isinstance(item, Exception):
+                try:
+                    self.check(key)
+                except ServiceOverloadedError as e:
+                    item = e
+            yield name, item
+
+    def reset(self) -> None:
+        """Refill every bucket."""
+        if self.store is not None:
+            self.store.clear()
+
+
+def create_rate_limiter_from_env() -> RateLimiter:
+    """
+    Build a RateLimiter from environment variables.
+
+    Environment:
+        RATE_LIMIT_BACKEND: "memory", "sqlite" or "none" (default). Behind a
+            shared proxy, also set RATE_LIMIT_TRUST_PROXY so that callers are
+            told apart rather than sharing the proxy's bucket.
+        RATE_LIMIT_PER_MINUTE: Sustained uploads per minute per tenant (default 30).
+        RATE_LIMIT_BURST: Uploads a tenant may send back to back (default 10).
+        RATE_LIMIT_PATH: SQLite database path (default "rate_limit.sqlite3").
+    """
+    backend_name = os.getenv("RATE_LIMIT_BACKEND", "none").lower()
+    if backend_name == "none":
+        store = None
+    elif backend_name == "sqlite":
+        store = SQLiteBucketStore(os.getenv("RATE_LIMIT_PATH", "rate_limit.sqlite3"))
+    elif backend_name == "memory":
+        store = MemoryBucketStore()
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend_name}")
+
+    return RateLimiter(
+        store,
+        per_minute=float(os.getenv("RATE_LIMIT_PER_MINUTE", "30")),
+        burst=float(os.getenv("RATE_LIMIT_BURST", "10")),
+    )
+
+
+# ==============================
+# Concurrency Governor
+# ==============================
+
+
+class _Waiter:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyGovernor:
+    """
+    Caps concurrent OpenAI calls in this process and shares them fairly.
+
+    When every slot is busy, callers queue per tenant and freed slots go to
+    tenants in round-robin order, so one tenant's backlog delays only its own
+    calls. Callers are shed instead of queued once the queue is full, and
+    give up after `queue_timeout` seconds.
+
+    Callers may run on different event loops (the gateway's loop for the
+    Flask app, uvicorn's for the ASGI app); state is guarded by a thread lock
+    and waiters are woken on their own loop.
+
+    Args:
+        max_concurrency (int): Calls allowed in flight at once.
+        max_queued (int): Callers allowed to wait across all tenants.
+        max_queued_per_tenant (int): Callers allowed to wait per tenant.
+        queue_timeout (float): Seconds a caller may wait for a slot.
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_queued: int = 64,
+                 max_queued_per_tenant: int = 16, queue_timeout: float = 10):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        # Seconds a slot is typically held, for Retry-After estimates.
+        self.mean_hold = 1.0
+        self._waiting: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _retry_after(self) -> int:
+        backlog = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self.mean_hold))
+
+    def _shed(self, message: str) -> ServiceOverloadedError:
+        SHED_TOTAL.inc(reason="llm_queue")
+        return ServiceOverloadedError(message, retry_after=self._retry_after())
+
+    async def acquire(self, tenant: str) -> None:
+        """
+        Wait for a slot on behalf of `tenant`.
+
+        Raises:
+            ServiceOverloadedError: If the queue is full or no slot frees up in time.
+        """
+        with self._lock:
+            if self.active < self.max_concurrency and not self._waiting:
+                self.active += 1
+                return
+            queue = self._waiting.get(tenant)
+            if self.queued >= self.max_queued or \
+                    (queue is not None and len(queue) >= self.max_queued_per_tenant):
+                raise self._shed("The AI service is busy. Please try again shortly.")
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiting.setdefault(tenant, deque()).append(waiter)
+            self.queued += 1
+            OPENAI_QUEUED.inc()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter.granted:
+                    return  # The slot arrived as the wait ran out.
+                self._remove(tenant, waiter)
+                raise self._shed("The AI service is busy. Please try again shortly.")
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._remove(tenant, waiter)
+            if granted:
+                self.release()
+            raise
+
+    def _remove(self, tenant: str, waiter: _Waiter) -> None:
+        queue = self._waiting.get(tenant)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._waiting[tenant]
+            self.queued -= 1
+            OPENAI_QUEUED.dec()
+
+    def release(self, held: Optional[float] = None) -> None:
+        """
+        Free a slot, handing it to the next tenant in turn if any are waiting.
+
+        Args:
+            held (float, optional): Seconds the slot was held, for Retry-After estimates.
+        """
+        with self._lock:
+            if held is not None:
+                self.mean_hold = 0.9 * self.mean_hold + 0.1 * held
+            if not self._waiting:
+                self.active -= 1
+                return
+            tenant, queue = next(iter(self._waiting.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(tenant)
+            else:
+                del self._waiting[tenant]
+            self.queued -= 1
+            OPENAI_QUEUED.dec()
+            waiter.granted = True
+        waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block; the tenant defaults to `current_tenant`."""
+        await self.acquire(tenant or current_tenant.get())
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+
+def create_governor_from_env() -> Optional[ConcurrencyGovernor]:
+    """
+    Build a ConcurrencyGovernor from environment variables.
+
+    Environment:
+        LLM_MAX_CONCURRENCY: OpenAI calls in flight per process; 0 disables
+                             the governor (default 16).
+        LLM_MAX_QUEUED: Calls allowed to wait for a slot (default 64).
+        LLM_MAX_QUEUED_PER_TENANT: Calls one tenant may have waiting (default 16).
+        LLM_QUEUE_TIMEOUT: Seconds a call may wait before it is shed (default 10).
+    """
+    max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    if max_concurrency <= 0:
+        return None
+    return ConcurrencyGovernor(
+        max_concurrency=max_concurrency,
+        max_queued=int(os.getenv("LLM_MAX_QUEUED", "64")),
+        max_queued_per_tenant=int(os.getenv("LLM_MAX_QUEUED_PER_TENANT", "16")),
+        queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+    )
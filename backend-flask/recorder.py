@@ -0,0 +1,219 @@
+"""
+Opt-in recording of LLM parses for offline evaluation.
+
+When enabled, every parse that reaches the LLM appends one row to a local
+SQLite database: the extracted text, the prompt, schema and model versions,
+the structured response (before locally extracted fields are merged in), the
+token counts and the latency. The rows are never updated or deleted by the
+service, so the database grows into a corpus that `benchmarks/replay.py` can
+re-run against a new prompt or model and score field by field.
+
+Recordings hold the full text of real resumes, so keep the database as
+private as the uploads themselves.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import time
+from typing import Any, Dict, Iterator, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from cache import normalize_text
+from sqlite_local import LocalConnections
+
+logger = logging.getLogger(__name__)
+
+
+class ParseRecorder:
+    """
+    Append-only store of recorded parses.
+
+    Args:
+        path (str, optional): SQLite database path; None disables recording.
+        sample_rate (float): Share of parses to record, from 0 to 1.
+    """
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._db = LocalConnections(path, row_factory=sqlite3.Row)
+        if path is not None:
+            with self._db.get() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS parse_records ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                    " recorded_at REAL NOT NULL,"
+                    " content_hash TEXT,"
+                    " model TEXT NOT NULL,"
+                    " prompt_version TEXT NOT NULL,"
+                    " schema_version TEXT NOT NULL,"
+                    " parse_mode TEXT NOT NULL,"
+                    " text TEXT NOT NULL,"
+                    " response TEXT NOT NULL,"
+                    " calls INTEGER NOT NULL,"
+                    " prompt_tokens INTEGER NOT NULL,"
+                    " completion_tokens INTEGER NOT NULL,"
+                    " cached_tokens INTEGER NOT NULL,"
+                    " latency_ms REAL NOT NULL)"
+                )
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and self.sample_rate > 0
+
+    def record(self, text: str, response: BaseModel, usage: Dict[str, int], seconds: float, *,
+               model: str, prompt_version: str, schema_version: str, parse_mode: str,
+               content_hash: Optional[str] = None) -> None:
+        """
+        Append a parse to the store, subject to the sample rate.
+
+        Failures are logged and otherwise ignored; recording never fails a parse.
+
+        Args:
+            text (str): The extracted resume text sent to the LLM.
+            response (BaseModel): The structured LLM result.
+            usage (dict[str, int]): Totals from `metrics.track_usage`.
+            seconds (float): Time spent on the LLM calls.
+            model, prompt_version, schema_version, parse_mode (str): What produced the result.
+            content_hash (str, optional): The parse cache key of the text.
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+        try:
+            self._db.get().execute(
+                "INSERT INTO parse_records (recorded_at, content_hash, model, prompt_version,"
+                " schema_version, parse_mode, text, response, calls, prompt_tokens,"
+                " completion_tokens, cached_tokens, latency_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), content_hash, model, prompt_version, schema_version, parse_mode,
+                 text, response.model_dump_json(), usage.get("calls", 0), usage.get("prompt", 0),
+                 usage.get("completion", 0), usage.get("cached", 0), seconds * 1000),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record parse: {e}")
+
+    def records(self, limit: Optional[int] = None, model: Optional[str] = None,
+                prompt_version: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over recorded parses, oldest first.
+
+        Args:
+            limit (int, optional): Maximum number of records.
+            model (str, optional): Only records made with this model.
+            prompt_version (str, optional): Only records made with this prompt version.
+
+        Yields:
+            dict: One row of `parse_records`.
+        """
+        if self.path is None:
+            return
+        query, params = "SELECT * FROM parse_records WHERE 1 = 1", []
+        if model is not None:
+            query += " AND model = ?"
+            params.append(model)
+        if prompt_version is not None:
+            query += " AND prompt_version = ?"
+            params.append(prompt_version)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for row in self._db.get().execute(query, params):
+            yield dict(row)
+
+
+def create_recorder_from_env() -> ParseRecorder:
+    """
+    Build a ParseRecorder from environment variables.
+
+    Environment:
+        PARSE_RECORDING: "true" to record parses (default "false").
+        PARSE_RECORD_PATH: SQLite database path (default "parse_records.sqlite3").
+        PARSE_RECORD_SAMPLE_RATE: Share of parses to record (default 1).
+    """
+    if os.getenv("PARSE_RECORDING", "false").lower() not in ("1", "true", "yes"):
+        return ParseRecorder(None)
+    return ParseRecorder(
+        os.getenv("PARSE_RECORD_PATH", "parse_records.sqlite3"),
+        sample_rate=float(os.getenv("PARSE_RECORD_SAMPLE_RATE", "1")),
+    )
+
+
+# ==============================
+# Field-Level Comparison
+# ==============================
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return normalize_text(value).casefold() or None
+    return value
+
+
+def similarity(expected: Any, actual: Any) -> float:
+    """
+    Score how closely `actual` reproduces `expected`, from 0 to 1.
+
+    Strings are compared after collapsing whitespace and case, and empty
+    strings count as missing. Lists of strings (e.g. skills) are compared as
+    sets; lists of objects are compared item by item in order, with missing
+    or extra items scoring 0. Objects score the mean of their fields.
+    """
+    if isinstance(expected, dict) or isinstance(actual, dict):
+        expected, actual = expected or {}, actual or {}
+        keys = dict.fromkeys([*expected, *actual])
+        if not keys:
+            return 1.0
+        return statistics.fmean(similarity(expected.get(key), actual.get(key)) for key in keys)
+
+    if isinstance(expected, list) or isinstance(actual, list):
+        expected, actual = expected or [], actual or []
+        if not expected and not actual:
+            return 1.0
+        if not any(isinstance(item, (dict, list)) for item in [*expected, *actual]):
+            expected_set = {_normalize(item) for item in expected}
+            actual_set = {_normalize(item) for item in actual}
+            return len(expected_set & actual_set) / len(expected_set | actual_set)
+        return sum(similarity(e, a) for e, a in zip(expected, actual)) / max(len(expected), len(actual))
+
+    return 1.0 if _normalize(expected) == _normalize(actual) else 0.0
+
+
+def _nested_model(annotation: Any) -> Optional[type[BaseModel]]:
+    """Return the model class of a `Model` or `Optional[Model]` field, else None."""
+    candidates = get_args(annotation) if get_origin(annotation) is Union else (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def field_accuracy(expected: BaseModel, actual: BaseModel) -> Dict[str, float]:
+    """
+    Score a parse against a reference parse per field.
+
+    Nested objects (e.g. `personal`, `skills`) are scored per member, so the
+    result has keys like "personal.email", "skills.technical" and "experience".
+
+    Args:
+        expected (BaseModel): The reference, e.g. a recorded response.
+        actual (BaseModel): The parse to score, of the same model class.
+
+    Returns:
+        dict[str, float]: A 0-1 similarity per field.
+    """
+    expected_data, actual_data = expected.model_dump(), actual.model_dump()
+    scores = {}
+    for name, field in type(expected).model_fields.items():
+        reference, value = expected_data.get(name), actual_data.get(name)
+        nested = _nested_model(field.annotation)
+        if nested is None:
+            scores[name] = similarity(reference, value)
+            continue
+        reference, value = reference or {}, value or {}
+        for member in nested.model_fields:
+            scores[f"{name}.{member}"] = similarity(reference.get(member), value.get(member))
+    return scores
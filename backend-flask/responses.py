@@ -0,0 +1,110 @@
+"""
+Serialization and compression of parsed resume responses.
+
+Parsed resumes are serialized straight from the Pydantic model to JSON bytes
+with `model_dump_json`, rather than building a dict tree and re-encoding it
+with the stdlib encoder. Compact output leaves out null fields and empty
+lists, which the frontend's `normalizeParsedResume` fills with defaults
+anyway. Bodies are compressed with brotli or gzip, according to the client's
+`Accept-Encoding`; brotli is in requirements.txt, and only a deployment
+missing it falls back to gzip alone.
+"""
+
+import gzip
+import os
+import re
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compress JSON responses the client accepts compressed.
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() in ("1", "true", "yes")
+
+# Bodies smaller than this are sent as they are; compression would barely shrink them.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+# Empty-list members of pydantic's compact JSON output: any that follow another
+# member, then any left in first position. Quotes inside JSON strings are
+# always escaped, so these only ever match object keys. Building an `exclude`
+# spec by walking the model instead costs more than serializing it.
+_EMPTY_LIST_MEMBER = re.compile(rb',"[^"\\]+":\[\]')
+_FIRST_EMPTY_LIST_MEMBER = re.compile(rb'\{"[^"\\]+":\[\],?')
+
+
+def dump_model(model: BaseModel, compact: bool = False) -> bytes:
+    """
+    Serialize a model to JSON bytes.
+
+    Args:
+        model (BaseModel): E.g. a parsed `ResumeData`.
+        compact (bool): Leave out null fields and empty lists.
+
+    Returns:
+        bytes: UTF-8 encoded JSON.
+    """
+    if not compact:
+        return model.model_dump_json().encode("utf-8")
+    body = model.model_dump_json(exclude_none=True).encode("utf-8")
+    return _FIRST_EMPTY_LIST_MEMBER.sub(b"{", _EMPTY_LIST_MEMBER.sub(b"", body))
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for a response from an `Accept-Encoding` header.
+
+    Returns:
+        str | None: "br", "gzip", or None to send the body uncompressed.
+    """
+    if not RESPONSE_COMPRESSION or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def ok(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0)) > 0
+
+    if brotli is not None and ok("br"):
+        return "br"
+    if ok("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a response body for a client.
+
+    Args:
+        body (bytes): The uncompressed body.
+        accept_encoding (str, optional): The request's `Accept-Encoding` header.
+
+    Returns:
+        tuple[bytes, str | None]: The body to send and its `Content-Encoding`,
+        or None if it was left uncompressed.
+    """
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), encoding
+    return body, None
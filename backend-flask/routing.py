@@ -0,0 +1,329 @@
+"""
+Routing of single-call parses to model tiers by document complexity.
+
+Tiers are ordered from cheapest to strongest. The extracted text is scored by
+length, number of sections and language, and the parse starts on the
+cheapest tier rated for that complexity, stepping down to a cheaper tier if
+the estimated latency or cost would exceed the per-request budgets. A
+stronger tier is only tried when the result fails validation or comes back
+sparse (sections present in the text but empty in the result), and only
+while what is left of the budgets allows it.
+
+A tier whose model is "local" answers from the local extractor without any
+API call; it stands in for a real model in tests and offline development.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from local_extractor import extract_local
+from metrics import ROUTES_TOTAL
+from sectioning import split_sections, PERSONAL, SUMMARY, EDUCATION, EXPERIENCE, SKILLS, PROJECTS, CERTIFICATIONS
+from text_pipeline import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL = "local"
+
+# ResumeData field holding each section's content.
+SECTION_FIELDS = {
+    SUMMARY: "professional_summary",
+    EDUCATION: "education",
+    EXPERIENCE: "experience",
+    SKILLS: "skills",
+    PROJECTS: "projects",
+    CERTIFICATIONS: "certifications",
+}
+
+# Rough size of the system prompt and schema, and of the output relative to
+# the input, for estimating a call before it is made.
+PROMPT_OVERHEAD_TOKENS = 1200
+OUTPUT_RATIO = 0.4
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_ENGLISH_WORDS = frozenset(
+    "a an and are as at by for from in is of on or our the to was with".split())
+
+
+def detect_language(text: str) -> str:
+    """
+    Guess whether `text` is English.
+
+    Returns:
+        str: "en", "other", or "unknown" for text without words.
+    """
+    words = _WORD_RE.findall(text[:20000].lower())
+    if not words:
+        return "unknown"
+    non_latin = sum(1 for word in words if not word.isascii()) / len(words)
+    english = sum(1 for word in words if word in _ENGLISH_WORDS) / len(words)
+    return "en" if english >= 0.02 and non_latin < 0.2 else "other"
+
+
+class DocumentProfile:
+    """
+    Size and shape of a resume's extracted text.
+
+    Args:
+        tokens (int): Estimated token count.
+        sections (list[str]): Sections found by `sectioning.split_sections`.
+        language (str): Result of `detect_language`.
+    """
+
+    def __init__(self, tokens: int, sections: List[str], language: str):
+        self.tokens = tokens
+        self.sections = sections
+        self.language = language
+
+    @classmethod
+    def from_text(cls, text: str) -> "DocumentProfile":
+        sections = [name for name in split_sections(text) if name != PERSONAL]
+        return cls(estimate_tokens(text), sections, detect_language(text))
+
+    @property
+    def complexity(self) -> float:
+        """
+        Roughly one point per thousand tokens, plus a quarter point per section
+        beyond the usual four and a point and a half for non-English text.
+        """
+        score = self.tokens / 1000 + max(len(self.sections) - 4, 0) * 0.25
+        if self.language == "other":
+            score += 1.5
+        return score
+
+
+class Tier:
+    """
+    One model and prompt combination.
+
+    Args:
+        name (str): Label for logs and metrics.
+        model (str): OpenAI model name, or "local" for the local stub.
+        prompt (str): Prompt variant, e.g. "standard" or "detailed".
+        max_complexity (float): Highest document complexity this tier is picked for up front.
+        input_price (float): USD per million input tokens.
+        output_price (float): USD per million output tokens.
+        base_seconds (float): Fixed latency per call.
+        output_tokens_per_second (float): Generation speed.
+    """
+
+    def __init__(self, name: str, model: str, prompt: str = "standard", max_complexity: float = math.inf,
+                 input_price: float = 0.15, output_price: float = 0.60, base_seconds: float = 1.0,
+                 output_tokens_per_second: float = 80.0):
+        self.name = name
+        self.model = model
+        self.prompt = prompt
+        self.max_complexity = max_complexity
+        self.input_price = input_price
+        self.output_price = output_price
+        self.base_seconds = base_seconds
+        self.output_tokens_per_second = output_tokens_per_second
+
+    def cost(self, prompt_tokens: float, completion_tokens: float) -> float:
+        if self.model == LOCAL_MODEL:
+            return 0.0
+        return (prompt_tokens * self.input_price + completion_tokens * self.output_price) / 1_000_000
+
+    def estimate(self, profile: DocumentProfile) -> tuple[float, float]:
+        """
+        Estimate a call on a document.
+
+        Returns:
+            tuple[float, float]: Cost in USD and latency in seconds.
+        """
+        if self.model == LOCAL_MODEL:
+            return 0.0, 0.0
+        output = profile.tokens * OUTPUT_RATIO
+        return (self.cost(profile.tokens + PROMPT_OVERHEAD_TOKENS, output),
+                self.base_seconds + output / self.output_tokens_per_second)
+
+    def to_dict(self) -> dict:
+        return dict(vars(self), max_complexity=None if math.isinf(self.max_complexity) else self.max_complexity)
+
+
+def local_completion(text: str, response_format: type[BaseModel]) -> SimpleNamespace:
+    """Answer a parse request from the local extractor, shaped like a `ParsedChatCompletion`."""
+    parsed = response_format.model_validate(extract_local(text))
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))], usage=None)
+
+
+def missing_fields(result: BaseModel, profile: DocumentProfile, requested: Dict[str, object]) -> List[str]:
+    """
+    List the requested fields that the text has a section for but the result left empty.
+
+    Args:
+        result (BaseModel): The parsed result.
+        profile (DocumentProfile): Profile of the parsed text.
+        requested (dict): Fields of the request's response format.
+    """
+    missing = [field for section, field in SECTION_FIELDS.items()
+               if section in profile.sections and field in requested and not getattr(result, field, None)]
+    if "personal" in requested and not getattr(getattr(result, "personal", None), "name", None):
+        missing.append("personal.name")
+    return missing
+
+
+class Route:
+    """
+    The tiers tried for one document.
+
+    Iterating yields the first tier, then, after each rejected answer (see
+    `completed` and `failed`), the next stronger tier that fits in what is
+    left of the budgets. `result` then returns the accepted answer, else the
+    least sparse one, else raises the last error.
+    """
+
+    def __init__(self, router: "ModelRouter", text: str):
+        self.router = router
+        self.text = text
+        self.started = time.monotonic()
+        self.spent = 0.0
+        self.tier: Optional[Tier] = None
+        self.answered_by: Optional[Tier] = None
+        self._rejected = False
+        self._result: Optional[BaseModel] = None
+        self._missing: Optional[int] = None
+        self._error: Optional[Exception] = None
+
+    @functools.cached_property
+    def profile(self) -> DocumentProfile:
+        return DocumentProfile.from_text(self.text)
+
+    def __iter__(self) -> Iterator[Tier]:
+        tiers = self.router.tiers
+        index = self.router.first_tier(self.profile) if len(tiers) > 1 else 0
+        while index < len(tiers):
+            self.tier = tiers[index]
+            self._rejected = False
+            yield self.tier
+            if not self._rejected:
+                ROUTES_TOTAL.inc(tier=self.tier.name, outcome="accepted")
+                return
+            index = self._next_affordable(index + 1)
+            if index < len(tiers):
+                logger.info(f"Escalating parse from tier {self.tier.name} to {tiers[index].name}")
+            ROUTES_TOTAL.inc(tier=self.tier.name, outcome="escalated" if index < len(tiers) else "rejected")
+
+    def _next_affordable(self, index: int) -> int:
+        elapsed = time.monotonic() - self.started
+        for candidate in range(index, len(self.router.tiers)):
+            cost, seconds = self.router.tiers[candidate].estimate(self.profile)
+            if self.spent + cost <= self.router.cost_budget and elapsed + seconds <= self.router.latency_budget:
+                return candidate
+        return len(self.router.tiers)
+
+    def completed(self, result: BaseModel, usage: Dict[str, int], requested: Dict[str, object]) -> None:
+        """
+        Record the current tier's valid answer; a sparse one is rejected.
+
+        Args:
+            result (BaseModel): The answer.
+            usage (dict[str, int]): Tokens spent on it, from `metrics.track_usage`.
+            requested (dict): Fields of the request's response format.
+        """
+        self.spent += self.tier.cost(usage.get("prompt", 0), usage.get("completion", 0))
+        if len(self.router.tiers) == 1:
+            self._result, self.answered_by = result, self.tier
+            return
+        missing = missing_fields(result, self.profile, requested)
+        if self._missing is None or len(missing) < self._missing:
+            self._result, self._missing, self.answered_by = result, len(missing), self.tier
+        self._rejected = bool(missing)
+
+    def failed(self, error: Exception, usage: Dict[str, int]) -> None:
+        """Record that the current tier's answer failed validation."""
+        self.spent += self.tier.cost(usage.get("prompt", 0), usage.get("completion", 0))
+        self._error = error
+        self._rejected = True
+
+    def result(self) -> BaseModel:
+        if self._result is None:
+            raise self._error
+        return self._result
+
+
+class ModelRouter:
+    """
+    Picks model tiers for documents within latency and cost budgets.
+
+    Args:
+        tiers (list[Tier]): From cheapest to strongest.
+        latency_budget (float): Seconds of LLM time a parse may take across tiers.
+        cost_budget (float): USD a parse may cost across tiers.
+    """
+
+    def __init__(self, tiers: List[Tier], latency_budget: float = 45, cost_budget: float = 0.05):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = tiers
+        self.latency_budget = latency_budget
+        self.cost_budget = cost_budget
+
+    @property
+    def version(self) -> str:
+        """Identifies the tier setup, for cache keys; a single tier is identified by its model."""
+        if len(self.tiers) == 1:
+            return self.tiers[0].model
+        config = json.dumps([tier.to_dict() for tier in self.tiers], sort_keys=True)
+        return "routed:" + hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
+
+    def first_tier(self, profile: DocumentProfile) -> int:
+        """
+        Index of the cheapest tier rated for the document's complexity,
+        stepped down to a cheaper tier while its estimate is over budget.
+        """
+        complexity = profile.complexity
+        index = next((i for i, tier in enumerate(self.tiers) if complexity <= tier.max_complexity),
+                     len(self.tiers) - 1)
+        while index > 0:
+            cost, seconds = self.tiers[index].estimate(profile)
+            if cost <= self.cost_budget and seconds <= self.latency_budget:
+                break
+            index -= 1
+        return index
+
+    def route(self, text: str) -> Route:
+        return Route(self, text)
+
+
+def create_router_from_env(default_model: str) -> ModelRouter:
+    """
+    Build a ModelRouter from environment variables.
+
+    Environment:
+        MODEL_ROUTING: "true" to route between tiers (default "false": every
+            parse uses `default_model` with the standard prompt).
+        MODEL_TIERS: JSON list of tier settings (see `Tier`), cheapest first.
+            Defaults to gpt-4o-mini for complexity up to 3, then gpt-4o with
+            the detailed prompt.
+        ROUTING_LATENCY_BUDGET: Seconds of LLM time per parse (default 45).
+        ROUTING_COST_BUDGET: USD per parse (default 0.05).
+    """
+    if os.getenv("MODEL_ROUTING", "false").lower() not in ("1", "true", "yes"):
+        return ModelRouter([Tier("default", default_model)])
+
+    tiers = os.getenv("MODEL_TIERS")
+    if tiers:
+        tiers = [Tier(**{key: value for key, value in settings.items() if value is not None})
+                 for settings in json.loads(tiers)]
+    else:
+        tiers = [
+            Tier("mini", default_model, max_complexity=3),
+            Tier("full", "gpt-4o", prompt="detailed", input_price=2.5, output_price=10,
+                 output_tokens_per_second=60),
+        ]
+    return ModelRouter(
+        tiers,
+        latency_budget=float(os.getenv("ROUTING_LATENCY_BUDGET", "45")),
+        cost_budget=float(os.getenv("ROUTING_COST_BUDGET", "0.05")),
+    )
@@ -0,0 +1,92 @@
+"""
+Heuristic splitting of resume text into sections.
+
+Resumes are organised under a small set of conventional headings ("Work
+Experience", "Education", "Technical Skills"...). A line counts as a heading
+when it is short and, once punctuation is stripped, matches one of the known
+aliases. Everything before the first heading is the "personal" header block
+(name, contact details, headline).
+"""
+
+import re
+from typing import Dict
+
+PERSONAL = "personal"
+SUMMARY = "summary"
+EDUCATION = "education"
+EXPERIENCE = "experience"
+SKILLS = "skills"
+PROJECTS = "projects"
+CERTIFICATIONS = "certifications"
+
+SECTION_ALIASES = {
+    SUMMARY: {
+        "summary", "summary profile", "professional summary", "profile", "professional profile",
+        "about", "about me", "objective", "career objective", "career summary", "personal statement",
+    },
+    EDUCATION: {
+        "education", "education and training", "academic background", "academic qualifications",
+        "qualifications", "academic history",
+    },
+    EXPERIENCE: {
+        "experience", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career history", "relevant experience",
+    },
+    SKILLS: {
+        "skills", "technical skills", "soft skills", "key skills", "core skills", "core competencies",
+        "competencies", "skills and tools", "technologies", "tools and technologies", "languages",
+    },
+    PROJECTS: {
+        "projects", "personal projects", "key projects", "selected projects", "side projects",
+        "academic projects",
+    },
+    CERTIFICATIONS: {
+        "certifications", "certificates", "certification", "licenses and certifications",
+        "licences and certifications", "courses", "courses and certifications", "awards and certifications",
+    },
+}
+
+_HEADINGS = {alias: section for section,
+             aliases in SECTION_ALIASES.items() for alias in aliases}
+
+_NON_LETTERS_RE = re.compile(r"[^a-z ]+")
+
+# Headings are short; longer lines that start with a heading word are body text.
+_MAX_HEADING_WORDS = 5
+
+
+def heading_section(line: str) -> str | None:
+    """Return the section a heading line starts, or None if the line is not a heading."""
+    words = line.split()
+    if not words or len(words) > _MAX_HEADING_WORDS:
+        return None
+    normalized = _NON_LETTERS_RE.sub(
+        " ", line.lower().replace("&", " and ")).split()
+    return _HEADINGS.get(" ".join(normalized))
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Split resume text into sections keyed by section name.
+
+    Repeated sections (e.g. "Technical Skills" and "Soft Skills") are merged,
+    and heading lines are kept in the section text so the model still sees
+    which sub-heading each line belongs to.
+
+    Args:
+        text (str): The extracted resume text.
+
+    Returns:
+        dict[str, str]: Section name to text. Always contains PERSONAL when
+        there is text before the first heading.
+    """
+    sections: Dict[str, list] = {}
+    current = PERSONAL
+    for line in text.split("\n"):
+        section = heading_section(line)
+        if section is not None:
+            current = section
+        sections.setdefault(current, []).append(line)
+
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()
+            if "\n".join(lines).strip()}
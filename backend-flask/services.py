@@ -7,20 +7,61 @@ and returns structured JSON data containing personal details, summary, education
 """
 
 import os
-import pdfplumber
+import io
+import asyncio
 import json
-from docx import Document
+import hashlib
+import threading
+import time
+import functools
+import ctypes
+import itertools
+import mmap
+import zipfile
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
-from openai import OpenAI
-from pydantic import BaseModel, ValidationError
-from typing import List, Optional
+from pydantic import BaseModel, ValidationError, create_model
+from typing import TYPE_CHECKING, Any, AsyncIterator, BinaryIO, Iterable, Iterator, List, Optional, Union
 from werkzeug.datastructures import FileStorage
 
-from exceptions import ParsingError, InvalidFileTypeError, EmptyFileError, OpenAIFailureError
+from cache import create_cache_from_env, make_key, normalize_text
+from coalesce import create_single_flight_from_env
+from docx_stream import iter_docx_lines
+from extraction_pool import create_extraction_pool_from_env
+from llm_gateway import create_gateway_from_env, response_format_param, retryable_errors
+from text_pipeline import compact_lines, iter_within_budget, strip_page_furniture
+from local_extractor import extract_local, skills_fully_covered
+from metrics import STREAM_FIRST_FIELD_SECONDS, observe_parse_usage, stage, track_usage
+from ocr import create_ocr_from_env
+from profiler import annotate
+from recorder import create_recorder_from_env
+from routing import LOCAL_MODEL, Route, Tier, create_router_from_env, local_completion
+from uploads import DOCX_MIMETYPE, PDF_MIMETYPE, MappedReader, mapped
+from streaming import FieldStream
+from sectioning import split_sections, PERSONAL, SUMMARY, EDUCATION, EXPERIENCE, SKILLS, PROJECTS, CERTIFICATIONS
+from exceptions import (ParsingError, InvalidFileTypeError, EmptyFileError, OpenAIFailureError, FileTooLargeError,
+                        ServiceOverloadedError, InvalidAIResponseError)
+
+if TYPE_CHECKING:
+    import pypdfium2 as pdfium
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+gateway = create_gateway_from_env()
+
+parse_cache = create_cache_from_env()
+
+# Texts that cached results were parsed from, for incremental re-parsing.
+text_cache = create_cache_from_env("TEXT_CACHE")
+
+extraction_pool = create_extraction_pool_from_env()
+
+ocr = create_ocr_from_env()
+
+recorder = create_recorder_from_env()
+
+single_flight = create_single_flight_from_env()
 
 # ==============================
 # Pydantic Data Models
@@ -88,50 +129,385 @@ class ResumeData(BaseModel):
     projects: Optional[List[Project]] = None
     certifications: Optional[List[Certification]] = None
 
+
+# ==============================
+# Prompt, Model and Schema Versions
+# ==============================
+
+MODEL = "gpt-4o-mini"
+
+# Bump whenever PROMPT or FEW_SHOT_EXAMPLES change so cached results from
+# the old prompt are not reused.
+PROMPT_VERSION = "4"
+
+PERSONAL_FIELD_LABELS = {
+    "name": "name",
+    "job_title": "job title",
+    "email": "email",
+    "phone": "phone",
+    "linkedin": "linkedin",
+    "github": "github",
+    "location": "location",
+}
+
+# (ResumeData field, how the prompt describes it)
+PROMPT_ITEMS = [
+    ("personal", "Personal details ({personal_fields})"),
+    ("professional_summary", "Professional summary"),
+    ("education", "Education (degree, institution, grade, start_date, end_date)"),
+    ("experience", "Work Experience (job title, company, start date, end date, description)"),
+    ("skills", "Skills (technical and soft)"),
+    ("projects", "Projects (name, description, technologies, url, repo)"),
+    ("certifications", "Certifications (name, issued_by, date)"),
+]
+
+
+def _build_prompt(fields: List[str], personal_fields: List[str]) -> str:
+    """Build the system prompt asking only for `fields` and, within personal details, `personal_fields`."""
+    items = "\n".join(
+        f"        {number}. {description.format(personal_fields=', '.join(PERSONAL_FIELD_LABELS[f] for f in personal_fields))}"
+        for number, (_, description) in enumerate(
+            (item for item in PROMPT_ITEMS if item[0] in fields), start=1)
+    )
+    return f'''
+        You are an AI resume parser. Extract the following details from the given resume text:
+        
+{items}
+        
+        If any field is missing in the resume, return it as null or an empty list.
+        '''
+
+
+PROMPT = _build_prompt(list(ResumeData.model_fields), list(Personal.model_fields))
+
+# Instructions appended to the prompt by model tier (see `routing.Tier.prompt`).
+# Changes here also need a PROMPT_VERSION bump.
+TIER_PROMPTS = {
+    "standard": "",
+    "detailed": '''
+        This resume is long or complex. Include every entry of every section, keep
+        each role's full description, and do not merge or skip roles, degrees or projects.
+        ''',
+}
+
+# Worked examples sent after the system prompt with PROMPT_EXAMPLES:
+# (user message, expected answer).
+FEW_SHOT_EXAMPLES = [
+    (
+        "Jane Smith\nData Engineer | Leeds, UK\njane.smith@example.com | +44 7700 900123\n"
+        "Experience\nData Engineer, Northwind Ltd, Mar 2021 - Present\n"
+        "- Built batch pipelines in Python and Airflow\n"
+        "Education\nBSc Computer Science, University of Leeds, 2017 - 2020, First\n"
+        "Skills\nPython, SQL, Airflow, teamwork",
+        ResumeData(
+            personal=Personal(name="Jane Smith", job_title="Data Engineer", email="jane.smith@example.com",
+                              phone="+44 7700 900123", location="Leeds, UK"),
+            experience=[Experience(job_title="Data Engineer", company="Northwind Ltd", start_date="Mar 2021",
+                                   end_date="Present", description="Built batch pipelines in Python and Airflow")],
+            education=[Education(degree="BSc Computer Science", institution="University of Leeds", grade="First",
+                                 start_date="2017", end_date="2020")],
+            skills=Skills(technical=["Python", "SQL", "Airflow"], soft=["Teamwork"]),
+            projects=[],
+            certifications=[],
+        ),
+    ),
+]
+
+router = create_router_from_env(MODEL)
+for _tier in router.tiers:
+    if _tier.prompt not in TIER_PROMPTS:
+        raise ValueError(f"Unknown prompt '{_tier.prompt}' for model tier '{_tier.name}'")
+
+
+@functools.cache
+def _rejected_answers() -> tuple:
+    """Answers a stronger model tier may improve on."""
+    from openai import LengthFinishReasonError
+    return ValidationError, LengthFinishReasonError, InvalidAIResponseError
+
+
+# Model whose answer the current single-call parse returned, for the recorder.
+_answered_by: ContextVar[Optional[str]] = ContextVar("answered_by", default=None)
+
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(ResumeData.model_json_schema(), sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+# Personal fields the narrowed prompt layout leaves to the local extractor (see PROMPT_LAYOUT).
+LOCAL_PERSONAL_FIELDS = ("email", "phone", "linkedin", "github")
+
+# Run the rule-based pre-extractor before calling the LLM.
+LOCAL_PREEXTRACT = os.getenv("LOCAL_PREEXTRACT", "true").lower() in ("1", "true", "yes")
+
+# "single" sends the whole resume in one call; "sectioned" splits it into
+# sections and extracts them concurrently (see _parse_sectioned).
+PARSE_MODE = os.getenv("PARSE_MODE", "single")
+
+# "static" sends every call the same schema, system prompt and examples, and
+# asks for every field, so OpenAI's prompt cache can reuse that prefix across
+# requests (it needs a repeated prefix of at least 1024 tokens). "narrowed"
+# leaves the fields the local extractor found out of the schema and prompt:
+# fewer tokens per call, but a prefix that varies with them, and the
+# extractor's values are used unchecked.
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "static")
+if PROMPT_LAYOUT not in ("static", "narrowed"):
+    raise ValueError(f"Unknown PROMPT_LAYOUT: {PROMPT_LAYOUT}")
+
+# Send FEW_SHOT_EXAMPLES after the system prompt (static layout only). They
+# make the prefix longer but still cached.
+PROMPT_EXAMPLES = os.getenv("PROMPT_EXAMPLES", "false").lower() in ("1", "true", "yes")
+
+# Keep each parse's extracted text in `text_cache` so a later upload of an
+# edited resume can re-extract only its changed sections (see _parse_incremental).
+INCREMENTAL_PARSE = os.getenv("INCREMENTAL_PARSE", "true").lower() in ("1", "true", "yes")
+
 # ==============================
 # Resume Text Extraction Functions
 # ==============================
 
+# PDFs with more pages than this are rejected before any text is extracted.
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "20"))
+
+
+# Extraction stops once this many (estimated) prompt tokens have been produced; 0 disables the limit.
+EXTRACTION_TOKEN_BUDGET = int(os.getenv("EXTRACTION_TOKEN_BUDGET", "8000"))
+
+# Collapse whitespace, unify bullets and drop repeated lines before the text
+# is budgeted and sent (see `text_pipeline.compact_lines`).
+TEXT_COMPACTION = os.getenv("TEXT_COMPACTION", "true").lower() in ("1", "true", "yes")
+
+# PDF text engine: "auto" (pdfium, falling back to pdfplumber per degraded page),
+# "pdfium" or "pdfplumber".
+PDF_TEXT_ENGINE = os.getenv("PDF_TEXT_ENGINE", "auto")
+
+# PDFium is not thread-safe, so every call into it is serialized.
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _compacted(chunks: Iterable[str]) -> Iterable[str]:
+    return compact_lines(chunks) if TEXT_COMPACTION else chunks
+
+
+def _check_page_count(page_count: int) -> None:
+    annotate(pages=page_count)
+    if page_count > EXTRACTION_MAX_PAGES:
+        raise FileTooLargeError(
+            f"PDF has {page_count} pages; the maximum is {EXTRACTION_MAX_PAGES}.")
+
 
-def _extract_text_from_pdf(file: FileStorage) -> str:
+def _clean_pdfium_text(text: str) -> str:
+    """Normalize PDFium output to match pdfplumber's line conventions."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\x02", "-").replace("\ufffe", "")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def _pdfium_page_text(page: "pdfium.PdfPage") -> str:
+    """Cleaned text layer of a PDFium page; empty when the page counts as blank. Hold _PDFIUM_LOCK."""
+    textpage = page.get_textpage()
+    text = _clean_pdfium_text(textpage.get_text_bounded())
+    textpage.close()
+    return text
+
+
+def _looks_degraded(text: str) -> bool:
+    """
+    Heuristically decide whether fast-engine output is unusable.
+
+    Output is considered degraded when it contains unmapped glyphs
+    (replacement characters, control characters or pdfminer-style "(cid:N)"
+    markers) or when words appear to have run together because spacing was lost.
+
+    Args:
+        text (str): Text extracted from a single page.
+
+    Returns:
+        bool: True if the page should be re-extracted with pdfplumber.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return False
+    if "(cid:" in stripped:
+        return True
+    bad_chars = sum(1 for c in stripped if c == "\ufffd" or (
+        ord(c) < 32 and c not in "\n\t"))
+    if bad_chars / len(stripped) > 0.02:
+        return True
+    words = stripped.split()
+    return sum(len(word) for word in words) / len(words) > 15
+
+
+def _open_stream(data: Union[bytes, mmap.mmap]) -> BinaryIO:
+    """Open an independent stream over PDF contents without copying them."""
+    if isinstance(data, mmap.mmap):
+        return io.BufferedReader(MappedReader(data))
+    return io.BytesIO(data)
+
+
+def _pdfium_input(data: Union[bytes, mmap.mmap]) -> Union[bytes, ctypes.Array]:
+    """Hand a mapping to PDFium as an in-place buffer rather than a bytes copy."""
+    if isinstance(data, mmap.mmap):
+        return (ctypes.c_char * len(data)).from_buffer(data)
+    return data
+
+
+def _ocr_blank_pages(doc: "pdfium.PdfDocument", start: int) -> dict:
+    """
+    OCR the pages from `start` onwards that have no text layer.
+
+    A page is blank by the same test `_iter_pdf_page_texts` applies, so a
+    text layer holding only whitespace is recognized too.
+
+    Pages are rendered up front and recognized together, so they run in
+    parallel on the OCR pool. At most `ocr.max_pages` pages are rendered.
+
+    Returns:
+        dict[int, str]: Recognized text by page index.
+    """
+    images = {}
+    with _PDFIUM_LOCK:
+        for index in range(start, len(doc)):
+            if len(images) >= ocr.max_pages:
+                break
+            page = doc[index]
+            if not _pdfium_page_text(page):
+                bitmap = page.render(scale=ocr.render_scale(*page.get_size()), grayscale=True)
+                # Copied so the image outlives the PDFium bitmap.
+                images[index] = bitmap.to_pil().copy()
+                bitmap.close()
+            page.close()
+
+    with stage("ocr"):
+        texts = ocr.recognize(list(images.values()))
+    return dict(zip(images, texts))
+
+
+def _iter_pdf_page_texts(data: Union[bytes, mmap.mmap], engine: str) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF using the selected engine.
+
+    With OCR enabled (see ocr.py), pages without a text layer are rendered
+    and recognized instead; this needs the PDFium engine ("auto" or "pdfium").
+
+    Args:
+        data (bytes | mmap.mmap): The PDF file contents, or a copy-on-write
+                                  mapping of them (see `uploads.mapped`).
+        engine (str): "auto", "pdfium" or "pdfplumber".
+
+    Yields:
+        str: The text of one page (possibly empty).
+
+    Raises:
+        FileTooLargeError: If the PDF has more than EXTRACTION_MAX_PAGES pages.
+    """
+    if engine == "pdfplumber":
+        import pdfplumber
+        with _open_stream(data) as stream, pdfplumber.open(stream) as pdf:
+            _check_page_count(len(pdf.pages))
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                # Release the page's parsed layout objects before moving on.
+                page.close()
+                yield text
+        return
+
+    import pypdfium2 as pdfium
+    with _PDFIUM_LOCK:
+        doc = pdfium.PdfDocument(_pdfium_input(data))
+    plumber_pdf = None
+    plumber_stream = None
+    ocr_texts = None
+    try:
+        with _PDFIUM_LOCK:
+            page_count = len(doc)
+        _check_page_count(page_count)
+
+        for index in range(page_count):
+            with _PDFIUM_LOCK:
+                page = doc[index]
+                text = _pdfium_page_text(page)
+                page.close()
+
+            if not text and ocr.enabled:
+                if ocr_texts is None:
+                    ocr_texts = _ocr_blank_pages(doc, index)
+                text = ocr_texts.get(index, "")
+            elif engine == "auto" and _looks_degraded(text):
+                if plumber_pdf is None:
+                    import pdfplumber
+                    plumber_stream = _open_stream(data)
+                    plumber_pdf = pdfplumber.open(plumber_stream)
+                text = plumber_pdf.pages[index].extract_text() or ""
+
+            yield text
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+            plumber_stream.close()
+        with _PDFIUM_LOCK:
+            doc.close()
+
+
+def _extract_text_from_pdf(file: Union[FileStorage, BinaryIO], engine: Optional[str] = None) -> str:
     """
     Extract text from a PDF file.
 
-    This function reads a PDF file from a `FileStorage` object and returns
-    all non-empty text from each page as a single string separated by newline characters.
+    This function reads a PDF file from a `FileStorage` (or any binary file-like)
+    object and returns all non-empty text from each page as a single string
+    separated by newline characters. Text is extracted with PDFium by default,
+    and pages whose output looks degraded are re-extracted with pdfplumber's
+    layout-aware extraction (see PDF_TEXT_ENGINE).
+
+    Pages are processed lazily: page numbers and repeated headers/footers are
+    stripped and lines compacted (see TEXT_COMPACTION) as they stream past,
+    and extraction stops once
+    EXTRACTION_TOKEN_BUDGET is reached. Uploads spooled to disk are
+    memory-mapped rather than read into memory.
 
     Args:
-        file (FileStorage): A file-like object representing the uploaded PDF file.
+        file (FileStorage | BinaryIO): A file-like object representing the uploaded PDF file.
+        engine (str, optional): Overrides PDF_TEXT_ENGINE for this call.
 
     Returns:
         str: The extracted text from the PDF file.
 
     Raises:
         EmptyFileError: If the PDF file contains no text.
+        FileTooLargeError: If the PDF has more than EXTRACTION_MAX_PAGES pages.
         InvalidFileTypeError: If the file is not a valid PDF or is corrupt.
     """
     try:
-        file.seek(0)
-        with pdfplumber.open(file) as pdf:
-            text = '\n'.join(page.extract_text()
-                             for page in pdf.pages if page.extract_text())
+        with mapped(file) as data:
+            page_texts = _iter_pdf_page_texts(data, engine or PDF_TEXT_ENGINE)
+            try:
+                pages = strip_page_furniture(page_texts)
+                text = '\n'.join(iter_within_budget(_compacted(pages), EXTRACTION_TOKEN_BUDGET))
+            finally:
+                # The budget may stop iteration early; release the document
+                # before its mapping is closed.
+                page_texts.close()
         if not text.strip():
             raise EmptyFileError(
                 "PDF file is empty or text could not be extracted.")
         return text
+    except ParsingError:
+        raise
     except Exception as e:
         raise InvalidFileTypeError("Invalid or corrupt PDF file.") from e
 
 
-def _extract_text_from_docx(file: FileStorage) -> str:
+def _extract_text_from_docx(file: Union[FileStorage, BinaryIO]) -> str:
     """
     Extract text from a DOCX file.
 
-    This function reads a DOCX file from a `FileStorage` object and returns
-    all non-empty paragraphs as a single string separated by newline characters.
+    This function reads a DOCX file from a `FileStorage` (or any binary file-like)
+    object and returns its paragraphs, table rows, text boxes and page headers
+    as a single string separated by newline characters, compacted (see
+    TEXT_COMPACTION) and stopping once EXTRACTION_TOKEN_BUDGET is reached. The document XML is streamed rather
+    than loaded whole (see docx_stream.py).
 
     Parameters:
-        file (FileStorage): A file-like object representing the uploaded DOCX file.
+        file (FileStorage | BinaryIO): A file-like object representing the uploaded DOCX file.
 
     Returns:
         str: The extracted text from the DOCX file.
@@ -143,23 +519,52 @@ def _extract_text_from_docx(file: FileStorage) -> str:
     """
     try:
         file.seek(0)
-        doc = Document(file)
-        text = '\n'.join(para.text for para in doc.paragraphs if para.text)
+        lines = iter_docx_lines(file)
+        try:
+            text = '\n'.join(iter_within_budget(_compacted(lines), EXTRACTION_TOKEN_BUDGET))
+        finally:
+            lines.close()
         if not text.strip():
             raise EmptyFileError(
                 "DOCX file is empty or text could not be extracted.")
         return text
+    except ParsingError:
+        raise
     except Exception as e:
         raise InvalidFileTypeError("Invalid or corrupt DOCX file.") from e
 
 
+_EXTRACTORS = {
+    PDF_MIMETYPE: _extract_text_from_pdf,
+    DOCX_MIMETYPE: _extract_text_from_docx,
+}
+
+
+def _extract_text_from_stream(stream: BinaryIO, mimetype: str) -> str:
+    """
+    Extract text from a worker's spooled copy of an upload.
+
+    This is the entry point run inside extraction pool worker processes
+    (see `ExtractionPool.run_file`).
+
+    Args:
+        stream (BinaryIO): The upload contents, spooled in the worker.
+        mimetype (str): A supported mimetype (PDF or DOCX).
+
+    Returns:
+        str: The extracted text.
+    """
+    return _EXTRACTORS[mimetype](stream)
+
+
 def _extract_text(file: FileStorage) -> str:
     """
     Determines file type and extracts text accordingly.
 
     This function checks the file's mimetype and delegates the text
     extraction to the appropriate specialized function (_extract_text_from_pdf
-    or _extract_text_from_docx).
+    or _extract_text_from_docx). When the extraction pool is enabled, the
+    upload is streamed to a worker process and extracted there instead.
 
     Args:
         file (FileStorage): The uploaded file object to process.
@@ -172,33 +577,572 @@ def _extract_text(file: FileStorage) -> str:
         InvalidFileTypeError: If the file mimetype is not one of the
                             supported types (PDF or DOCX).
         EmptyFileError: If the file is valid but contains no text.
+        FileTooLargeError: If the file exceeds the page limit.
+        ExtractionTimeoutError: If pooled extraction exceeds its timeout.
+        ParsingError: If the extraction worker process dies.
     """
     if not hasattr(file, "mimetype"):
         raise ParsingError("File object has no mimetype attribute.")
 
-    if file.mimetype == "application/pdf":
-        return _extract_text_from_pdf(file)
-    elif file.mimetype == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return _extract_text_from_docx(file)
-    else:
+    if file.mimetype not in _EXTRACTORS:
         raise InvalidFileTypeError(
             "Unsupported file type. Please upload a PDF or DOCX file.")
+    annotate(mimetype=file.mimetype)
+
+    if extraction_pool.enabled:
+        return extraction_pool.run_file(_extract_text_from_stream, file, file.mimetype)
+
+    return _EXTRACTORS[file.mimetype](file)
 
 
+# ==============================
+# Sectioned Extraction Models
+# ==============================
+
+
+class ProfileSection(BaseModel):
+    """Personal details and summary, read from the resume header and summary section."""
+    personal: Optional[Personal] = None
+    professional_summary: Optional[str] = None
+
+
+class EducationSection(BaseModel):
+    """Education entries from the education section."""
+    education: Optional[List[Education]] = None
+
+
+class ExperienceSection(BaseModel):
+    """Work experience entries from the experience section."""
+    experience: Optional[List[Experience]] = None
+
+
+class SkillsSection(BaseModel):
+    """Technical and soft skills from the skills section(s)."""
+    skills: Optional[Skills] = None
+
+
+class ProjectsSection(BaseModel):
+    """Project entries from the projects section."""
+    projects: Optional[List[Project]] = None
+
+
+class CertificationsSection(BaseModel):
+    """Certification entries from the certifications section."""
+    certifications: Optional[List[Certification]] = None
+
+
+SECTION_PROMPT = '''
+        You are an AI resume parser. The text below is one part of a resume.
+        Extract the {fields} from it.
+        
+        If any field is missing in the text, return it as null or an empty list.
+        '''
+
+# (response model, sections whose text it reads, fields described to the model)
+SECTION_TASKS = [
+    (ProfileSection, (PERSONAL, SUMMARY),
+     "personal details (name, job title, email, phone, linkedin, github, location) and professional summary"),
+    (EducationSection, (EDUCATION,),
+     "education (degree, institution, grade, start_date, end_date)"),
+    (ExperienceSection, (EXPERIENCE,),
+     "work experience (job title, company, start date, end date, description)"),
+    (SkillsSection, (SKILLS,), "skills (technical and soft)"),
+    (ProjectsSection, (PROJECTS,),
+     "projects (name, description, technologies, url, repo)"),
+    (CertificationsSection, (CERTIFICATIONS,),
+     "certifications (name, issued_by, date)"),
+]
+
+# Sectioned mode falls back to a single call unless at least this many
+# sections (besides the personal header) were recognised.
+SECTIONED_MIN_SECTIONS = 2
+
 # ==============================
 # AI-Powered Resume Parsing
 # ==============================
 
 
-def resume_parser(file: FileStorage) -> ResumeData:
+@functools.lru_cache(maxsize=None)
+def _request_model(excluded_personal: frozenset, include_skills: bool) -> type[BaseModel]:
+    """
+    Build the response model for an LLM request that skips locally extracted fields.
+
+    Args:
+        excluded_personal (frozenset): Personal fields already known.
+        include_skills (bool): Whether the LLM should extract skills.
+
+    Returns:
+        type[BaseModel]: ResumeData itself when nothing is excluded, otherwise
+        a copy of it without the excluded fields.
+    """
+    if not excluded_personal and include_skills:
+        return ResumeData
+
+    personal_model = create_model("Personal", __doc__=Personal.__doc__, **{
+        name: (field.annotation, None) for name, field in Personal.model_fields.items()
+        if name not in excluded_personal
+    })
+    fields = {name: (field.annotation, None) for name, field in ResumeData.model_fields.items()
+              if include_skills or name != "skills"}
+    fields["personal"] = (Optional[personal_model], None)
+    return create_model("ResumeData", __doc__=ResumeData.__doc__, **fields)
+
+
+def _request_scope(text: str, local: Optional[dict]) -> tuple:
+    """
+    Decide which fields the LLM is asked for, given what the local extractor found.
+
+    The static layout asks for every field; the narrowed one leaves out
+    those the local extractor found.
+
+    Returns:
+        tuple[frozenset, bool]: Personal fields left out, and whether the
+        LLM should extract skills.
+    """
+    if PROMPT_LAYOUT == "static":
+        return frozenset(), True
+    local = local or {}
+    excluded_personal = frozenset(
+        set(LOCAL_PERSONAL_FIELDS) & set(local.get("personal", {})))
+    include_skills = not (local.get("skills") and skills_fully_covered(text))
+    return excluded_personal, include_skills
+
+
+def _requested_model(text: str, local: Optional[dict] = None) -> type[BaseModel]:
+    """The response model holding only the fields the LLM is asked for, to judge its answer by."""
+    return _request_model(*_request_scope(text, local))
+
+
+@functools.lru_cache(maxsize=None)
+def _static_prefix(tier_prompt: str = "standard") -> tuple:
+    """The messages every static-layout request starts with, for a tier's prompt."""
+    messages = [{"role": "system", "content": PROMPT + TIER_PROMPTS[tier_prompt]}]
+    if PROMPT_EXAMPLES:
+        for example, answer in FEW_SHOT_EXAMPLES:
+            messages.append({"role": "user", "content": example})
+            messages.append({"role": "assistant", "content": answer.model_dump_json()})
+    return tuple(messages)
+
+
+def _single_request(text: str, local: Optional[dict] = None, tier: Optional[Tier] = None) -> dict:
+    """
+    Build the OpenAI request for a single-call parse.
+
+    With PROMPT_LAYOUT="static", the schema, system prompt and examples are
+    the same on every call, a cacheable prefix to the resume text, and every
+    field is requested. With "narrowed", fields already found by the local
+    extractor are left out of the request schema and prompt, which shrinks
+    both the prompt and the output but trusts the extractor with them.
+
+    Args:
+        text (str): The extracted resume text.
+        local (dict, optional): Output of `local_extractor.extract_local`.
+        tier (Tier, optional): Model tier to ask; MODEL with the standard prompt if omitted.
+
+    Returns:
+        dict: Keyword arguments for `gateway.parse`.
+    """
+    model = tier.model if tier is not None else MODEL
+
+    if PROMPT_LAYOUT == "static":
+        # Copied, as callers such as benchmarks/replay.py edit the messages.
+        messages = [dict(message) for message in _static_prefix(tier.prompt if tier is not None else "standard")]
+        messages.append({"role": "user", "content": text})
+        return dict(model=model, messages=messages, response_format=ResumeData)
+
+    excluded_personal, include_skills = _request_scope(text, local)
+    response_format = _request_model(excluded_personal, include_skills)
+
+    prompt = PROMPT
+    if response_format is not ResumeData:
+        prompt = _build_prompt(
+            [name for name in ResumeData.model_fields if include_skills or name != "skills"],
+            [name for name in Personal.model_fields if name not in excluded_personal],
+        )
+    if tier is not None:
+        prompt += TIER_PROMPTS[tier.prompt]
+
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": text}
+        ],
+        response_format=response_format,  # Enforce structured response
+    )
+
+
+def _single_result(response, response_format: type[BaseModel]) -> ResumeData:
+    """
+    Convert a single-call response to ResumeData.
+
+    Raises:
+        InvalidAIResponseError: If the AI returns an empty response.
+    """
+    return _resume_data(response.choices[0].message.parsed, response_format)
+
+
+def _resume_data(parsed_data: Optional[BaseModel], response_format: type[BaseModel]) -> ResumeData:
+    """
+    Convert a parsed answer in `response_format` to ResumeData.
+
+    Raises:
+        InvalidAIResponseError: If the answer is empty.
+    """
+    if not parsed_data:
+        raise InvalidAIResponseError("AI returned an empty response.")
+
+    if response_format is not ResumeData:
+        with stage("validation"):
+            parsed_data = ResumeData.model_validate(parsed_data.model_dump())
+
+    return parsed_data
+
+
+def _parse_single(text: str, local: Optional[dict] = None) -> ResumeData:
+    """
+    Extract ResumeData from resume text in one OpenAI call (see `_single_request`).
+
+    The call goes to the model tier the router picks for the text, and is
+    repeated on a stronger tier while the answer is invalid or sparse and the
+    budgets allow (see `routing`).
+
+    Raises:
+        OpenAIFailureError: If the AI returns an empty response.
+    """
+    route = router.route(text)
+    requested = _requested_model(text, local).model_fields
+    for tier in route:
+        request = _single_request(text, local, tier)
+        with track_usage() as usage:
+            try:
+                with stage("openai"):
+                    if tier.model == LOCAL_MODEL:
+                        response = local_completion(text, request["response_format"])
+                    else:
+                        response = gateway.parse_sync(**request)
+                result = _single_result(response, request["response_format"])
+            except _rejected_answers() as e:
+                route.failed(e, usage)
+                continue
+        route.completed(result, usage, requested)
+    return _routed_result(route)
+
+
+async def _parse_single_async(text: str, local: Optional[dict] = None) -> ResumeData:
+    """Async version of `_parse_single`."""
+    route = router.route(text)
+    requested = _requested_model(text, local).model_fields
+    for tier in route:
+        request = _single_request(text, local, tier)
+        with track_usage() as usage:
+            try:
+                with stage("openai"):
+                    if tier.model == LOCAL_MODEL:
+                        response = local_completion(text, request["response_format"])
+                    else:
+                        response = await gateway.parse(**request)
+                result = _single_result(response, request["response_format"])
+            except _rejected_answers() as e:
+                route.failed(e, usage)
+                continue
+        route.completed(result, usage, requested)
+    return _routed_result(route)
+
+
+def _routed_result(route: Route) -> ResumeData:
+    result = route.result()
+    _answered_by.set(route.answered_by.model)
+    return result
+
+
+def _merge_local(parsed_data: ResumeData, local: dict) -> ResumeData:
+    """
+    Merge locally extracted fields into an LLM result.
+
+    Local values only fill personal fields and skill lists the model left
+    empty: regexes and the skills dictionary can misread a resume, while the
+    model saw each value in context.
+    """
+    personal = local.get("personal", {})
+    skills = local.get("skills", {})
+    if not personal and not skills:
+        return parsed_data
+
+    merged = parsed_data.model_dump()
+
+    merged_personal = merged.get("personal") or {}
+    for field, value in personal.items():
+        if not merged_personal.get(field):
+            merged_personal[field] = value
+    merged["personal"] = merged_personal
+
+    merged_skills = merged.get("skills") or {}
+    for kind, values in skills.items():
+        if not merged_skills.get(kind):
+            merged_skills[kind] = values
+    merged["skills"] = merged_skills
+
+    return ResumeData.model_validate(merged)
+
+
+async def _parse_section(response_format: type[BaseModel], fields: str, text: str) -> Optional[BaseModel]:
+    response = await gateway.parse(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SECTION_PROMPT.format(fields=fields)},
+            {"role": "user", "content": text}
+        ],
+        response_format=response_format,
+    )
+    return response.choices[0].message.parsed
+
+
+def _section_calls(text: str) -> Optional[list]:
+    """
+    Split resume text into sections and start one OpenAI call per section group.
+
+    Returns:
+        list | None: Awaitables for the section calls, or None if sectioning
+        did not recognise enough sections.
+    """
+    sections = split_sections(text)
+    if len(sections.keys() - {PERSONAL}) < SECTIONED_MIN_SECTIONS:
+        return None
+
+    calls = []
+    for response_format, names, fields in SECTION_TASKS:
+        section_text = "\n".join(sections[name]
+                                 for name in names if name in sections)
+        if section_text:
+            calls.append(_parse_section(response_format, fields, section_text))
+    return calls
+
+
+async def _gather_sections(calls: list) -> Optional[ResumeData]:
+    try:
+        with stage("openai"):
+            results = await asyncio.gather(*calls)
+    except ValidationError:
+        return None
+    if any(result is None for result in results):
+        return None
+
+    with stage("validation"):
+        merged = {}
+        for result in results:
+            merged.update(result.model_dump(exclude_unset=True))
+        return ResumeData.model_validate(merged)
+
+
+def _parse_sectioned(text: str) -> Optional[ResumeData]:
+    """
+    Extract ResumeData by parsing each resume section concurrently.
+
+    The text is split into sections with a local heuristic, each group of
+    sections is sent to the model with only its matching sub-model, and the
+    partial results are merged. Latency is bounded by the slowest section
+    instead of the total output length.
+
+    Args:
+        text (str): The extracted resume text.
+
+    Returns:
+        ResumeData | None: The merged result, or None if sectioning did not
+        recognise enough sections or a section came back empty or invalid,
+        in which case the caller should fall back to a single call.
+    """
+    calls = _section_calls(text)
+    if calls is None:
+        return None
+    return gateway.run(_gather_sections(calls))
+
+
+async def _parse_sectioned_async(text: str) -> Optional[ResumeData]:
+    """Async version of `_parse_sectioned`."""
+    calls = _section_calls(text)
+    if calls is None:
+        return None
+    return await _gather_sections(calls)
+
+
+# ==============================
+# Incremental Re-Parsing
+# ==============================
+
+_content_hash: ContextVar[Optional[str]] = ContextVar("content_hash", default=None)
+
+
+def content_hash() -> Optional[str]:
+    """
+    Return the content hash of the resume last parsed in the current context.
+
+    Clients send it back as `previous` with an edited version of the same
+    resume so that only the changed sections are re-extracted.
+    """
+    return _content_hash.get()
+
+
+def _task_text(sections: dict, names: tuple) -> str:
+    return "\n".join(sections[name] for name in names if name in sections)
+
+
+def _incremental_changes(text: str, previous: str) -> Optional[tuple[dict, list]]:
+    """
+    Work out which section groups changed since a previously parsed version.
+
+    Args:
+        text (str): The newly extracted resume text.
+        previous (str): Content hash of the earlier parse.
+
+    Returns:
+        tuple | None: The earlier result as a dict and a list of
+        `(response_format, fields, section_text)` for each changed section
+        group, with an empty text for removed sections. None if the earlier
+        text or result is no longer cached, either version could not be
+        split into sections, or every section changed.
+    """
+    previous_text = text_cache.get(previous)
+    previous_result = parse_cache.peek(previous)
+    if previous_text is None or previous_result is None:
+        return None
+
+    old_sections, new_sections = split_sections(previous_text), split_sections(text)
+    if min(len(old_sections.keys() - {PERSONAL}), len(new_sections.keys() - {PERSONAL})) \
+            < SECTIONED_MIN_SECTIONS:
+        return None
+
+    changes = []
+    present = 0
+    for response_format, names, fields in SECTION_TASKS:
+        new_text = _task_text(new_sections, names)
+        present += bool(new_text)
+        if normalize_text(new_text) != normalize_text(_task_text(old_sections, names)):
+            changes.append((response_format, fields, new_text))
+    if changes and len(changes) >= present:
+        return None  # Nothing to reuse; a full parse reads the sections in context.
+
+    return ResumeData.model_validate_json(previous_result).model_dump(), changes
+
+
+async def _apply_changes(base: dict, changes: list) -> Optional[ResumeData]:
+    """Re-extract changed section groups and overwrite their fields in `base`."""
+    calls = [_parse_section(response_format, fields, section_text)
+             for response_format, fields, section_text in changes if section_text]
+    try:
+        with stage("openai"):
+            results = iter(await asyncio.gather(*calls))
+    except ValidationError:
+        return None
+
+    with stage("validation"):
+        for response_format, _, section_text in changes:
+            result = next(results) if section_text else response_format()
+            if result is None:
+                return None
+            # Replace the group's fields outright, so removed entries disappear.
+            base.update(result.model_dump(include=set(response_format.model_fields)))
+        return ResumeData.model_validate(base)
+
+
+def _parse_incremental(text: str, previous: str) -> Optional[ResumeData]:
+    """
+    Re-parse an edited resume by re-extracting only the sections that changed.
+
+    The new text and the text of the earlier parse are split into sections
+    and compared group by group (profile, education, experience...). Changed
+    groups are sent to the model as in sectioned mode and their fields are
+    replaced in the earlier result; unchanged groups are reused as they are.
+
+    Args:
+        text (str): The newly extracted resume text.
+        previous (str): Content hash returned with the earlier parse.
+
+    Returns:
+        ResumeData | None: The updated result, or None if the caller should
+        run a full parse instead (see `_incremental_changes`).
+    """
+    plan = _incremental_changes(text, previous)
+    if plan is None:
+        return None
+    return gateway.run(_apply_changes(*plan))
+
+
+async def _parse_incremental_async(text: str, previous: str) -> Optional[ResumeData]:
+    """Async version of `_parse_incremental`."""
+    plan = _incremental_changes(text, previous)
+    if plan is None:
+        return None
+    return await _apply_changes(*plan)
+
+
+def _cache_key(text: str) -> str:
+    return make_key(text, router.version, PROMPT_VERSION, SCHEMA_VERSION, PARSE_MODE, PROMPT_LAYOUT,
+                    str(PROMPT_EXAMPLES))
+
+
+def _finish(parsed_data: ResumeData, local: dict, cache_key: str, text: str,
+            usage: dict, started: float) -> ResumeData:
+    """
+    Record an LLM result, merge locally extracted fields into it and cache it with its text.
+
+    Args:
+        usage (dict): Token totals of the LLM calls, from `metrics.track_usage`.
+        started (float): `time.perf_counter()` before the LLM calls.
+    """
+    observe_parse_usage(usage)
+    recorder.record(text, parsed_data, usage, time.perf_counter() - started,
+                    model=_answered_by.get() or MODEL, prompt_version=PROMPT_VERSION, schema_version=SCHEMA_VERSION,
+                    parse_mode=PARSE_MODE, content_hash=cache_key)
+    with stage("validation"):
+        parsed_data = _merge_local(parsed_data, local)
+    parse_cache.set(cache_key, parsed_data.model_dump_json())
+    if INCREMENTAL_PARSE:
+        text_cache.set(cache_key, text)
+    return parsed_data
+
+
+@contextmanager
+def _ai_errors() -> Iterator[None]:
+    """Let parsing errors through and report anything else as an AI failure."""
+    try:
+        yield
+    except (InvalidFileTypeError, EmptyFileError, ParsingError) as e:
+        raise e
+    except ServiceOverloadedError:
+        raise
+    except ValidationError as e:
+        raise OpenAIFailureError(f"AI returned invalid data structure: {e}")
+    except Exception as e:
+        raise OpenAIFailureError(f"Error communicating with AI service: {e}")
+
+
+def resume_parser(file: FileStorage, local_only: bool = False, previous: Optional[str] = None) -> ResumeData:
     """
     Parses resume text using OpenAI GPT-4o-mini to extract structured information.
 
     This is the main service function that orchestrates text extraction
-    and AI-powered parsing. 
+    and AI-powered parsing. Results are cached by a hash of the extracted
+    text and the prompt/model/schema versions, so a cache hit skips the
+    OpenAI call entirely. With PARSE_MODE="sectioned", sections are parsed
+    concurrently, falling back to a single call if sectioning fails.
+
+    Contact details and dictionary skills are extracted locally first, and
+    fill any of those fields the LLM leaves empty.
+
+    Given the content hash of an earlier parse of the same resume (see
+    `content_hash`), only the sections that changed since are re-extracted.
+
+    Identical uploads parsed concurrently, e.g. on a double-click, share one
+    parse: later callers wait for the first and get its result or error (see
+    coalesce.py and PARSE_COALESCE_BACKEND).
 
     Args:
         file (FileStorage): The uploaded resume file (PDF or DOCX).
+        local_only (bool): Skip the LLM and return only the locally extracted
+                           fields (personal contact details and skills).
+        previous (str, optional): Content hash of an earlier parse to update
+                                  incrementally.
 
     Returns:
         ResumeData: A Pydantic model (defined in this module) containing
@@ -210,47 +1154,382 @@ def resume_parser(file: FileStorage) -> ResumeData:
         ParsingError: If the file object is invalid (e.g., missing mimetype).
         OpenAIFailureError: If the OpenAI API call fails, times out, or
                             returns data that does not match the ResumeData model.
+                            Transient failures are retried by the LLM gateway first.
     """
 
-    try:
-        text = _extract_text(file)
+    if local_only or not isinstance(file, FileStorage):
+        return _resume_parser(file, local_only, previous)
 
-        prompt = '''
-        You are an AI resume parser. Extract the following details from the given resume text:
-        
-        1. Personal details (name, job title, email, phone, linkedin, github, location)
-        2. Professional summary
-        3. Education (degree, institution, grade, start_date, end_date)
-        4. Work Experience (job title, company, start date, end date, description)
-        5. Skills (technical and soft)
-        6. Projects (name, description, technologies, url, repo)
-        7. Certifications (name, issued_by, date)
-        
-        If any field is missing in the resume, return it as null or an empty list.
-        '''
+    outcome = json.loads(single_flight.do(_upload_key(file, previous), lambda: _shared_parse(file, previous)))
+    _content_hash.set(outcome["hash"])
+    return ResumeData.model_validate_json(outcome["data"])
 
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": text}
-            ],
-            response_format=ResumeData,  # Enforce structured response
-        )
 
-        parsed_data = response.choices[0].message.parsed
+def _upload_key(file: FileStorage, previous: Optional[str]) -> str:
+    """Key identical parse requests by the upload's bytes, its type, `previous` and the versions in the cache key."""
+    digest = hashlib.sha256()
+    for part in (file.mimetype or "", previous or "", router.version, PROMPT_VERSION, SCHEMA_VERSION, PARSE_MODE):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    with mapped(file) as data:
+        digest.update(data)
+    file.seek(0)
+    return digest.hexdigest()
 
-        if not parsed_data:
-            raise OpenAIFailureError("AI returned an empty response.")
 
-        return parsed_data
+def _shared_parse(file: FileStorage, previous: Optional[str]) -> str:
+    """Run `_resume_parser` for `single_flight`, serializing the result with its content hash."""
+    parsed_data = _resume_parser(file, previous=previous)
+    return json.dumps({"hash": _content_hash.get(), "data": parsed_data.model_dump_json()})
 
-    except (InvalidFileTypeError, EmptyFileError, ParsingError) as e:
-        raise e
-    except ValidationError as e:
-        raise OpenAIFailureError(f"AI returned invalid data structure: {e}")
-    except Exception as e:
-        raise OpenAIFailureError(f"Error communicating with AI service: {e}")
+
+def _resume_parser(file: FileStorage, local_only: bool = False, previous: Optional[str] = None) -> ResumeData:
+    """`resume_parser` without coalescing."""
+    _content_hash.set(None)
+    _answered_by.set(None)
+    with _ai_errors():
+        with stage("extraction"):
+            text = _extract_text(file)
+
+        local = extract_local(text) if LOCAL_PREEXTRACT or local_only else {}
+        if local_only:
+            return ResumeData.model_validate(local)
+
+        cache_key = _cache_key(text)
+        _content_hash.set(cache_key)
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            return ResumeData.model_validate_json(cached)
+
+        started = time.perf_counter()
+        with track_usage() as usage:
+            parsed_data = None
+            if previous and INCREMENTAL_PARSE:
+                parsed_data = _parse_incremental(text, previous)
+            if parsed_data is None and PARSE_MODE == "sectioned":
+                parsed_data = _parse_sectioned(text)
+            if parsed_data is None:
+                parsed_data = _parse_single(text, local)
+        return _finish(parsed_data, local, cache_key, text, usage, started)
+
+
+async def resume_parser_async(file: FileStorage, local_only: bool = False,
+                              previous: Optional[str] = None) -> ResumeData:
+    """
+    Async version of `resume_parser` for the ASGI app.
+
+    Text extraction runs in a worker thread and the OpenAI calls are awaited
+    on the caller's event loop, so one process can carry many parses at once
+    without a thread per request. Identical uploads are coalesced as in
+    `resume_parser`.
+
+    Args:
+        file (FileStorage): The uploaded resume file (PDF or DOCX).
+        local_only (bool): Skip the LLM and return only the locally extracted fields.
+        previous (str, optional): Content hash of an earlier parse to update incrementally.
+
+    Returns:
+        ResumeData: The structured resume data.
+
+    Raises:
+        Same as `resume_parser`.
+    """
+    if local_only or not isinstance(file, FileStorage):
+        return await _resume_parser_async(file, local_only, previous)
+
+    key = await asyncio.to_thread(_upload_key, file, previous)
+    outcome = json.loads(await single_flight.do_async(key, lambda: _shared_parse_async(file, previous)))
+    _content_hash.set(outcome["hash"])
+    return ResumeData.model_validate_json(outcome["data"])
+
+
+async def _shared_parse_async(file: FileStorage, previous: Optional[str]) -> str:
+    """Async version of `_shared_parse`."""
+    parsed_data = await _resume_parser_async(file, previous=previous)
+    return json.dumps({"hash": _content_hash.get(), "data": parsed_data.model_dump_json()})
+
+
+async def _resume_parser_async(file: FileStorage, local_only: bool = False,
+                               previous: Optional[str] = None) -> ResumeData:
+    """`resume_parser_async` without coalescing."""
+    _content_hash.set(None)
+    _answered_by.set(None)
+    with _ai_errors():
+        with stage("extraction"):
+            text = await asyncio.to_thread(_extract_text, file)
+
+        local = extract_local(text) if LOCAL_PREEXTRACT or local_only else {}
+        if local_only:
+            return ResumeData.model_validate(local)
+
+        cache_key = _cache_key(text)
+        _content_hash.set(cache_key)
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            return ResumeData.model_validate_json(cached)
+
+        started = time.perf_counter()
+        with track_usage() as usage:
+            parsed_data = None
+            if previous and INCREMENTAL_PARSE:
+                parsed_data = await _parse_incremental_async(text, previous)
+            if parsed_data is None and PARSE_MODE == "sectioned":
+                parsed_data = await _parse_sectioned_async(text)
+            if parsed_data is None:
+                parsed_data = await _parse_single_async(text, local)
+        return _finish(parsed_data, local, cache_key, text, usage, started)
+
+
+# ==============================
+# Streaming Parse
+# ==============================
+
+def _merge_local_field(name: str, value: Any, local: dict) -> Any:
+    """Apply `_merge_local` to one streamed top-level field."""
+    if name not in ("personal", "skills") or not local.get(name):
+        return value
+    merged = _merge_local(ResumeData.model_validate({name: value}), {name: local[name]})
+    return getattr(merged, name).model_dump(mode="json")
+
+
+def _field_event(field: tuple, local: dict) -> dict:
+    name, index, value = field
+    if index is None:
+        return {"event": "field", "field": name, "source": "model", "data": _merge_local_field(name, value, local)}
+    return {"event": "item", "field": name, "index": index, "data": value}
+
+
+async def _stream_single(route: Route, text: str, local: dict) -> AsyncIterator[dict]:
+    """
+    Parse `text` in one streamed call per model tier, yielding fields as they complete.
+
+    Tiers are tried as in `_parse_single`. A tier whose answer is rejected
+    may already have yielded fields; the next tier yields them again.
+    """
+    requested = _requested_model(text, local).model_fields
+    for tier in route:
+        request = _single_request(text, local, tier)
+        response_format = request["response_format"]
+        with track_usage() as usage:
+            try:
+                if tier.model == LOCAL_MODEL:
+                    result = _single_result(local_completion(text, response_format), response_format)
+                else:
+                    fields = FieldStream(response_format)
+                    with stage("openai"):
+                        async for delta in gateway.stream(**request):
+                            for field in fields.feed(delta):
+                                yield _field_event(field, local)
+                    parsed, remaining = fields.finish()
+                    for field in remaining:
+                        yield _field_event(field, local)
+                    result = _resume_data(parsed, response_format)
+            except _rejected_answers() as e:
+                route.failed(e, usage)
+                continue
+        route.completed(result, usage, requested)
+
+
+async def _stream_events(text: str, local: dict, cache_key: str, previous: Optional[str]) -> AsyncIterator[dict]:
+    """
+    Yield the events of a streamed parse of extracted text (see `resume_parser_stream`).
+
+    Identical streams running at the same time share one parse: later ones
+    wait for the first and, as for a cached result, only yield its result.
+    """
+    with _ai_errors():
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            yield {"event": "result", "data": ResumeData.model_validate_json(cached).model_dump(mode="json")}
+            return
+
+        async with single_flight.lead_async(f"stream\0{cache_key}\0{previous or ''}") as turn:
+            if turn.outcome is None:
+                async for event in _stream_parse(text, local, cache_key, previous):
+                    if event["event"] == "result":
+                        turn.finish(json.dumps(event["data"]))
+                    yield event
+                return
+        yield {"event": "result", "data": json.loads(turn.outcome)}
+
+
+async def _stream_parse(text: str, local: dict, cache_key: str, previous: Optional[str]) -> AsyncIterator[dict]:
+    """The events of `_stream_events` for a text that is not cached, parsed here."""
+    # Errors are mapped here too, so streams waiting on this one see them mapped.
+    with _ai_errors():
+        for name in ("personal", "skills"):
+            if local.get(name):
+                yield {"event": "field", "field": name, "source": "local", "data": local[name]}
+
+        started = time.perf_counter()
+        with track_usage() as usage:
+            parsed_data = None
+            if previous and INCREMENTAL_PARSE:
+                parsed_data = await _parse_incremental_async(text, previous)
+            if parsed_data is None and PARSE_MODE == "sectioned":
+                parsed_data = await _parse_sectioned_async(text)
+            if parsed_data is None:
+                route = router.route(text)
+                first = True
+                async for event in _stream_single(route, text, local):
+                    if first:
+                        STREAM_FIRST_FIELD_SECONDS.observe(time.perf_counter() - started)
+                        first = False
+                    yield event
+                parsed_data = _routed_result(route)
+        parsed_data = _finish(parsed_data, local, cache_key, text, usage, started)
+        yield {"event": "result", "data": parsed_data.model_dump(mode="json")}
+
+
+def resume_parser_stream(file: FileStorage, previous: Optional[str] = None) -> Iterator[dict]:
+    """
+    Parse a resume, yielding its fields while the model is still generating.
+
+    The text is extracted before this returns, so problems with the upload
+    raise here rather than from the iterator. The LLM call is then streamed
+    and each top-level field, and each entry of a list field, is yielded as
+    soon as it is complete and valid. Locally extracted contact details and
+    skills are yielded first, before the LLM call, and merged into the
+    model's `personal` and `skills` when those arrive.
+
+    Cached results, incremental updates and sectioned mode (PARSE_MODE) are
+    not streamed field by field; only their result is yielded. Neither is a
+    stream of the same text as one already running, which waits for that
+    one's result instead of starting another parse (see coalesce.py).
+
+    Args:
+        file (FileStorage): The uploaded resume file (PDF or DOCX).
+        previous (str, optional): Content hash of an earlier parse to update incrementally.
+
+    Returns:
+        Iterator[dict]: Events, each with an "event" key:
+            - "field": a complete top-level field ("field", "source" of
+              "local" or "model", and "data"), replacing any earlier value;
+            - "item": one entry of a list field ("field", "index", "data");
+            - "result": the final ResumeData as `resume_parser` returns it,
+              always last. It is authoritative: if an answer is rejected and
+              retried on a stronger model tier, fields and items are sent
+              again and entries from the rejected answer may be left over.
+
+    Raises:
+        Same as `resume_parser`; errors after extraction are raised by the iterator.
+    """
+    _content_hash.set(None)
+    _answered_by.set(None)
+    with _ai_errors():
+        with stage("extraction"):
+            text = _extract_text(file)
+        local = extract_local(text) if LOCAL_PREEXTRACT else {}
+        cache_key = _cache_key(text)
+        _content_hash.set(cache_key)
+    return gateway.iterate(_stream_events(text, local, cache_key, previous))
+
+
+async def resume_parser_stream_async(file: FileStorage, previous: Optional[str] = None) -> AsyncIterator[dict]:
+    """Async version of `resume_parser_stream`."""
+    _content_hash.set(None)
+    _answered_by.set(None)
+    with _ai_errors():
+        with stage("extraction"):
+            text = await asyncio.to_thread(_extract_text, file)
+        local = extract_local(text) if LOCAL_PREEXTRACT else {}
+        cache_key = _cache_key(text)
+        _content_hash.set(cache_key)
+    return _stream_events(text, local, cache_key, previous)
+
+
+# ==============================
+# Warmup
+# ==============================
+
+_WARMUP_LINES = ("Jane Doe", "jane.doe@example.com | +44 20 7946 0958", "Skills", "Python, SQL, Teamwork")
+
+
+def _warmup_docx() -> bytes:
+    """A one-paragraph-per-line DOCX holding `_WARMUP_LINES`."""
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in _WARMUP_LINES)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr("word/document.xml",
+                         '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                         f"<w:body>{paragraphs}</w:body></w:document>")
+    return buffer.getvalue()
+
+
+def _warmup_pdf() -> bytes:
+    """A one-page PDF holding `_WARMUP_LINES`."""
+    content = "BT /F1 12 Tf 14 TL 72 720 Td " + " T* ".join(f"({line}) Tj" for line in _WARMUP_LINES) + " ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+        b" /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content.encode("latin-1")),
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def warmup() -> dict:
+    """
+    Do the one-off work of a worker's first parse ahead of time.
+
+    Imports the OpenAI client and the PDF libraries, builds the request
+    schema and streaming validators of every response model variant, and
+    runs extraction, local extraction and validation on tiny embedded
+    documents. Extraction runs in-process, bypassing the extraction pool. gunicorn calls this in the
+    master before forking (see gunicorn.conf.py), so workers start warm and
+    share the result copy-on-write.
+
+    Returns:
+        dict[str, float]: Seconds spent on each step.
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    import openai  # noqa: F401
+    import pdfplumber  # noqa: F401
+    import pypdfium2  # noqa: F401
+    retryable_errors()
+    _rejected_answers()
+    timings["imports"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for size in range(len(LOCAL_PERSONAL_FIELDS) + 1):
+        for excluded in itertools.combinations(LOCAL_PERSONAL_FIELDS, size):
+            for include_skills in (True, False):
+                response_format = _request_model(frozenset(excluded), include_skills)
+                response_format_param(response_format)
+                FieldStream.prepare(response_format)
+    for response_format, _, _ in SECTION_TASKS:
+        response_format_param(response_format)
+    for tier in router.tiers:
+        _static_prefix(tier.prompt)
+    timings["schemas"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    text = _extract_text_from_pdf(io.BytesIO(_warmup_pdf()))
+    _extract_text_from_docx(io.BytesIO(_warmup_docx()))
+    timings["extraction"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    local = extract_local(text)
+    ResumeData.model_validate_json(ResumeData.model_validate(local).model_dump_json())
+    timings["validation"] = time.perf_counter() - started
+    return timings
 
 
 if __name__ == "__main__":
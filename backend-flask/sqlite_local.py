@@ -0,0 +1,41 @@
+"""
+Per-thread SQLite connections for the stores shared between gunicorn workers.
+
+The parse cache, rate-limit buckets, parse recorder and request coalescing
+can all keep their state in a SQLite database in WAL mode. Connections
+cannot be shared between threads or survive a fork, so each store reaches
+its database through a LocalConnections.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Optional
+
+
+class LocalConnections:
+    """
+    Hands out one connection per thread (and per process, since workers fork after import).
+
+    Args:
+        path (str): Location of the database file.
+        row_factory (callable, optional): Row factory set on each connection, e.g. `sqlite3.Row`.
+    """
+
+    def __init__(self, path: str, row_factory: Optional[Any] = None):
+        self.path = path
+        self.row_factory = row_factory
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it in autocommit and WAL mode if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,142 @@
+"""
+Incremental parsing of streamed structured output.
+
+With `stream=True`, a structured-output completion arrives as a growing JSON
+document. FieldStream re-reads it with jiter's partial mode as deltas come
+in and reports each top-level field, and each entry of a list field, once
+it is complete and valid against its Pydantic type. That way, a client sees
+the personal details or the first job long before the whole response is done.
+
+A value is complete once the model has moved past it: a field when the next
+field starts, a list entry when the next entry starts, and everything else
+when the document ends. OpenAI's strict structured output emits fields in
+schema order, one at a time, so nothing is reported twice.
+"""
+
+import functools
+from typing import Any, List, Optional, Tuple, Union, get_args, get_origin
+
+import jiter
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# A value can only complete after one of these characters.
+_BOUNDARIES = frozenset(",]}")
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+def _item_type(annotation: Any) -> Optional[Any]:
+    """Return `X` for a `List[X]` or `Optional[List[X]]` annotation, else None."""
+    candidates = get_args(annotation) if get_origin(annotation) is Union else (annotation,)
+    for candidate in candidates:
+        if get_origin(candidate) in (list, List):
+            return get_args(candidate)[0]
+    return None
+
+
+# (field name, list index or None for a whole field, validated JSON-compatible value)
+Field = Tuple[str, Optional[int], Any]
+
+
+class FieldStream:
+    """
+    Reports the fields of a streamed response as they complete.
+
+    Args:
+        response_format (type[BaseModel]): The model the response follows.
+    """
+
+    def __init__(self, response_format: type[BaseModel]):
+        self.response_format = response_format
+        self._buffer = bytearray()
+        self._done: set = set()  # Fields reported in full.
+        self._items: dict = {}  # List field -> number of entries reported.
+        # After a boundary, the value it ends is complete only once the next
+        # one starts, which may be a later delta: keep reparsing until then.
+        self._pending = False
+        self._shape: Tuple[int, int] = (0, 0)
+
+    @staticmethod
+    def prepare(response_format: type[BaseModel]) -> None:
+        """Build the validators for `response_format`'s fields ahead of the first stream."""
+        for field in response_format.model_fields.values():
+            _adapter(field.annotation)
+            item_type = _item_type(field.annotation)
+            if item_type is not None:
+                _adapter(item_type)
+
+    def feed(self, delta: str) -> List[Field]:
+        """
+        Add a chunk of the response.
+
+        Returns:
+            list[Field]: Values completed by this chunk, in document order.
+        """
+        self._buffer += delta.encode("utf-8")
+        if not self._pending and _BOUNDARIES.isdisjoint(delta):
+            return []
+        try:
+            data = jiter.from_json(bytes(self._buffer), partial_mode="trailing-strings")
+        except ValueError:
+            return []
+        if not isinstance(data, dict):
+            return []
+        names = list(data)
+        last = names[-1] if names else None
+        shape = (len(names), len(data[last]) if isinstance(data.get(last), list) else 0)
+        self._pending = shape == self._shape
+        self._shape = shape
+        return self._collect(data, names[:-1], last=last)
+
+    def finish(self) -> Tuple[BaseModel, List[Field]]:
+        """
+        Validate the complete response.
+
+        Returns:
+            tuple[BaseModel, list[Field]]: The parsed response and the values
+            not reported yet.
+
+        Raises:
+            ValidationError: If the response is not valid JSON for the model.
+        """
+        parsed = self.response_format.model_validate_json(bytes(self._buffer))
+        data = jiter.from_json(bytes(self._buffer))
+        return parsed, self._collect(data, list(data), last=None)
+
+    def _collect(self, data: dict, complete: List[str], last: Optional[str]) -> List[Field]:
+        fields = self.response_format.model_fields
+        found = []
+        for name in complete:
+            if name in fields and name not in self._done:
+                found += self._complete_field(name, data[name], fields[name].annotation)
+        if last in fields and last not in self._done and isinstance(data[last], list):
+            item_type = _item_type(fields[last].annotation)
+            if item_type is not None:
+                # Every entry but the one being written is complete.
+                found += self._complete_items(last, data[last][:-1], item_type)
+        return found
+
+    def _complete_field(self, name: str, value: Any, annotation: Any) -> List[Field]:
+        self._done.add(name)
+        item_type = _item_type(annotation)
+        if item_type is not None and isinstance(value, list):
+            return self._complete_items(name, value, item_type)
+        try:
+            validated = _adapter(annotation).validate_python(value)
+        except ValidationError:
+            return []  # Reported by `finish`.
+        return [(name, None, _adapter(annotation).dump_python(validated, mode="json"))]
+
+    def _complete_items(self, name: str, items: list, item_type: Any) -> List[Field]:
+        found = []
+        for index in range(self._items.get(name, 0), len(items)):
+            try:
+                validated = _adapter(item_type).validate_python(items[index])
+            except ValidationError:
+                continue
+            found.append((name, index, _adapter(item_type).dump_python(validated, mode="json")))
+        self._items[name] = max(self._items.get(name, 0), len(items))
+        return found
@@ -1,6 +1,26 @@
 import sys
 import os
+import pytest
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
+
+
+@pytest.fixture(autouse=True)
+def clear_parse_cache():
+    """Start every test with an empty parse cache so results never leak between tests."""
+    from services import parse_cache, text_cache
+    parse_cache.clear()
+    text_cache.clear()
+    yield
+    parse_cache.clear()
+    text_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Refill every tenant's upload budget so tests never trip the rate limit by accident."""
+    from app import rate_limiter
+    rate_limiter.reset()
+    yield
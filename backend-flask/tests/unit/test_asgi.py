@@ -0,0 +1,137 @@
+import io
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock
+from starlette.testclient import TestClient
+
+from asgi import RequestLimitMiddleware, app
+from exceptions import OpenAIFailureError
+from ratelimit import MemoryBucketStore
+from services import ResumeData
+
+PDF = ("resume.pdf", b"%PDF-1.4 dummy content", "application/pdf")
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def upload(content=PDF):
+    name, data, mimetype = content
+    return {"file": (name, io.BytesIO(data), mimetype)}
+
+
+def test_parse_resume_success(client, monkeypatch):
+    """The parsed resume is returned as JSON."""
+    parser = AsyncMock(return_value=ResumeData.model_validate(
+        {"personal": {"name": "John Doe"}}))
+    monkeypatch.setattr("asgi.resume_parser_async", parser)
+
+    response = client.post('/parse-resume', files=upload())
+
+    assert response.status_code == 200
+    assert response.json()["personal"]["name"] == "John Doe"
+    assert parser.call_args.kwargs == {"local_only": False, "previous": None}
+
+
+def test_parse_resume_maps_errors_like_flask_app(client, monkeypatch):
+    """Errors map to the same status codes as the Flask app."""
+    monkeypatch.setattr("asgi.resume_parser_async", AsyncMock(
+        side_effect=OpenAIFailureError("AI service down")))
+
+    response = client.post('/parse-resume', files=upload())
+
+    assert response.status_code == 503
+    assert response.json() == {"error": "AI service down"}
+
+
+def test_parse_resume_rate_limited_per_tenant(client, monkeypatch):
+    """Uploads over a tenant's budget get a 429 with Retry-After."""
+    monkeypatch.setattr("asgi.resume_parser_async", AsyncMock(
+        return_value=ResumeData.model_validate({})))
+    monkeypatch.setattr("asgi.rate_limiter.store", MemoryBucketStore())
+    monkeypatch.setattr("asgi.rate_limiter.burst", 1)
+    monkeypatch.setattr("asgi.RATE_LIMIT_API_KEYS", frozenset({"a", "b"}))
+
+    assert client.post('/parse-resume', files=upload(), headers={"X-API-Key": "a"}).status_code == 200
+    response = client.post('/parse-resume', files=upload(), headers={"X-API-Key": "a"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.post('/parse-resume', files=upload(), headers={"X-API-Key": "b"}).status_code == 200
+
+
+def test_parse_resume_without_file(client):
+    response = client.post('/parse-resume')
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "No file in the request"}
+
+
+def test_parse_resume_rejects_mismatched_content(client, monkeypatch):
+    parser = AsyncMock()
+    monkeypatch.setattr("asgi.resume_parser_async", parser)
+
+    response = client.post('/parse-resume', files=upload(("resume.pdf", b"MZ junk", "application/pdf")))
+
+    assert response.status_code == 400
+    parser.assert_not_called()
+
+
+def test_parse_resume_rejects_oversized_body(monkeypatch):
+    """Bodies over the limit are rejected from the Content-Length header."""
+    parser = AsyncMock()
+    monkeypatch.setattr("asgi.resume_parser_async", parser)
+    client = TestClient(RequestLimitMiddleware(app, max_content_length=1024))
+
+    response = client.post('/parse-resume', files=upload(
+        ("resume.pdf", b"%PDF-" + b"x" * 4096, "application/pdf")))
+
+    assert response.status_code == 413
+    assert "maximum size" in response.json()["error"]
+    parser.assert_not_called()
+
+
+def test_async_parse_returns_job(client, monkeypatch):
+    """async=1 queues the shared background job and returns its status URL."""
+    mock_data = Mock(spec=ResumeData)
+    mock_data.model_dump.return_value = {"personal": {"name": "John Doe"}}
+    parser = Mock(return_value=mock_data)
+    monkeypatch.setattr("app.resume_parser", parser)
+
+    response = client.post('/parse-resume?async=1', files=upload())
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status_url"] == f"/jobs/{job['job_id']}"
+
+    status = client.get(f"{job['status_url']}?stream=1")
+    assert '"status": "done"' in status.text
+    # The job's spooled copy of the upload is released once it has finished.
+    assert parser.call_args.args[0].stream.closed
+
+
+
+def test_stream_parse_ndjson(client, monkeypatch):
+    """stream=1 streams the async parser's events as NDJSON, ending in an error event on failure."""
+    async def events():
+        yield {"event": "field", "field": "personal", "source": "local", "data": {"name": "John Doe"}}
+        raise OpenAIFailureError("AI service down")
+
+    monkeypatch.setattr("asgi.resume_parser_stream_async", AsyncMock(return_value=events()))
+
+    response = client.post('/parse-resume?stream=1', files=upload())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"event": "field", "field": "personal", "source": "local", "data": {"name": "John Doe"}},
+        {"event": "error", "status": 503, "error": "AI service down"},
+    ]
+
+def test_cors_preflight(client):
+    response = client.options('/parse-resume', headers={
+        "Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST"})
+
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
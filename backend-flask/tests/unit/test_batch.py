@@ -0,0 +1,68 @@
+import io
+import zipfile
+from werkzeug.datastructures import FileStorage
+
+from batch import iter_batch_items, parse_batch
+from exceptions import FileTooLargeError, InvalidFileTypeError
+
+
+def make_zip(members):
+    """Build an in-memory ZIP upload from a {name: bytes} mapping."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return FileStorage(buffer, filename="cohort.zip", content_type="application/zip")
+
+
+def test_iter_batch_items_expands_zip():
+    """Resumes inside a ZIP become individual items with mimetypes from their extensions."""
+    upload = make_zip({"a.pdf": b"%PDF", "b.docx": b"PK",
+                      "notes.txt": b"skip", "__MACOSX/a.pdf": b"skip"})
+
+    items = list(iter_batch_items([upload]))
+
+    assert [name for name, _ in items] == ["a.pdf", "b.docx"]
+    assert items[0][1].mimetype == "application/pdf"
+    assert items[0][1].read() == b"%PDF"
+
+
+def test_iter_batch_items_reports_bad_zip():
+    """A corrupt archive is reported as an InvalidFileTypeError item."""
+    upload = FileStorage(io.BytesIO(b"not a zip"), filename="cohort.zip")
+
+    [(name, error)] = list(iter_batch_items([upload]))
+
+    assert name == "cohort.zip"
+    assert isinstance(error, InvalidFileTypeError)
+
+
+def test_iter_batch_items_enforces_max_files(monkeypatch):
+    """Items beyond BATCH_MAX_FILES end the batch with a FileTooLargeError."""
+    monkeypatch.setattr("batch.BATCH_MAX_FILES", 1)
+    upload = make_zip({"a.pdf": b"%PDF", "b.pdf": b"%PDF"})
+
+    items = list(iter_batch_items([upload]))
+
+    assert len(items) == 2
+    assert isinstance(items[1][1], FileTooLargeError)
+
+
+def test_parse_batch_reports_each_file():
+    """Successes and per-file errors are both yielded without failing the batch."""
+    def parse(file):
+        return ({"error": "bad"}, 400) if file.filename == "bad.pdf" else ({"ok": True}, 200)
+
+    items = [("good.pdf", FileStorage(filename="good.pdf")),
+             ("bad.pdf", FileStorage(filename="bad.pdf")),
+             ("big.pdf", FileTooLargeError("too big"))]
+
+    results = list(parse_batch(items, parse, lambda e: (
+        {"error": str(e)}, 413), concurrency=2))
+
+    by_name = {result["filename"]: result for result in results}
+    assert by_name["good.pdf"] == {"filename": "good.pdf",
+                                   "status": 200, "data": {"ok": True}}
+    assert by_name["bad.pdf"]["error"] == "bad"
+    assert by_name["big.pdf"]["status"] == 413
@@ -0,0 +1,125 @@
+import pytest
+from unittest.mock import Mock
+
+from cache import create_cache_from_env, make_key, MemoryBackend, NullBackend, SQLiteBackend, ParseCache
+from services import resume_parser, ResumeData, Personal, parse_cache
+
+
+@pytest.fixture
+def mock_openai_response():
+    """A mock Pydantic model returned by the OpenAI .parse() method."""
+    return ResumeData(personal=Personal(name="John Doe"))
+
+
+def test_make_key_ignores_whitespace_differences():
+    """Keys are computed on normalized text, so whitespace noise hashes identically."""
+    assert make_key("John  Doe\n\nEngineer", "v1") == make_key(
+        "John Doe Engineer ", "v1")
+
+
+def test_make_key_changes_with_version():
+    """A different prompt/model/schema version produces a different key."""
+    assert make_key("John Doe", "v1") != make_key("John Doe", "v2")
+
+
+def test_memory_backend_lru_eviction():
+    """The least recently used entry is evicted once max_entries is exceeded."""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.get("a")
+    backend.set("c", "3")
+
+    assert backend.get("a") == "1"
+    assert backend.get("b") is None
+    assert backend.get("c") == "3"
+
+
+def test_memory_backend_size_eviction():
+    """Entries are evicted once the total stored size exceeds max_bytes."""
+    backend = MemoryBackend(max_bytes=10)
+    backend.set("a", "x" * 6)
+    backend.set("b", "y" * 6)
+
+    assert backend.get("a") is None
+    assert backend.get("b") == "y" * 6
+
+
+def test_memory_backend_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    backend = MemoryBackend(ttl=-1)
+    backend.set("a", "1")
+
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    """Two backends on the same file (e.g. two gunicorn workers) see each other's entries."""
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path).set("a", "1")
+
+    other = SQLiteBackend(path)
+    assert other.get("a") == "1"
+    assert len(other) == 1
+
+
+def test_sqlite_backend_evicts_beyond_max_entries(tmp_path):
+    """Rows beyond max_entries are deleted, oldest access first."""
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=1)
+    backend.set("a", "1")
+    backend.set("b", "2")
+
+    assert backend.get("a") is None
+    assert backend.get("b") == "2"
+
+
+def test_parse_cache_counts_hits_and_misses():
+    """ParseCache reports hit and miss counts."""
+    cache = ParseCache(MemoryBackend())
+    cache.get("a")
+    cache.set("a", "1")
+    cache.get("a")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_parse_cache_peek_is_not_counted():
+    """peek() reads an entry without touching the hit/miss counters."""
+    cache = ParseCache(MemoryBackend())
+    cache.set("a", "1")
+
+    assert cache.peek("a") == "1"
+    assert cache.peek("b") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 0)
+
+
+def test_create_cache_from_env_reads_prefixed_settings(monkeypatch, tmp_path):
+    """Each cache reads its own prefixed settings, falling back to PARSE_CACHE_BACKEND."""
+    monkeypatch.setenv("PARSE_CACHE_BACKEND", "none")
+    assert isinstance(create_cache_from_env("TEXT_CACHE").backend, NullBackend)
+
+    monkeypatch.setenv("TEXT_CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("TEXT_CACHE_PATH", str(tmp_path / "text.sqlite3"))
+    assert isinstance(create_cache_from_env("TEXT_CACHE").backend, SQLiteBackend)
+    assert isinstance(create_cache_from_env().backend, NullBackend)
+
+
+def test_resume_parser_skips_ai_call_on_cache_hit(monkeypatch, mock_openai_response):
+    """A second parse of the same text is served from the cache without calling OpenAI."""
+    monkeypatch.setattr("services._extract_text",
+                        Mock(return_value="Full resume text"))
+    mock_parse = Mock(return_value=Mock(
+        choices=[Mock(message=Mock(parsed=mock_openai_response))]))
+    monkeypatch.setattr(
+        "services.gateway.parse_sync", mock_parse)
+
+    first = resume_parser(Mock())
+    second = resume_parser(Mock())
+
+    assert first == second == mock_openai_response
+    mock_parse.assert_called_once()
+    assert parse_cache.stats()["hits"] == 1
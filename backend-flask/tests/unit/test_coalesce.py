@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from coalesce import SingleFlight, SQLiteLeases
+from exceptions import OpenAIFailureError, ServiceOverloadedError
+
+
+def slow_call(calls: list, result: str = "parsed", delay: float = 0.2, error: Exception = None):
+    def call():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return call
+
+
+def run_concurrently(*callables):
+    """Start each callable in its own thread, a few milliseconds apart; return results or raised errors."""
+    def capture(func):
+        try:
+            return func()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(len(callables)) as pool:
+        futures = []
+        for func in callables:
+            futures.append(pool.submit(capture, func))
+            time.sleep(0.02)
+        return [future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_call():
+    """Callers with the same key wait for the call in flight; other keys run on their own."""
+    flight = SingleFlight()
+    calls = []
+
+    results = run_concurrently(*[lambda: flight.do("a", slow_call(calls))] * 3,
+                               lambda: flight.do("b", slow_call(calls, "other")))
+
+    assert results == ["parsed", "parsed", "parsed", "other"]
+    assert len(calls) == 2
+
+
+def test_waiters_get_the_same_error():
+    """An error in the call in flight is raised to every waiter, as its own copy."""
+    flight = SingleFlight()
+    calls = []
+    call = slow_call(calls, error=ServiceOverloadedError("Busy.", retry_after=3))
+
+    errors = run_concurrently(*[lambda: flight.do("a", call)] * 3)
+
+    assert len(calls) == 1
+    assert all(isinstance(e, ServiceOverloadedError) and e.retry_after == 3 for e in errors)
+    assert len({id(e) for e in errors}) == 3
+
+
+def test_finished_calls_are_not_reused():
+    """Coalescing only joins calls in flight; a later call runs again."""
+    flight = SingleFlight()
+    calls = []
+
+    flight.do("a", slow_call(calls, delay=0))
+    flight.do("a", slow_call(calls, delay=0))
+
+    assert len(calls) == 2
+
+
+def test_disabled_runs_every_call():
+    """With coalescing disabled, concurrent calls with the same key each run."""
+    flight = SingleFlight(enabled=False)
+    calls = []
+
+    run_concurrently(*[lambda: flight.do("a", slow_call(calls))] * 2)
+
+    assert len(calls) == 2
+
+
+def test_do_async_shares_one_call():
+    """Coroutine callers with the same key share one call without blocking the event loop."""
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return "parsed"
+
+    async def main():
+        return await asyncio.gather(*[flight.do_async("a", call) for _ in range(3)])
+
+    assert asyncio.run(main()) == ["parsed"] * 3
+    assert len(calls) == 1
+
+
+def test_interrupted_leader_hands_over_the_call():
+    """A waiter whose leader left without an outcome, e.g. a closed stream, makes the call itself."""
+    flight = SingleFlight()
+    calls = []
+
+    def abandon():
+        with flight.lead("a") as turn:
+            assert turn.outcome is None
+            time.sleep(0.2)
+        return "abandoned"
+
+    results = run_concurrently(abandon, lambda: flight.do("a", slow_call(calls, delay=0)))
+
+    assert results == ["abandoned", "parsed"]
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def leases_path(tmp_path):
+    return str(tmp_path / "coalesce.sqlite3")
+
+
+def test_lease_shares_outcome_across_processes(leases_path):
+    """A second process (here a second SingleFlight on the same database) waits for the lease holder's result."""
+    workers = [SingleFlight(SQLiteLeases(leases_path, poll_interval=0.01)) for _ in range(2)]
+    calls = []
+
+    results = run_concurrently(*[lambda worker=worker: worker.do("a", slow_call(calls)) for worker in workers])
+
+    assert results == ["parsed", "parsed"]
+    assert len(calls) == 1
+
+
+def test_lease_shares_mapped_errors_across_processes(leases_path):
+    """Errors from exceptions.py reach the waiting process with their type and message."""
+    workers = [SingleFlight(SQLiteLeases(leases_path, poll_interval=0.01)) for _ in range(2)]
+    calls = []
+    call = slow_call(calls, error=OpenAIFailureError("AI API is down."))
+
+    errors = run_concurrently(*[lambda worker=worker: worker.do("a", call) for worker in workers])
+
+    assert len(calls) == 1
+    assert [(type(e), str(e)) for e in errors] == [(OpenAIFailureError, "AI API is down.")] * 2
+
+
+def test_waiting_process_takes_over_a_released_or_lapsed_lease(leases_path):
+    """After an unshared error, or once a lease lapses, a waiting process runs the call itself."""
+    workers = [SingleFlight(SQLiteLeases(leases_path, poll_interval=0.01)) for _ in range(2)]
+    calls = []
+
+    results = run_concurrently(lambda: workers[0].do("a", slow_call(calls, error=KeyError("bug"))),
+                               lambda: workers[1].do("a", slow_call(calls)))
+
+    assert isinstance(results[0], KeyError) and results[1] == "parsed"
+    assert len(calls) == 2
+
+    leases = SQLiteLeases(leases_path, lease_seconds=0.1, poll_interval=0.01)
+    assert leases.acquire("b") is not None  # Holder that never finishes.
+    assert SingleFlight(leases).do("b", slow_call(calls, delay=0)) == "parsed"
@@ -0,0 +1,111 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+from docx_stream import iter_docx_lines
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def make_docx(body: str, headers: tuple = ()) -> io.BytesIO:
+    """A minimal DOCX whose document body is `body` (WordprocessingML) with optional header parts."""
+    header_rels = "".join(
+        f'<Relationship Id="rIdH{i}" Type="{REL}/header" Target="header{i}.xml"/>' for i in range(len(headers)))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("_rels/.rels",
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         f'<Relationship Id="rId1" Type="{REL}/officeDocument" Target="word/document.xml"/>'
+                         "</Relationships>")
+        archive.writestr("word/_rels/document.xml.rels",
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         f"{header_rels}</Relationships>")
+        archive.writestr("word/document.xml",
+                         f'<w:document xmlns:w="{W}" '
+                         'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+                         f"<w:body>{body}</w:body></w:document>")
+        for i, header in enumerate(headers):
+            archive.writestr(f"word/header{i}.xml", f'<w:hdr xmlns:w="{W}">{header}</w:hdr>')
+    buffer.seek(0)
+    return buffer
+
+
+def p(*runs: str) -> str:
+    return "<w:p>" + "".join(f"<w:r>{run}</w:r>" for run in runs) + "</w:p>"
+
+
+def t(text: str) -> str:
+    return f"<w:t>{text}</w:t>"
+
+
+def table(*rows: tuple) -> str:
+    return "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in row) + "</w:tr>" for row in rows) + "</w:tbl>"
+
+
+def test_paragraphs_and_run_characters():
+    """Paragraphs become lines; tabs, breaks and non-breaking hyphens read as characters."""
+    docx = make_docx(p(t("Jane Doe")) + p() + p(t("2019"), "<w:tab/>", t("Acme"), "<w:br/>", t("co"),
+                                                "<w:noBreakHyphen/>", t("op")))
+
+    assert list(iter_docx_lines(docx)) == ["Jane Doe", "", "2019\tAcme\nco-op"]
+
+
+def test_tables_in_reading_order():
+    """Table rows are emitted in place, cells joined by " | " and empty cells skipped."""
+    docx = make_docx(p(t("Skills")) + table(
+        (p(t("Python")), p(t("5 years"))),
+        (p(t("SQL")) + p(t("PostgreSQL")), p()),
+    ) + p(t("Experience")))
+
+    assert list(iter_docx_lines(docx)) == ["Skills", "Python | 5 years", "SQL PostgreSQL", "Experience"]
+
+
+def test_nested_table_stays_in_its_cell():
+    """A table inside a cell contributes its rows to that cell."""
+    inner = table((p(t("2018")), p(t("2020"))))
+    docx = make_docx(table((p(t("Acme")), inner)))
+
+    assert list(iter_docx_lines(docx)) == ["Acme | 2018 | 2020"]
+
+
+def test_text_box_read_once():
+    """Text boxes are read from the preferred rendering only, not again from the fallback."""
+    box = (
+        "<mc:AlternateContent><mc:Choice Requires=\"wps\"><w:drawing><w:txbxContent>"
+        + p(t("Contact: jane@example.com")) +
+        "</w:txbxContent></w:drawing></mc:Choice><mc:Fallback><w:pict><w:txbxContent>"
+        + p(t("Contact: jane@example.com")) +
+        "</w:txbxContent></w:pict></mc:Fallback></mc:AlternateContent>"
+    )
+    docx = make_docx(p(box, t("Jane Doe")))
+
+    assert list(iter_docx_lines(docx)) == ["Contact: jane@example.com", "Jane Doe"]
+
+
+def test_headers_first_and_deduplicated():
+    """Header lines come before the body, and identical headers are emitted once."""
+    header = p(t("jane@example.com")) + p()
+    docx = make_docx(p(t("Summary")), headers=(header, header))
+
+    assert list(iter_docx_lines(docx)) == ["jane@example.com", "Summary"]
+
+
+def test_not_a_docx():
+    """Non-zip input raises BadZipFile."""
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_docx_lines(io.BytesIO(b"not a docx")))
+
+
+def test_matches_python_docx_paragraphs_on_fixture():
+    """On a resume without tables or headers the output matches python-docx's paragraphs."""
+    path = Path(__file__).parent.parent / "fixtures" / "resumes" / "resume.docx"
+
+    with open(path, "rb") as f:
+        assert list(iter_docx_lines(f)) == [paragraph.text for paragraph in Document(str(path)).paragraphs]
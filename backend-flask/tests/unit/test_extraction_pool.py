@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+import pytest
+from pathlib import Path
+from werkzeug.datastructures import FileStorage
+
+import services
+from extraction_pool import ExtractionPool
+from exceptions import ExtractionTimeoutError, FileTooLargeError, ParsingError
+
+
+def get_fixture_resume_path(filename):
+    """Helper using pathlib to locate fixture resumes."""
+    return str(Path(__file__).parent.parent / "fixtures" / "resumes" / filename)
+
+
+@pytest.fixture
+def pool():
+    """A single-worker extraction pool, shut down after the test."""
+    pool = ExtractionPool(workers=1, timeout=30)
+    yield pool
+    pool.shutdown()
+
+
+def test_extract_text_routes_through_pool(monkeypatch, pool):
+    """_extract_text returns the same text whether it runs inline or in the pool."""
+    with open(get_fixture_resume_path("resume.pdf"), "rb") as f:
+        file = FileStorage(stream=f, filename="resume.pdf",
+                           content_type="application/pdf")
+        inline_text = services._extract_text(file)
+
+        monkeypatch.setattr("services.extraction_pool", pool)
+        pooled_text = services._extract_text(file)
+
+    assert pooled_text == inline_text
+    assert "John Doe" in pooled_text
+
+
+def test_pool_times_out_and_recovers(pool):
+    """A task over the timeout raises ExtractionTimeoutError and the pool keeps working."""
+    pool.timeout = 0.5
+    with pytest.raises(ExtractionTimeoutError):
+        pool.run(time.sleep, 10)
+
+    pool.timeout = 30
+    assert pool.run(abs, -1) == 1
+
+
+def test_timeout_only_replaces_the_stuck_worker():
+    """A timed-out task does not break a task running on another worker."""
+    pool = ExtractionPool(workers=2, timeout=0.5)
+    pool.warm()
+    try:
+        results = {}
+        slow = threading.Thread(target=lambda: results.update(slow=pool.run(time.sleep, 0.3)))
+        slow.start()
+        with pytest.raises(ExtractionTimeoutError):
+            pool.run(time.sleep, 10)
+        slow.join()
+
+        assert results == {"slow": None}
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_starts_when_the_task_runs(pool):
+    """Time spent waiting for a busy worker does not count against a task."""
+    pool.timeout = 0.5
+    first = threading.Thread(target=pool.run, args=(time.sleep, 0.3))
+    first.start()
+    assert pool.run(time.sleep, 0.3) is None
+    first.join()
+
+
+def test_crashed_worker_raises_parsing_error(pool):
+    """A worker that dies mid-task surfaces as a ParsingError and is replaced."""
+    with pytest.raises(ParsingError, match="Text extraction failed"):
+        pool.run(os._exit, 1)
+
+    assert pool.run(abs, -1) == 1
+
+
+def test_run_all_returns_results_in_order():
+    """run_all runs tasks across workers and keeps their order."""
+    pool = ExtractionPool(workers=2, timeout=30)
+    try:
+        assert pool.run_all(abs, [(-1,), (2,), (-3,)]) == [1, 2, 3]
+    finally:
+        pool.shutdown()
+
+
+def test_max_pages_guard(monkeypatch):
+    """PDFs over the page limit are rejected with FileTooLargeError."""
+    monkeypatch.setattr("services.EXTRACTION_MAX_PAGES", 1)
+
+    with open(get_fixture_resume_path("resume.pdf"), "rb") as f:
+        with pytest.raises(FileTooLargeError):
+            services._extract_text_from_pdf(f)
@@ -1,9 +1,12 @@
+import gzip
 import io
+import json
 import pytest
 from unittest.mock import Mock
 from app import app
 
-from exceptions import InvalidFileTypeError, OpenAIFailureError
+from exceptions import InvalidFileTypeError, OpenAIFailureError, ServiceOverloadedError
+from ratelimit import MemoryBucketStore
 from services import ResumeData
 
 
@@ -23,6 +26,7 @@ def mock_resume_data():
         "personal": {"name": "John Doe"},
         "professional_summary": "Experienced developer."
     }
+    mock_data.model_dump_json.return_value = json.dumps(mock_data.model_dump.return_value)
     return mock_data
 
 
@@ -57,7 +61,7 @@ def test_resume_parser_ai_error(client, monkeypatch):
         Mock(side_effect=OpenAIFailureError("AI API is down."))
     )
 
-    data = {"file": (io.BytesIO(b"dummy content"),
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
                      "resume.pdf", "application/pdf")}
     response = client.post('/parse-resume', data=data)
 
@@ -73,7 +77,7 @@ def test_resume_parser_unexpected_error(client, monkeypatch):
         Mock(side_effect=Exception("Something totally unexpected broke."))
     )
 
-    data = {"file": (io.BytesIO(b"dummy content"),
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
                      "resume.pdf", "application/pdf")}
     response = client.post('/parse-resume', data=data)
 
@@ -90,7 +94,7 @@ def test_resume_parser_success(client, monkeypatch, mock_resume_data):
     monkeypatch.setattr("app.resume_parser", Mock(
         return_value=mock_resume_data))
 
-    data = {"file": (io.BytesIO(b"dummy content"),
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
                      "resume.pdf", "application/pdf")}
     response = client.post('/parse-resume', data=data)
 
@@ -99,3 +103,366 @@ def test_resume_parser_success(client, monkeypatch, mock_resume_data):
 
     # Assert that the JSON data matches what our mock's .model_dump() returned
     assert json_data == mock_resume_data.model_dump.return_value
+
+
+def test_async_parse_returns_job_and_result(client, monkeypatch, mock_resume_data):
+    """Test that async=1 returns a job id at once and the result is available by polling."""
+    monkeypatch.setattr("app.resume_parser", Mock(
+        return_value=mock_resume_data))
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?async=1', data=data)
+
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    stream = client.get(f'/jobs/{job_id}?stream=1')
+    assert stream.mimetype == 'text/event-stream'
+    assert '"status": "done"' in stream.get_data(as_text=True)
+
+    poll = client.get(f'/jobs/{job_id}')
+    assert poll.status_code == 200
+    assert poll.get_json()["result"] == mock_resume_data.model_dump.return_value
+
+
+def test_async_parse_honours_local_mode_and_returns_hash(client, monkeypatch, mock_resume_data):
+    """Test that async jobs pass mode=local to the parser and report the content hash."""
+    mock_parser = Mock(return_value=mock_resume_data)
+    monkeypatch.setattr("app.resume_parser", mock_parser)
+    monkeypatch.setattr("app.content_hash", lambda: "abc123")
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?async=1&mode=local&previous=old', data=data)
+    job_id = response.get_json()["job_id"]
+    client.get(f'/jobs/{job_id}?stream=1').get_data()
+
+    poll = client.get(f'/jobs/{job_id}').get_json()
+    assert poll["resume_hash"] == "abc123"
+    assert mock_parser.call_args.kwargs == {"local_only": True, "previous": "old"}
+
+
+def test_async_parse_releases_spooled_upload(client, monkeypatch, mock_resume_data):
+    """Test that the job's spooled copy of the upload is closed once the job has finished."""
+    uploads = []
+    monkeypatch.setattr("app.resume_parser", lambda file, **kwargs: uploads.append(file) or mock_resume_data)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?async=1', data=data)
+    job_id = response.get_json()["job_id"]
+
+    stream = client.get(f'/jobs/{job_id}?stream=1')
+    assert '"status": "done"' in stream.get_data(as_text=True)
+    assert uploads[0].stream.closed
+
+
+def test_async_parse_queue_full(client, monkeypatch):
+    """Test that the API returns a 429 with Retry-After when the job queue is full."""
+    monkeypatch.setattr("app.job_queue.max_pending", 0)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?async=1', data=data)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_parse_returns_content_hash_and_accepts_previous(client, monkeypatch, mock_resume_data):
+    """Test that the content hash is returned in X-Resume-Hash and `previous` reaches the parser."""
+    mock_parser = Mock(return_value=mock_resume_data)
+    monkeypatch.setattr("app.resume_parser", mock_parser)
+    monkeypatch.setattr("app.content_hash", lambda: "abc123")
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?previous=old456', data=data)
+
+    assert response.status_code == 200
+    assert response.headers["X-Resume-Hash"] == "abc123"
+    assert mock_parser.call_args.kwargs["previous"] == "old456"
+
+
+def test_compact_compressed_response(client, monkeypatch):
+    """Test that compact=1 drops empty fields and the body is gzipped for clients that accept it."""
+    resume = ResumeData.model_validate({
+        "personal": {"name": "John Doe"},
+        "experience": [{"company": f"Company {i}", "description": "x" * 100} for i in range(20)],
+        "certifications": [],
+    })
+    monkeypatch.setattr("app.resume_parser", Mock(return_value=resume))
+    monkeypatch.setattr("responses.brotli", None)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?compact=1', data=data, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    body = json.loads(gzip.decompress(response.data))
+    assert "certifications" not in body
+    assert body["experience"][0] == {"company": "Company 0", "description": "x" * 100}
+
+
+def test_rate_limited_upload_returns_429(client, monkeypatch, mock_resume_data):
+    """Test that a tenant over its upload budget gets a 429 before the file is parsed."""
+    mock_parser = Mock(return_value=mock_resume_data)
+    monkeypatch.setattr("app.resume_parser", mock_parser)
+    monkeypatch.setattr("app.rate_limiter.store", MemoryBucketStore())
+    monkeypatch.setattr("app.rate_limiter.burst", 1)
+    monkeypatch.setattr("app.RATE_LIMIT_API_KEYS", frozenset({"tenant-a", "tenant-b"}))
+
+    def upload(api_key):
+        data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+        return client.post('/parse-resume', data=data, headers={"X-API-Key": api_key})
+
+    assert upload("tenant-a").status_code == 200
+    response = upload("tenant-a")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert mock_parser.call_count == 1
+
+    # Other tenants keep their own budget.
+    assert upload("tenant-b").status_code == 200
+
+
+def test_unknown_api_keys_share_the_caller_bucket(client, monkeypatch, mock_resume_data):
+    """Keys that were never issued are ignored, so a new key per request gets no new budget."""
+    monkeypatch.setattr("app.resume_parser", Mock(return_value=mock_resume_data))
+    monkeypatch.setattr("app.rate_limiter.store", MemoryBucketStore())
+    monkeypatch.setattr("app.rate_limiter.burst", 1)
+
+    def upload(api_key):
+        data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+        return client.post('/parse-resume', data=data, headers={"X-API-Key": api_key})
+
+    assert upload("made-up-1").status_code == 200
+    assert upload("made-up-2").status_code == 429
+
+
+def test_batch_files_are_charged_against_the_rate_limit(client, monkeypatch, mock_resume_data):
+    """Each file of a batch spends one upload; files over the limit fail with 429 without being parsed."""
+    mock_parser = Mock(return_value=mock_resume_data)
+    monkeypatch.setattr("app.resume_parser", mock_parser)
+    monkeypatch.setattr("app.rate_limiter.store", MemoryBucketStore())
+    monkeypatch.setattr("app.rate_limiter.burst", 2)
+
+    data = {"files": [(io.BytesIO(b"%PDF-1.4 dummy content"), f"resume{i}.pdf", "application/pdf")
+                      for i in range(3)]}
+    response = client.post('/parse-resumes', data=data)
+    statuses = sorted(json.loads(line)["status"] for line in response.get_data(as_text=True).splitlines())
+
+    assert statuses == [200, 200, 429]
+    assert mock_parser.call_count == 2
+
+
+def test_shed_llm_call_returns_429(client, monkeypatch):
+    """Test that load shed by the LLM concurrency governor maps to a 429 with Retry-After."""
+    monkeypatch.setattr("app.resume_parser", Mock(
+        side_effect=ServiceOverloadedError("The AI service is busy.", retry_after=3)))
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume', data=data)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert response.get_json()["error"] == "The AI service is busy."
+
+
+def test_unknown_job_returns_404(client):
+    """Test that polling an unknown or expired job returns a 404."""
+    response = client.get('/jobs/does-not-exist')
+    assert response.status_code == 404
+
+
+def test_batch_parse_streams_ndjson(client, monkeypatch, mock_resume_data):
+    """Test that /parse-resumes streams one NDJSON line per file, including per-file errors."""
+    def fake_parser(file, **kwargs):
+        if file.filename == "bad.pdf":
+            raise InvalidFileTypeError("Invalid or corrupt PDF file.")
+        return mock_resume_data
+
+    monkeypatch.setattr("app.resume_parser", fake_parser)
+
+    data = {"files": [(io.BytesIO(b"%PDF-1.4 dummy content"), "good.pdf", "application/pdf"),
+                      (io.BytesIO(b"%PDF-1.4 dummy content"), "bad.pdf", "application/pdf")]}
+    response = client.post('/parse-resumes', data=data)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line)
+             for line in response.get_data(as_text=True).splitlines()]
+    by_name = {line["filename"]: line for line in lines}
+    assert by_name["good.pdf"]["data"] == mock_resume_data.model_dump.return_value
+    assert by_name["bad.pdf"] == {"filename": "bad.pdf", "status": 400,
+                                  "error": "Invalid or corrupt PDF file."}
+
+
+def test_batch_parse_without_files(client):
+    """Test that /parse-resumes without files returns a 400 error."""
+    response = client.post('/parse-resumes')
+    assert response.status_code == 400
+
+
+def test_local_only_mode(client, monkeypatch, mock_resume_data):
+    """Test that mode=local asks the parser for local-only extraction."""
+    mock_parser = Mock(return_value=mock_resume_data)
+    monkeypatch.setattr("app.resume_parser", mock_parser)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?mode=local', data=data)
+
+    assert response.status_code == 200
+    assert mock_parser.call_args.kwargs == {"local_only": True, "previous": None}
+
+
+def test_metrics_endpoint(client, monkeypatch, mock_resume_data):
+    """/metrics reports request counts, stage latencies and error classes."""
+    monkeypatch.setattr("app.resume_parser", Mock(
+        return_value=mock_resume_data))
+    client.post('/parse-resume', data={"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                                                "resume.pdf", "application/pdf")})
+    monkeypatch.setattr("app.resume_parser", Mock(
+        side_effect=OpenAIFailureError("AI down")))
+    client.post('/parse-resume', data={"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                                                "resume.pdf", "application/pdf")})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{endpoint="/parse-resume",status="200"}' in body
+    assert 'resume_parse_stage_seconds_count{stage="upload"}' in body
+    assert 'resume_parse_stage_seconds_count{stage="serialization"}' in body
+    assert 'resume_parse_errors_total{exception="OpenAIFailureError"}' in body
+    assert 'http_requests_in_flight{endpoint="/parse-resume"} 0' in body
+    assert 'resume_parse_cache_lookups_total{result="hit"}' in body
+
+
+def test_server_timing_header(client, monkeypatch, mock_resume_data):
+    """With SERVER_TIMING enabled, responses carry the per-stage breakdown."""
+    monkeypatch.setattr("app.SERVER_TIMING", True)
+    monkeypatch.setattr("app.resume_parser", Mock(
+        return_value=mock_resume_data))
+
+    response = client.post('/parse-resume', data={"file": (io.BytesIO(b"%PDF-1.4 dummy content"),
+                                                           "resume.pdf", "application/pdf")})
+
+    assert "upload;dur=" in response.headers['Server-Timing']
+    assert "serialization;dur=" in response.headers['Server-Timing']
+
+
+def test_upload_over_max_content_length(client, monkeypatch):
+    """Bodies over MAX_CONTENT_LENGTH are rejected with 413 before parsing."""
+    parser = Mock()
+    monkeypatch.setattr("app.resume_parser", parser)
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1024)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4" + b"x" * 4096),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume', data=data)
+
+    assert response.status_code == 413
+    assert "maximum size" in response.get_json()["error"]
+    parser.assert_not_called()
+
+
+def test_upload_with_mismatched_content_is_rejected(client, monkeypatch):
+    """A file whose bytes do not match its declared type is rejected while uploading."""
+    parser = Mock()
+    monkeypatch.setattr("app.resume_parser", parser)
+
+    data = {"file": (io.BytesIO(b"MZ\x90\x00 an executable"),
+                     "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume', data=data)
+
+    assert response.status_code == 400
+    assert "does not match" in response.get_json()["error"]
+    parser.assert_not_called()
+
+
+def test_stream_parse_ndjson_ends_with_error_event(client, monkeypatch):
+    """With ?stream=1 each parse event is an NDJSON line, and a failure mid-stream becomes an error event."""
+    def fake_stream(file, previous=None):
+        yield {"event": "field", "field": "personal", "source": "local", "data": {"name": "John Doe"}}
+        raise OpenAIFailureError("AI API is down.")
+
+    monkeypatch.setattr("app.resume_parser_stream", fake_stream)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume?stream=1', data=data)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [
+        {"event": "field", "field": "personal", "source": "local", "data": {"name": "John Doe"}},
+        {"event": "error", "status": 503, "error": "AI API is down."},
+    ]
+
+
+def test_stream_parse_server_sent_events(client, monkeypatch):
+    """An Accept: text/event-stream request gets the events as server-sent events."""
+    def fake_stream(file, previous=None):
+        yield {"event": "item", "field": "experience", "index": 0, "data": {"company": "Acme"}}
+        yield {"event": "result", "data": {"personal": {"name": "John Doe"}}}
+
+    monkeypatch.setattr("app.resume_parser_stream", fake_stream)
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    response = client.post('/parse-resume', data=data, headers={'Accept': 'text/event-stream'})
+
+    assert response.mimetype == 'text/event-stream'
+    events = response.get_data(as_text=True).split("\n\n")
+    name, payload = events[0].splitlines()
+    assert name == "event: item"
+    assert json.loads(payload[len("data: "):]) == {"event": "item", "field": "experience", "index": 0,
+                                                   "data": {"company": "Acme"}}
+    assert events[1].startswith("event: result\n")
+
+
+def test_profile_admin_endpoints(client, monkeypatch, mock_resume_data):
+    """With the profiler on, parse requests are profiled and served, behind the admin token, as collapsed stacks."""
+    from profiler import Profiler
+
+    monkeypatch.setattr("app.profiler", Profiler(sample_rate=1, interval=0.001))
+    monkeypatch.setattr("app.PROFILE_ADMIN_TOKEN", "secret")
+    monkeypatch.setattr("app.resume_parser", Mock(return_value=mock_resume_data))
+    auth = {"Authorization": "Bearer secret"}
+
+    data = {"file": (io.BytesIO(b"%PDF-1.4 dummy content"), "resume.pdf", "application/pdf")}
+    client.post('/parse-resume', data=data)
+
+    assert client.get('/admin/profiles').status_code == 401
+    [profile] = client.get('/admin/profiles', headers=auth).get_json()
+    assert profile["reason"] == "sampled"
+    assert profile["status"] == 200
+    assert profile["file_bytes"] > 0
+    assert set(profile["stages"]) >= {"upload", "serialization"}
+    assert profile["usage"]["calls"] == 0
+
+    response = client.get(f'/admin/profiles/{profile["id"]}', headers=auth)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert "attachment" in response.headers['Content-Disposition']
+    assert client.get('/admin/profiles/unknown', headers=auth).status_code == 404
+
+
+def test_profile_admin_endpoints_disabled_by_default(client):
+    """Without PROFILER=1 the admin endpoints report 404."""
+    assert client.get('/admin/profiles').status_code == 404
+
+
+def test_profile_admin_endpoints_closed_without_token(client, monkeypatch):
+    """With the profiler on but no PROFILE_ADMIN_TOKEN, nobody can read profiles."""
+    from profiler import Profiler
+
+    monkeypatch.setattr("app.profiler", Profiler(sample_rate=1))
+    monkeypatch.setattr("app.PROFILE_ADMIN_TOKEN", None)
+
+    assert client.get('/admin/profiles').status_code == 404
+    assert client.get('/admin/profiles/any', headers={"Authorization": "Bearer "}).status_code == 404
@@ -0,0 +1,54 @@
+import threading
+import pytest
+
+from jobs import JobQueue, DONE, FAILED
+from exceptions import ServiceOverloadedError
+
+
+def wait_until_finished(queue, job):
+    """Block until the job reaches a terminal state."""
+    while not job.finished:
+        queue.wait(job, job.version, timeout=5)
+
+
+def test_job_runs_and_stores_result():
+    """A successful job is marked done and keeps its payload."""
+    queue = JobQueue(max_workers=1)
+    job = queue.submit(lambda: ({"name": "John Doe"}, 200))
+    wait_until_finished(queue, job)
+
+    assert job.status == DONE
+    assert job.to_dict()["result"] == {"name": "John Doe"}
+
+
+def test_job_failure_keeps_error_and_status():
+    """A job returning an error status is marked failed with the mapped error."""
+    queue = JobQueue(max_workers=1)
+    job = queue.submit(lambda: ({"error": "Bad file"}, 400))
+    wait_until_finished(queue, job)
+
+    assert job.status == FAILED
+    assert job.to_dict() == {"job_id": job.id, "status": FAILED,
+                             "error": "Bad file", "status_code": 400}
+
+
+def test_submit_rejects_when_queue_full():
+    """Submissions beyond max_pending raise ServiceOverloadedError."""
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_pending=1)
+    job = queue.submit(lambda: (release.wait(5), ({}, 200))[1])
+
+    with pytest.raises(ServiceOverloadedError):
+        queue.submit(lambda: ({}, 200))
+
+    release.set()
+    wait_until_finished(queue, job)
+
+
+def test_finished_jobs_expire():
+    """Finished jobs are dropped once their result TTL has passed."""
+    queue = JobQueue(max_workers=1, result_ttl=-1)
+    job = queue.submit(lambda: ({}, 200))
+    wait_until_finished(queue, job)
+
+    assert queue.get(job.id) is None
@@ -0,0 +1,272 @@
+import json
+import threading
+import time
+import pytest
+import openai
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_gateway import CircuitBreaker, LLMGateway, response_format_param
+from exceptions import CircuitOpenError, InvalidAIResponseError, OpenAIFailureError, ServiceOverloadedError
+from ratelimit import ConcurrencyGovernor
+from services import ResumeData
+
+
+def completion_body(content: dict) -> bytes:
+    """A minimal chat.completion payload whose message content is `content` as JSON."""
+    return json.dumps({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "logprobs": None,
+            "message": {"role": "assistant", "content": json.dumps(content), "refusal": None},
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }).encode()
+
+
+def stream_body(content: dict, finish_reason: str = "stop", size: int = 8) -> bytes:
+    """A server-sent event stream of chat.completion.chunk payloads spelling out `content` as JSON."""
+    message = json.dumps(content)
+
+    def chunk(choices: list, usage: dict = None) -> str:
+        return "data: " + json.dumps({"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                                      "model": "gpt-4o-mini", "choices": choices, "usage": usage}) + "\n\n"
+
+    events = [chunk([{"index": 0, "delta": {"content": message[start:start + size]}, "finish_reason": None}])
+              for start in range(0, len(message), size)]
+    events.append(chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}]))
+    events.append(chunk([], {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}))
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+OK = (0, 200, {}, completion_body({"personal": {"name": "John Doe"}}))
+SSE = {"Content-Type": "text/event-stream"}
+
+
+class StubOpenAI:
+    """
+    A local HTTP server standing in for the OpenAI API.
+
+    Each request pops the next `(delay, status, headers, body)` from `responses`;
+    the last entry is reused once the list runs out.
+    """
+
+    def __init__(self):
+        self.responses = [OK]
+        self.requests = 0
+        self.bodies = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub.bodies.append(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                delay, status, headers, body = stub.responses.pop(
+                    0) if len(stub.responses) > 1 else stub.responses[0]
+                time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in {"Content-Type": "application/json", **headers}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stub():
+    stub = StubOpenAI()
+    yield stub
+    stub.close()
+
+
+def make_gateway(stub, **kwargs):
+    options = dict(api_key="test", base_url=stub.url,
+                   deadline=5, backoff_base=0.01)
+    options.update(kwargs)
+    return LLMGateway(**options)
+
+
+def parse(gateway):
+    response = gateway.parse_sync(model="gpt-4o-mini", messages=[{"role": "user", "content": "resume"}],
+                                  response_format=ResumeData)
+    return response.choices[0].message.parsed
+
+
+def test_parse_success(stub):
+    """A successful call returns the parsed ResumeData."""
+    result = parse(make_gateway(stub))
+
+    assert result.personal.name == "John Doe"
+    assert stub.requests == 1
+
+
+def test_parse_sends_prebuilt_strict_schema(stub):
+    """The response model's strict JSON schema is built once and sent with every call."""
+    gateway = make_gateway(stub)
+    parse(gateway)
+    parse(gateway)
+
+    sent = [json.loads(body)["response_format"] for body in stub.bodies]
+    assert sent[0] == sent[1] == response_format_param(ResumeData)
+    assert sent[0]["json_schema"]["strict"] is True
+    assert response_format_param(ResumeData) is response_format_param(ResumeData)
+
+
+def test_parse_raises_on_truncated_answer(stub):
+    """A completion cut off by the token limit is an error, as with `beta.chat.completions.parse`."""
+    body = json.loads(OK[3])
+    body["choices"][0]["finish_reason"] = "length"
+    stub.responses = [(0, 200, {}, json.dumps(body).encode())]
+
+    with pytest.raises(openai.LengthFinishReasonError):
+        parse(make_gateway(stub))
+
+
+def test_retries_rate_limit_respecting_retry_after(stub):
+    """A 429 is retried after the delay the server asked for."""
+    error = json.dumps({"error": {"message": "slow down"}}).encode()
+    stub.responses = [(0, 429, {"retry-after-ms": "200"}, error), OK]
+
+    start = time.monotonic()
+    result = parse(make_gateway(stub))
+
+    assert result.personal.name == "John Doe"
+    assert stub.requests == 2
+    assert time.monotonic() - start >= 0.2
+
+
+def test_malformed_retry_after_falls_back_to_backoff(stub):
+    """A Retry-After that is neither seconds nor an HTTP date is ignored rather than raised."""
+    error = json.dumps({"error": {"message": "slow down"}}).encode()
+    stub.responses = [(0, 429, {"retry-after": "soon"}, error), OK]
+
+    result = parse(make_gateway(stub))
+
+    assert result.personal.name == "John Doe"
+    assert stub.requests == 2
+
+
+def test_gives_up_after_max_retries(stub):
+    """Persistent 5xx errors are raised once retries are exhausted."""
+    stub.responses = [(0, 500, {}, b'{"error": {"message": "down"}}')]
+
+    with pytest.raises(openai.InternalServerError):
+        parse(make_gateway(stub, max_retries=2))
+
+    assert stub.requests == 3
+
+
+def test_deadline(stub):
+    """A call that outlives the deadline fails with OpenAIFailureError."""
+    stub.responses = [(2, 200, {}, OK[3])]
+
+    with pytest.raises(OpenAIFailureError, match="did not respond"):
+        parse(make_gateway(stub, deadline=0.3))
+
+
+def test_hedged_request_wins_over_slow_primary(stub):
+    """A slow first attempt is raced by a duplicate that returns sooner."""
+    stub.responses = [(2, 200, {}, OK[3]), OK]
+
+    start = time.monotonic()
+    result = parse(make_gateway(stub, hedge_after="0.1"))
+
+    assert result.personal.name == "John Doe"
+    assert stub.requests == 2
+    assert time.monotonic() - start < 1.5
+
+
+def test_circuit_breaker_fails_fast(stub):
+    """Once the breaker opens, calls fail without reaching the upstream."""
+    stub.responses = [(0, 500, {}, b'{"error": {"message": "down"}}')]
+    gateway = make_gateway(stub, max_retries=0,
+                           breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            parse(gateway)
+
+    with pytest.raises(CircuitOpenError):
+        parse(gateway)
+    assert stub.requests == 2
+
+
+def test_rate_limits_do_not_open_the_circuit(stub):
+    """Exhausted retries on 429s are raised without counting against the breaker."""
+    error = json.dumps({"error": {"message": "slow down"}}).encode()
+    stub.responses = [(0, 429, {"retry-after-ms": "10"}, error)]
+    gateway = make_gateway(stub, max_retries=0,
+                           breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+
+    for _ in range(2):
+        with pytest.raises(openai.RateLimitError):
+            parse(gateway)
+
+    assert gateway.breaker.state == "closed"
+    assert stub.requests == 2
+
+
+def test_circuit_breaker_half_open_trial_closes_circuit():
+    """After the reset timeout a successful trial call closes the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_governor_sheds_calls_past_its_queue(stub):
+    """With a governor, calls beyond the concurrency and queue limits fail with 429-style overload."""
+    stub.responses = [(0.3,) + OK[1:]]
+    gateway = make_gateway(stub, governor=ConcurrencyGovernor(max_concurrency=1, max_queued=0))
+
+    first = threading.Thread(target=parse, args=(gateway,))
+    first.start()
+    time.sleep(0.1)
+    with pytest.raises(ServiceOverloadedError):
+        parse(gateway)
+    first.join()
+
+    assert stub.requests == 1
+    assert gateway.governor.active == 0
+
+
+def stream(gateway):
+    return "".join(gateway.iterate(gateway.stream(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "resume"}], response_format=ResumeData)))
+
+
+def test_stream_yields_content_and_retries_before_first_chunk(stub):
+    """A streamed call yields the content deltas; a 429 before the stream starts is retried."""
+    answer = {"personal": {"name": "John Doe"}}
+    stub.responses = [(0, 429, {}, b"{}"), (0, 200, SSE, stream_body(answer))]
+
+    assert json.loads(stream(make_gateway(stub))) == answer
+    assert stub.requests == 2
+    sent = json.loads(stub.bodies[-1])
+    assert sent["stream"] is True and sent["stream_options"] == {"include_usage": True}
+    assert sent["response_format"] == response_format_param(ResumeData)
+
+
+def test_stream_raises_on_truncated_answer(stub):
+    """A stream cut off by the token limit raises once its content has been yielded."""
+    stub.responses = [(0, 200, SSE, stream_body({"personal": {"name": "John Doe"}}, finish_reason="length"))]
+
+    with pytest.raises(InvalidAIResponseError):
+        stream(make_gateway(stub))
@@ -0,0 +1,63 @@
+from local_extractor import extract_local, extract_personal, extract_skills, skills_fully_covered
+
+
+RESUME_TEXT = """Jane Smith
+jane.smith@example.co.uk | (555) 123-4567 | https://www.linkedin.com/in/jane-smith
+github.com/janesmith
+Experience
+Backend Engineer | Acme | 2019 - 2023
+Built services in Go and Python.
+Skills
+Python, Go, PostgreSQL, Docker
+Team Collaboration, Leadership"""
+
+
+def test_extract_personal_contact_fields():
+    """Email, phone, LinkedIn, GitHub and the header name are found with regexes."""
+    assert extract_personal(RESUME_TEXT) == {
+        "name": "Jane Smith",
+        "email": "jane.smith@example.co.uk",
+        "phone": "(555) 123-4567",
+        "linkedin": "https://www.linkedin.com/in/jane-smith",
+        "github": "github.com/janesmith",
+    }
+
+
+def test_extract_personal_ignores_dates():
+    """Year ranges are not mistaken for phone numbers."""
+    assert "phone" not in extract_personal("Jane Smith\nAcme | 2019 - 2023")
+
+
+def test_extract_personal_rejects_experience_durations():
+    """A date range followed by a duration is not a phone number."""
+    assert "phone" not in extract_personal("Jane Smith\nAcme\n2018 - 2020 (2 years)")
+    assert "phone" not in extract_personal("Jane Smith\nRef (1234 5678")
+
+
+def test_extract_skills_prefers_skills_section():
+    """Skills come from the skills section, and sub-terms of longer skills are dropped."""
+    assert extract_skills(RESUME_TEXT) == {
+        "technical": ["Python", "Go", "PostgreSQL", "Docker"],
+        "soft": ["Team Collaboration", "Leadership"],
+    }
+
+
+def test_extract_skills_ignores_prose():
+    """Without a skills section nothing is matched, and ambiguous terms need their own casing."""
+    prose = "In spring I would go to the c block to express views on swift changes."
+    assert extract_skills(f"Jane Smith\nExperience\n{prose}") == {}
+    assert extract_skills(f"Skills\nLeadership\n{prose}") == {"soft": ["Leadership"]}
+    assert extract_skills("Skills\nGo, Spring, C") == {"technical": ["Go", "Spring", "C"]}
+
+
+def test_skills_fully_covered():
+    """Coverage holds only when every listed item is in the dictionary."""
+    assert skills_fully_covered(RESUME_TEXT)
+    assert not skills_fully_covered(
+        "Skills\nPython, Underwater Basket Weaving")
+    assert not skills_fully_covered("No skills heading here")
+
+
+def test_extract_local_shape():
+    """extract_local returns a partial ResumeData payload."""
+    assert set(extract_local(RESUME_TEXT)) == {"personal", "skills"}
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+from metrics import (Counter, Gauge, Histogram, Registry, begin_request, end_request,
+                     record_usage, server_timing_header, stage, OPENAI_TOKENS_TOTAL, STAGE_SECONDS)
+
+
+def test_counter_and_gauge_render_with_labels():
+    """Counters and gauges render one sample per label set."""
+    registry = Registry()
+    errors = registry.register(Counter("errors_total", "Errors.", labels=("exception",)))
+    in_flight = registry.register(Gauge("in_flight", "In flight."))
+
+    errors.inc(exception="EmptyFileError")
+    errors.inc(2, exception="EmptyFileError")
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 1
+
+    output = registry.render()
+    assert "# TYPE errors_total counter" in output
+    assert 'errors_total{exception="EmptyFileError"} 3' in output
+    assert "in_flight 0" in output
+
+
+def test_histogram_buckets_are_cumulative():
+    """Each bucket counts every observation at or below its bound."""
+    histogram = Histogram("latency_seconds", "Latency.", labels=("stage",), buckets=(0.1, 1))
+    histogram.observe(0.05, stage="openai")
+    histogram.observe(0.5, stage="openai")
+    histogram.observe(5, stage="openai")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="openai",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="openai",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="openai",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="openai"} 5.55' in lines
+    assert histogram.count(stage="openai") == 3
+
+
+def test_request_stage_timings_are_summed_and_observed_at_end():
+    """Repeated stages within a request add up and are observed once."""
+    before = STAGE_SECONDS.count(stage="test-stage")
+
+    token = begin_request()
+    with stage("test-stage"):
+        pass
+    with stage("test-stage"):
+        pass
+    assert STAGE_SECONDS.count(stage="test-stage") == before
+    timings = end_request(token)
+
+    assert list(timings) == ["test-stage"]
+    assert STAGE_SECONDS.count(stage="test-stage") == before + 1
+
+
+def test_stage_outside_request_is_observed_immediately():
+    before = STAGE_SECONDS.count(stage="background")
+    with stage("background"):
+        pass
+    assert STAGE_SECONDS.count(stage="background") == before + 1
+
+
+def test_record_usage_counts_cached_tokens():
+    before = {kind: OPENAI_TOKENS_TOTAL.value(kind=kind) for kind in ("prompt", "completion", "cached")}
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=64))
+
+    record_usage(usage)
+
+    assert OPENAI_TOKENS_TOTAL.value(kind="prompt") == before["prompt"] + 100
+    assert OPENAI_TOKENS_TOTAL.value(kind="completion") == before["completion"] + 20
+    assert OPENAI_TOKENS_TOTAL.value(kind="cached") == before["cached"] + 64
+
+
+def test_server_timing_header():
+    assert server_timing_header({"extraction": 0.0123, "openai": 1.5}) == \
+        "extraction;dur=12.3, openai;dur=1500.0"
+
+
+def test_memory_accounting_measures_heap_growth():
+    """With tracing on, a request's peak heap growth is observed."""
+    import tracemalloc
+    from metrics import REQUEST_PEAK_MEMORY, begin_memory, end_memory
+
+    tracemalloc.start()
+    try:
+        before = REQUEST_PEAK_MEMORY.count(endpoint="/test")
+        mark = begin_memory()
+        block = bytearray(4 * 1024 * 1024)
+        del block
+        growth = end_memory(mark, endpoint="/test")
+    finally:
+        tracemalloc.stop()
+
+    assert growth >= 4 * 1024 * 1024
+    assert REQUEST_PEAK_MEMORY.count(endpoint="/test") == before + 1
+    assert end_memory(None) is None
+
+
+def test_memory_accounting_skips_overlapping_requests():
+    """Requests that overlap share tracemalloc's peak, so neither is observed."""
+    import tracemalloc
+    from metrics import REQUEST_MEMORY_SKIPPED, REQUEST_PEAK_MEMORY, begin_memory, end_memory
+
+    tracemalloc.start()
+    try:
+        before = REQUEST_PEAK_MEMORY.count(endpoint="/test")
+        first = begin_memory()
+        second = begin_memory()
+        assert end_memory(second, endpoint="/test") is None
+        assert end_memory(first, endpoint="/test") is None
+        # Once alone again, requests are measured.
+        assert end_memory(begin_memory(), endpoint="/test") is not None
+    finally:
+        tracemalloc.stop()
+
+    assert REQUEST_PEAK_MEMORY.count(endpoint="/test") == before + 1
+    assert REQUEST_MEMORY_SKIPPED.value(endpoint="/test") >= 2
+
+
+def test_observe_parse_usage_records_each_kind():
+    """A parse's prompt, cached and completion totals are each observed once."""
+    from metrics import PARSE_TOKENS, observe_parse_usage
+
+    before = {kind: PARSE_TOKENS.count(kind=kind) for kind in ("prompt", "cached", "completion")}
+    observe_parse_usage({"calls": 1, "prompt": 2400, "completion": 300, "cached": 2048})
+
+    assert {kind: PARSE_TOKENS.count(kind=kind) for kind in before} == {
+        kind: count + 1 for kind, count in before.items()}
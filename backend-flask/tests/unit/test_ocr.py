@@ -0,0 +1,120 @@
+import io
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from PIL import Image, ImageDraw
+
+import ocr
+from ocr import PageOCR
+from cache import MemoryBackend, ParseCache
+from services import _extract_text_from_pdf
+from exceptions import EmptyFileError
+
+
+def scanned_pdf(pages=1) -> io.BytesIO:
+    """An image-only PDF, as produced by a scanner."""
+    images = []
+    for number in range(pages):
+        image = Image.new("L", (300, 200), 255)
+        ImageDraw.Draw(image).text((20, 20), f"Page {number}", fill=0)
+        images.append(image)
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PDF", save_all=True, append_images=images[1:])
+    buffer.seek(0)
+    return buffer
+
+
+def whitespace_pdf(pages=1) -> io.BytesIO:
+    """A PDF whose text layer holds only spaces, so each page has characters but no text."""
+    stream = "BT /F1 12 Tf 20 20 Td (   ) Tj ET"
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 200] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    data, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return io.BytesIO(data)
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    """Stand in for pytesseract, which needs the Tesseract binary."""
+    image_to_string = Mock(side_effect=lambda image, lang: f"Jane Doe {image.size[0]}x{image.size[1]}\n")
+    monkeypatch.setattr(ocr, "pytesseract", SimpleNamespace(image_to_string=image_to_string))
+    return image_to_string
+
+
+@pytest.fixture
+def page_ocr(monkeypatch):
+    engine = PageOCR(enabled=True, dpi=72, max_pages=2, cache=ParseCache(MemoryBackend()))
+    monkeypatch.setattr("services.ocr", engine)
+    return engine
+
+
+def test_scanned_pdf_without_ocr_is_empty(monkeypatch):
+    monkeypatch.setattr("services.ocr", PageOCR(enabled=False))
+    with pytest.raises(EmptyFileError):
+        _extract_text_from_pdf(scanned_pdf())
+
+
+def test_pages_without_text_layer_are_ocrd(fake_tesseract, page_ocr):
+    text = _extract_text_from_pdf(scanned_pdf())
+
+    assert text.startswith("Jane Doe")
+    assert fake_tesseract.call_args.kwargs["lang"] == "eng"
+
+
+def test_ocr_output_is_cached_by_page(fake_tesseract, page_ocr):
+    first = _extract_text_from_pdf(scanned_pdf())
+    second = _extract_text_from_pdf(scanned_pdf())
+
+    assert first == second
+    assert fake_tesseract.call_count == 1
+
+
+def test_ocr_page_limit(fake_tesseract, page_ocr):
+    """Only the first `max_pages` blank pages are OCR'd."""
+    _extract_text_from_pdf(scanned_pdf(pages=4))
+
+    assert fake_tesseract.call_count == 2
+
+
+def test_whitespace_only_pages_are_ocrd(fake_tesseract, page_ocr):
+    """Pages whose text layer cleans to nothing count as blank for OCR as well."""
+    text = _extract_text_from_pdf(whitespace_pdf(pages=2))
+
+    assert text.startswith("Jane Doe")
+    assert fake_tesseract.call_count == 2
+
+
+def test_ocr_cache_is_separate_from_parse_cache():
+    """Recognized pages neither count in nor take room from the parse-result cache."""
+    import services
+    assert services.ocr.cache is not None
+    assert services.ocr.cache is not services.parse_cache
+
+
+def test_render_scale_is_capped_by_pixels():
+    engine = PageOCR(dpi=300, max_pixels=1_000_000)
+
+    assert engine.render_scale(100, 100) == pytest.approx(300 / 72)
+    scale = engine.render_scale(612, 792)  # US Letter in points
+    assert 612 * 792 * scale * scale == pytest.approx(1_000_000)
+
+
+def test_ocr_failures_leave_pages_empty(monkeypatch, page_ocr):
+    monkeypatch.setattr(ocr, "pytesseract", SimpleNamespace(
+        image_to_string=Mock(side_effect=RuntimeError("tesseract is not installed"))))
+
+    assert page_ocr.recognize([Image.new("L", (10, 10), 255)]) == [""]
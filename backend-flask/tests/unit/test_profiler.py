@@ -0,0 +1,78 @@
+import time
+
+from profiler import Profiler, annotate
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profile_request(profiler: Profiler, seconds: float, **details):
+    profile = profiler.begin()
+    annotate(pages=2)
+    busy_wait(seconds)
+    profiler.detach(profile)
+    profiler.finish(profile, **details)
+    return profile
+
+
+def test_sampled_request_is_kept_with_its_stacks():
+    """A sampled request is profiled from its start and downloadable as collapsed stacks."""
+    profiler = Profiler(sample_rate=1, slow_seconds=60, interval=0.001)
+
+    profile = profile_request(profiler, 0.1, status=200)
+
+    [summary] = profiler.profiles()
+    assert summary["id"] == profile.id and summary["reason"] == "sampled"
+    assert summary["pages"] == 2 and summary["status"] == 200
+    assert summary["samples"] > 10
+    lines = profile.collapsed().splitlines()
+    assert any("test_profiler.py:busy_wait" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+    assert profiler.get(profile.id) is profile
+
+
+def test_only_slow_requests_are_kept_and_sampled_from_the_threshold():
+    """Unsampled requests are sampled once past the threshold and kept only if slow."""
+    profiler = Profiler(sample_rate=0, slow_seconds=0.05, interval=0.001)
+
+    profile_request(profiler, 0.01)
+    slow = profile_request(profiler, 0.15)
+
+    assert [summary["id"] for summary in profiler.profiles()] == [slow.id]
+    assert slow.sampled_from >= 0.05
+    assert slow.reason == "slow"
+
+
+def test_ring_buffers_keep_the_latest_profiles():
+    """Each buffer keeps the latest `capacity` profiles; sampled ones never evict slow ones."""
+    profiler = Profiler(sample_rate=0, slow_seconds=0.02, interval=0.001, capacity=2)
+    slow = [profile_request(profiler, 0.04) for _ in range(3)]
+    profiler.sample_rate = 1
+    sampled = [profile_request(profiler, 0) for _ in range(3)]
+
+    kept = {summary["id"] for summary in profiler.profiles()}
+    assert kept == {slow[1].id, slow[2].id, sampled[1].id, sampled[2].id}
+
+
+def test_disabled_profiler_ignores_requests():
+    """A disabled profiler profiles nothing, and annotations go nowhere."""
+    profiler = Profiler(sample_rate=1, enabled=False)
+
+    assert profiler.begin() is None
+    annotate(pages=1)
+    assert profiler.profiles() == []
+
+
+def test_annotations_stop_after_detach():
+    """Details annotated after `detach` are not attached to the profile."""
+    profiler = Profiler(sample_rate=1)
+    profile = profiler.begin()
+    profiler.detach(profile)
+    annotate(pages=9)
+    profiler.finish(profile)
+
+    assert "pages" not in profile.details
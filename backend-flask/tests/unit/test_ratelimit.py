@@ -0,0 +1,144 @@
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from ratelimit import (ConcurrencyGovernor, MemoryBucketStore, RateLimiter, SQLiteBucketStore,
+                       bind_tenant, current_tenant, tenant_key)
+from exceptions import ServiceOverloadedError
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBucketStore()
+    return SQLiteBucketStore(str(tmp_path / "buckets.sqlite3"))
+
+
+def test_bucket_allows_burst_then_refuses(store):
+    """A new bucket starts full; once empty, the wait until the next token is reported."""
+    for _ in range(3):
+        assert store.take("ip:1.2.3.4", rate=1, burst=3) == 0
+    wait = store.take("ip:1.2.3.4", rate=1, burst=3)
+    assert 0 < wait <= 1
+
+    # Tenants have separate buckets.
+    assert store.take("ip:5.6.7.8", rate=1, burst=3) == 0
+
+
+def test_bucket_refills_over_time(store):
+    assert store.take("key:a", rate=20, burst=1) == 0
+    assert store.take("key:a", rate=20, burst=1) > 0
+    time.sleep(0.06)
+    assert store.take("key:a", rate=20, burst=1) == 0
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    """Two stores on the same database (e.g. two workers) spend the same budget."""
+    path = str(tmp_path / "buckets.sqlite3")
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    assert first.take("ip:1.2.3.4", rate=0.01, burst=1) == 0
+    assert second.take("ip:1.2.3.4", rate=0.01, burst=1) > 0
+
+
+def test_rate_limiter_raises_with_retry_after():
+    limiter = RateLimiter(MemoryBucketStore(), per_minute=6, burst=1)
+    limiter.check("ip:1.2.3.4")
+    with pytest.raises(ServiceOverloadedError) as excinfo:
+        limiter.check("ip:1.2.3.4")
+    assert excinfo.value.retry_after == 10
+
+    limiter.reset()
+    limiter.check("ip:1.2.3.4")
+
+
+def test_rate_limiter_disabled_without_store():
+    limiter = RateLimiter(None, per_minute=1, burst=1)
+    for _ in range(5):
+        limiter.check("ip:1.2.3.4")
+
+
+def test_tenant_key_precedence():
+    keys = frozenset({"secret"})
+    assert tenant_key({"X-API-Key": "secret"}, "1.2.3.4", api_keys=keys).startswith("key:")
+    assert tenant_key({"Authorization": "Bearer secret"}, "1.2.3.4", api_keys=keys) == \
+        tenant_key({"X-API-Key": "secret"}, "1.2.3.4", api_keys=keys)
+    assert "secret" not in tenant_key({"X-API-Key": "secret"}, "1.2.3.4", api_keys=keys)
+
+    # Keys that were never issued are ignored.
+    assert tenant_key({"X-API-Key": "made-up"}, "1.2.3.4", api_keys=keys) == "ip:1.2.3.4"
+
+    # Proxy headers are ignored unless the proxy is trusted.
+    headers = {"X-User-Id": "42", "X-Forwarded-For": "9.9.9.9, 10.0.0.1"}
+    assert tenant_key(headers, "10.0.0.1") == "ip:10.0.0.1"
+    assert tenant_key(headers, "10.0.0.1", trust_proxy=True).startswith("user:")
+    assert tenant_key({"X-Forwarded-For": "9.9.9.9, 10.0.0.1"}, "10.0.0.1", trust_proxy=True) == "ip:9.9.9.9"
+
+
+def test_bind_tenant_carries_tenant_to_other_threads():
+    token = current_tenant.set("key:abc")
+    try:
+        func = bind_tenant(current_tenant.get)
+    finally:
+        current_tenant.reset(token)
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(func).result() == "key:abc"
+
+
+def test_governor_serves_tenants_round_robin():
+    """A tenant with a backlog does not delay another tenant's single call."""
+    governor = ConcurrencyGovernor(max_concurrency=1, max_queued=10, max_queued_per_tenant=10)
+    order = []
+
+    async def call(tenant, label):
+        async with governor.slot(tenant):
+            order.append(label)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await governor.acquire("busy")  # Occupy the only slot.
+        tasks = [asyncio.create_task(call("busy", f"busy{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("quiet", "quiet")))
+        await asyncio.sleep(0)
+        governor.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order.index("quiet") == 1
+    assert governor.active == 0 and governor.queued == 0
+
+
+def test_governor_sheds_when_queue_is_full():
+    governor = ConcurrencyGovernor(max_concurrency=1, max_queued=5, max_queued_per_tenant=1)
+
+    async def main():
+        await governor.acquire("a")
+        waiter = asyncio.create_task(governor.acquire("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceOverloadedError) as excinfo:
+            await governor.acquire("a")
+        assert excinfo.value.retry_after >= 1
+        # Another tenant can still queue.
+        other = asyncio.create_task(governor.acquire("b"))
+        await asyncio.sleep(0)
+        assert governor.queued == 2
+        waiter.cancel()
+        other.cancel()
+        await asyncio.gather(waiter, other, return_exceptions=True)
+
+    asyncio.run(main())
+    assert governor.queued == 0
+
+
+def test_governor_times_out_waiting_callers():
+    governor = ConcurrencyGovernor(max_concurrency=1, queue_timeout=0.05)
+
+    async def main():
+        await governor.acquire("a")
+        with pytest.raises(ServiceOverloadedError):
+            await governor.acquire("b")
+        governor.release()
+
+    asyncio.run(main())
+    assert governor.active == 0 and governor.queued == 0
@@ -0,0 +1,92 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import services
+from metrics import record_usage, track_usage
+from recorder import ParseRecorder, field_accuracy, similarity
+from services import Education, Personal, ResumeData, Skills, resume_parser
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    recorder = ParseRecorder(str(tmp_path / "records.sqlite3"))
+    monkeypatch.setattr("services.recorder", recorder)
+    return recorder
+
+
+def test_records_are_appended_and_filtered(recorder):
+    usage = {"calls": 1, "prompt": 900, "completion": 150, "cached": 512}
+    for model in ("gpt-4o-mini", "gpt-4.1-mini"):
+        recorder.record("Jane Doe", ResumeData(professional_summary=model), usage, 0.5,
+                        model=model, prompt_version="2", schema_version="abc", parse_mode="single")
+
+    records = list(recorder.records())
+    assert [record["model"] for record in records] == ["gpt-4o-mini", "gpt-4.1-mini"]
+    assert records[0]["prompt_tokens"] == 900 and records[0]["cached_tokens"] == 512
+    assert records[0]["latency_ms"] == 500
+    assert ResumeData.model_validate_json(records[1]["response"]).professional_summary == "gpt-4.1-mini"
+    assert len(list(recorder.records(model="gpt-4.1-mini"))) == 1
+    assert len(list(recorder.records(limit=1))) == 1
+
+
+def test_disabled_or_unsampled_recorder_stores_nothing(tmp_path):
+    ParseRecorder(None).record("text", ResumeData(), {}, 0.1, model="m", prompt_version="1",
+                               schema_version="s", parse_mode="single")
+    sampled_out = ParseRecorder(str(tmp_path / "records.sqlite3"), sample_rate=0)
+    sampled_out.record("text", ResumeData(), {}, 0.1, model="m", prompt_version="1",
+                       schema_version="s", parse_mode="single")
+
+    assert list(ParseRecorder(None).records()) == []
+    assert list(sampled_out.records()) == []
+
+
+def test_resume_parser_records_llm_parses(monkeypatch, recorder):
+    monkeypatch.setattr("services._extract_text", Mock(return_value="Jane Doe\nEngineer"))
+    parsed = ResumeData(personal=Personal(name="Jane Doe"))
+
+    def parse_sync(**kwargs):
+        record_usage(SimpleNamespace(prompt_tokens=800, completion_tokens=40, prompt_tokens_details=None))
+        return Mock(choices=[Mock(message=Mock(parsed=parsed))])
+
+    monkeypatch.setattr("services.gateway.parse_sync", parse_sync)
+
+    resume_parser(Mock())
+    resume_parser(Mock())  # Served from the parse cache, so not recorded again.
+
+    [record] = recorder.records()
+    assert record["text"] == "Jane Doe\nEngineer"
+    assert record["model"] == services.MODEL and record["prompt_version"] == services.PROMPT_VERSION
+    assert (record["calls"], record["prompt_tokens"], record["completion_tokens"]) == (1, 800, 40)
+    assert ResumeData.model_validate_json(record["response"]).personal.name == "Jane Doe"
+
+
+def test_track_usage_adds_up_calls():
+    with track_usage() as usage:
+        for _ in range(2):
+            record_usage(SimpleNamespace(prompt_tokens=100, completion_tokens=10,
+                                         prompt_tokens_details=SimpleNamespace(cached_tokens=64)))
+    record_usage(SimpleNamespace(prompt_tokens=1, completion_tokens=1, prompt_tokens_details=None))
+
+    assert usage == {"calls": 2, "prompt": 200, "completion": 20, "cached": 128}
+
+
+def test_similarity():
+    assert similarity(" Jane  Doe", "jane doe") == 1.0
+    assert similarity("", None) == 1.0
+    assert similarity(["Python", "SQL"], ["sql", "Go"]) == pytest.approx(1 / 3)
+    assert similarity([{"a": 1, "b": 2}], [{"a": 1, "b": 3}, {"a": 5, "b": 6}]) == pytest.approx(0.25)
+
+
+def test_field_accuracy_breaks_down_nested_objects():
+    expected = ResumeData(personal=Personal(name="Jane Doe", email="jane@example.com"),
+                          education=[Education(degree="BSc")], skills=Skills(technical=["Python"]))
+    actual = ResumeData(personal=Personal(name="Jane Doe"), education=[Education(degree="BSc")])
+
+    scores = field_accuracy(expected, actual)
+
+    assert scores["personal.name"] == 1.0
+    assert scores["personal.email"] == 0.0
+    assert scores["education"] == 1.0
+    assert scores["skills.technical"] == 0.0 and scores["skills.soft"] == 1.0
+    assert "personal" not in scores and "skills" not in scores
@@ -0,0 +1,74 @@
+import gzip
+import json
+import pytest
+
+import responses
+from responses import choose_encoding, compress, dump_model
+from services import Experience, Personal, Project, ResumeData, Skills
+
+
+@pytest.fixture
+def resume():
+    return ResumeData(
+        personal=Personal(name="John Doe"),
+        experience=[Experience(company="ABC Corp")],
+        skills=Skills(technical=["Python"], soft=[]),
+        projects=[Project(name="Site", technologies=[])],
+        certifications=[],
+    )
+
+
+def test_dump_model_matches_model_dump(resume):
+    assert json.loads(dump_model(resume)) == resume.model_dump()
+
+
+def test_compact_drops_nulls_and_empty_lists(resume):
+    data = json.loads(dump_model(resume, compact=True))
+
+    assert data == {
+        "personal": {"name": "John Doe"},
+        "experience": [{"company": "ABC Corp"}],
+        "skills": {"technical": ["Python"]},
+        "projects": [{"name": "Site"}],
+    }
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("identity", None),
+])
+def test_choose_encoding(monkeypatch, header, expected):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_compress_skips_small_bodies(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    body = b'{"a": 1}'
+    assert compress(body, "gzip") == (body, None)
+
+    large = json.dumps({"items": list(range(1000))}).encode()
+    compressed, encoding = compress(large, "gzip")
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == large
+    assert len(compressed) < len(large)
+
+
+def test_compress_negotiates_brotli():
+    brotli = pytest.importorskip("brotli")
+    large = json.dumps({"items": list(range(1000))}).encode()
+
+    compressed, encoding = compress(large, choose_encoding("gzip, deflate, br"))
+    assert encoding == "br"
+    assert brotli.decompress(compressed) == large
+    assert len(compressed) < len(large)
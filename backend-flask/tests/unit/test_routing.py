@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import Mock
+
+import services
+from metrics import ROUTES_TOTAL
+from routing import DocumentProfile, ModelRouter, Tier, create_router_from_env, detect_language
+from services import Experience, Personal, ResumeData, resume_parser
+
+SHORT_CV = """Jane Doe
+jane.doe@example.com
+
+Experience
+Software Engineer, Acme Corp, 2022 - 2024
+Built the ingestion service with the data team.
+"""
+
+
+def answer(parsed):
+    return Mock(choices=[Mock(message=Mock(parsed=parsed))], usage=None)
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    """A free local stub tier in front of a real model tier."""
+    router = ModelRouter([Tier("stub", "local", max_complexity=1), Tier("mini", "gpt-4o-mini")])
+    monkeypatch.setattr("services.router", router)
+    monkeypatch.setattr("services._extract_text", Mock(return_value=SHORT_CV))
+    return router
+
+
+def test_complexity_grows_with_length_sections_and_language():
+    short = DocumentProfile.from_text(SHORT_CV)
+    assert short.sections == ["experience"] and short.language == "en"
+    assert short.complexity < 1
+
+    assert DocumentProfile(6000, ["summary", "education", "experience", "skills", "projects", "certifications"],
+                           "en").complexity == pytest.approx(6.5)
+    assert DocumentProfile(400, [], "other").complexity == pytest.approx(1.9)
+
+
+def test_detect_language():
+    assert detect_language("Led a team of four engineers and migrated the jobs to Airflow.") == "en"
+    assert detect_language("Entwicklung und Betrieb der Plattform für die Dokumentenverarbeitung") == "other"
+    assert detect_language("2021 - 2024") == "unknown"
+
+
+def test_first_tier_by_complexity_within_budget():
+    router = ModelRouter([Tier("mini", "gpt-4o-mini", max_complexity=2),
+                          Tier("full", "gpt-4o", input_price=2.5, output_price=10)], cost_budget=0.05)
+    assert router.tiers[router.first_tier(DocumentProfile(500, [], "en"))].name == "mini"
+    assert router.tiers[router.first_tier(DocumentProfile(3000, [], "en"))].name == "full"
+
+    # Too expensive for the budget on the strong tier, so it starts on the cheap one.
+    router.cost_budget = 0.01
+    assert router.tiers[router.first_tier(DocumentProfile(3000, [], "en"))].name == "mini"
+
+
+def test_sparse_answer_escalates_to_stronger_tier(monkeypatch, tiers):
+    full = ResumeData(personal=Personal(name="Jane Doe"), experience=[Experience(company="Acme Corp")])
+    parse_sync = Mock(return_value=answer(full))
+    monkeypatch.setattr("services.gateway.parse_sync", parse_sync)
+    before = ROUTES_TOTAL.value(tier="stub", outcome="escalated")
+
+    result = resume_parser(Mock())
+
+    # The stub finds the name and email but no experience, so the model is asked.
+    assert result.experience[0].company == "Acme Corp"
+    assert parse_sync.call_args.kwargs["model"] == "gpt-4o-mini"
+    assert ROUTES_TOTAL.value(tier="stub", outcome="escalated") == before + 1
+
+
+def test_invalid_answer_escalates(monkeypatch):
+    router = ModelRouter([Tier("mini", "gpt-4o-mini"), Tier("full", "gpt-4o", prompt="detailed")])
+    monkeypatch.setattr("services.router", router)
+    monkeypatch.setattr("services._extract_text", Mock(return_value=SHORT_CV))
+    full = ResumeData(personal=Personal(name="Jane Doe"), experience=[Experience(company="Acme Corp")])
+    parse_sync = Mock(side_effect=lambda **kwargs: answer(None if kwargs["model"] == "gpt-4o-mini" else full))
+    monkeypatch.setattr("services.gateway.parse_sync", parse_sync)
+
+    assert resume_parser(Mock()).experience[0].company == "Acme Corp"
+    assert [call.kwargs["model"] for call in parse_sync.call_args_list] == ["gpt-4o-mini", "gpt-4o"]
+    assert "long or complex" in parse_sync.call_args.kwargs["messages"][0]["content"]
+
+
+def test_no_escalation_past_budget(monkeypatch, tiers):
+    tiers.latency_budget = 0.5  # Less than one estimated call on the model tier.
+    parse_sync = Mock()
+    monkeypatch.setattr("services.gateway.parse_sync", parse_sync)
+
+    result = resume_parser(Mock())
+
+    # The sparse stub answer is returned rather than nothing.
+    assert result.personal.email == "jane.doe@example.com"
+    parse_sync.assert_not_called()
+
+
+def test_single_tier_keeps_model_as_cache_version(monkeypatch):
+    monkeypatch.delenv("MODEL_ROUTING", raising=False)
+    assert create_router_from_env("gpt-4o-mini").version == "gpt-4o-mini"
+
+    monkeypatch.setenv("MODEL_ROUTING", "true")
+    monkeypatch.setenv("MODEL_TIERS", '[{"name": "stub", "model": "local", "max_complexity": 1},'
+                                      ' {"name": "mini", "model": "gpt-4o-mini", "max_complexity": null}]')
+    router = create_router_from_env("gpt-4o-mini")
+    assert [tier.model for tier in router.tiers] == ["local", "gpt-4o-mini"]
+    assert router.version.startswith("routed:")
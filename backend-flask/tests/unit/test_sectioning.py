@@ -0,0 +1,41 @@
+from sectioning import split_sections
+
+
+RESUME_TEXT = """John Doe
+Email: john.doe@example.com
+Summary Profile
+Results-driven Software Engineer.
+Experience
+Software Engineer | ABC Corp | Jan 2020 - Present
+Technical Skills
+Languages: Python, JavaScript
+Soft Skills
+Communication, Leadership
+Education:
+BSc Computer Science"""
+
+
+def test_split_sections_recognises_headings():
+    """Known headings start new sections and the text before them is the personal block."""
+    sections = split_sections(RESUME_TEXT)
+
+    assert list(sections) == ["personal", "summary",
+                              "experience", "skills", "education"]
+    assert sections["personal"] == "John Doe\nEmail: john.doe@example.com"
+    assert sections["education"] == "Education:\nBSc Computer Science"
+
+
+def test_split_sections_merges_repeated_sections():
+    """Technical and soft skills headings are merged into one skills section with their headings."""
+    sections = split_sections(RESUME_TEXT)
+
+    assert sections["skills"] == (
+        "Technical Skills\nLanguages: Python, JavaScript\nSoft Skills\nCommunication, Leadership")
+
+
+def test_split_sections_ignores_long_lines_starting_with_heading_words():
+    """Body lines are not mistaken for headings just because they start with a heading word."""
+    sections = split_sections(
+        "John Doe\nExperience with distributed systems and cloud platforms")
+
+    assert list(sections) == ["personal"]
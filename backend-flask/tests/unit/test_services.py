@@ -4,7 +4,8 @@ from pydantic import ValidationError
 from werkzeug.datastructures import FileStorage
 from pathlib import Path
 
-from services import resume_parser, ResumeData, Personal, Skills
+from services import resume_parser, warmup, ResumeData, Personal, Skills, LOCAL_PERSONAL_FIELDS
+from llm_gateway import response_format_param
 from exceptions import InvalidFileTypeError, EmptyFileError, OpenAIFailureError
 
 
@@ -51,7 +52,7 @@ def test_resume_parser_success(monkeypatch, pdf_file, mock_openai_response):
     mock_parse = Mock(return_value=Mock(
         choices=[Mock(message=Mock(parsed=mock_openai_response))]))
     monkeypatch.setattr(
-        "services.client.beta.chat.completions.parse", mock_parse)
+        "services.gateway.parse_sync", mock_parse)
 
     result = resume_parser(pdf_file)
 
@@ -94,7 +95,7 @@ def test_resume_parser_ai_failure(monkeypatch, pdf_file):
     # Mock the AI call to raise a generic Exception
     mock_parse = Mock(side_effect=Exception("AI API is down"))
     monkeypatch.setattr(
-        "services.client.beta.chat.completions.parse", mock_parse)
+        "services.gateway.parse_sync", mock_parse)
 
     with pytest.raises(OpenAIFailureError) as e:
         resume_parser(pdf_file)
@@ -115,9 +116,384 @@ def test_resume_parser_ai_invalid_data(monkeypatch, pdf_file):
     mock_parse = Mock(side_effect=ValidationError.from_exception_data(
         title="Test", line_errors=[]))
     monkeypatch.setattr(
-        "services.client.beta.chat.completions.parse", mock_parse)
+        "services.gateway.parse_sync", mock_parse)
 
     with pytest.raises(OpenAIFailureError) as e:
         resume_parser(pdf_file)
 
     assert "AI returned invalid data structure" in str(e.value)
+
+
+@pytest.mark.parametrize("engine", ["auto", "pdfium", "pdfplumber"])
+def test_extract_text_from_pdf_engines(pdf_file, engine):
+    """Every PDF text engine extracts the fixture resume."""
+    from services import _extract_text_from_pdf
+
+    text = _extract_text_from_pdf(pdf_file, engine=engine)
+
+    assert text.startswith("John Doe")
+    assert "Certifications" in text
+
+
+def test_looks_degraded():
+    """Unmapped glyphs and run-together words are flagged as degraded output."""
+    from services import _looks_degraded
+
+    assert not _looks_degraded("Software Engineer | ABC Corp | Jan 2020 - Present")
+    assert not _looks_degraded("")
+    assert _looks_degraded("(cid:12)(cid:34)(cid:56)")
+    assert _looks_degraded("��� name")
+    assert _looks_degraded("SoftwareEngineerABCCorpJan2020Present")
+
+
+SECTIONED_TEXT = """John Doe
+Summary
+Experienced developer.
+Experience
+Software Engineer | ABC Corp
+Skills
+Python"""
+
+
+def test_resume_parser_sectioned_merges_sections(monkeypatch):
+    """Sectioned mode parses each section with its sub-model and merges the results."""
+    from services import ProfileSection, ExperienceSection, SkillsSection, Experience
+
+    monkeypatch.setattr("services.PARSE_MODE", "sectioned")
+    monkeypatch.setattr("services._extract_text",
+                        Mock(return_value=SECTIONED_TEXT))
+
+    section_results = {
+        ProfileSection: ProfileSection(personal=Personal(name="John Doe"),
+                                       professional_summary="Experienced developer."),
+        ExperienceSection: ExperienceSection(experience=[Experience(company="ABC Corp")]),
+        SkillsSection: SkillsSection(skills=Skills(technical=["Python"])),
+    }
+
+    async def fake_parse(response_format, **kwargs):
+        return Mock(choices=[Mock(message=Mock(parsed=section_results[response_format]))])
+
+    monkeypatch.setattr("services.gateway.parse", fake_parse)
+    mock_single = Mock()
+    monkeypatch.setattr("services.gateway.parse_sync", mock_single)
+
+    result = resume_parser(Mock())
+
+    assert result.personal.name == "John Doe"
+    assert result.professional_summary == "Experienced developer."
+    assert result.experience[0].company == "ABC Corp"
+    assert result.skills.technical == ["Python"]
+    mock_single.assert_not_called()
+
+
+def test_resume_parser_sectioned_falls_back_to_single_call(monkeypatch, mock_openai_response):
+    """Sectioned mode uses the single call when too few sections are recognised."""
+    monkeypatch.setattr("services.PARSE_MODE", "sectioned")
+    monkeypatch.setattr("services._extract_text",
+                        Mock(return_value="Full resume text"))
+    mock_parse = Mock(return_value=Mock(
+        choices=[Mock(message=Mock(parsed=mock_openai_response))]))
+    monkeypatch.setattr("services.gateway.parse_sync", mock_parse)
+
+    assert resume_parser(Mock()) == mock_openai_response
+    mock_parse.assert_called_once()
+
+
+def test_resume_parser_local_only_skips_ai(monkeypatch):
+    """local_only returns regex/dictionary fields without calling OpenAI."""
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value="John Doe\njohn@example.com\nSkills\nPython, Docker"))
+    mock_parse = Mock()
+    monkeypatch.setattr("services.gateway.parse_sync", mock_parse)
+
+    result = resume_parser(Mock(), local_only=True)
+
+    assert result.personal.email == "john@example.com"
+    assert result.skills.technical == ["Python", "Docker"]
+    mock_parse.assert_not_called()
+
+
+def test_resume_parser_requests_only_remaining_fields(monkeypatch):
+    """Locally found contact fields and fully covered skills are left out of the LLM request and merged back."""
+    monkeypatch.setattr("services.PROMPT_LAYOUT", "narrowed")
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value="John Doe\njohn@example.com\nSkills\nPython, Docker"))
+
+    def fake_parse(response_format, messages, **kwargs):
+        assert "email" not in response_format.model_fields["personal"].annotation.__args__[0].model_fields
+        assert "skills" not in response_format.model_fields
+        assert "Skills" not in messages[0]["content"]
+        parsed = response_format(personal={"name": "John Doe", "job_title": "Engineer"})
+        return Mock(choices=[Mock(message=Mock(parsed=parsed))])
+
+    monkeypatch.setattr("services.gateway.parse_sync", fake_parse)
+
+    result = resume_parser(Mock())
+
+    assert isinstance(result, ResumeData)
+    assert result.personal.job_title == "Engineer"
+    assert result.personal.email == "john@example.com"
+    assert result.skills.technical == ["Python", "Docker"]
+
+
+def test_static_layout_keeps_the_request_prefix_fixed(monkeypatch):
+    """Every request sends the same schema and messages before the text; local fields fill empty answers."""
+    requests = []
+
+    def fake_parse(**kwargs):
+        requests.append(kwargs)
+        parsed = ResumeData(personal={"name": "John Doe", "job_title": "Engineer"})
+        return Mock(choices=[Mock(message=Mock(parsed=parsed))])
+
+    monkeypatch.setattr("services.gateway.parse_sync", fake_parse)
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value="John Doe\njohn@example.com\nSkills\nPython, Docker"))
+    result = resume_parser(Mock())
+    monkeypatch.setattr("services._extract_text", Mock(return_value="Jane Roe\nEngineer"))
+    resume_parser(Mock())
+
+    first, second = requests
+    assert first["response_format"] is second["response_format"] is ResumeData
+    assert first["messages"][:-1] == second["messages"][:-1]
+    assert first["messages"][-1]["content"] == "John Doe\njohn@example.com\nSkills\nPython, Docker"
+    assert second["messages"][-1]["content"] == "Jane Roe\nEngineer"
+    assert result.personal.email == "john@example.com"
+    assert result.skills.technical == ["Python", "Docker"]
+
+
+def test_model_values_win_over_local_extraction(monkeypatch):
+    """A regex misreading, like a date range taken for a phone number, never replaces the model's answer."""
+    monkeypatch.setattr("services.extract_local", Mock(return_value={
+        "personal": {"phone": "2018 - 2020 (2", "email": "john@example.com"},
+        "skills": {"technical": ["Go", "Spring"]},
+    }))
+    monkeypatch.setattr("services._extract_text", Mock(return_value="John Doe\nExperience\n2018 - 2020 (2 years)"))
+    parsed = ResumeData(personal={"name": "John Doe", "phone": "+1 555 123 4567"},
+                        skills={"technical": ["Python"]})
+    monkeypatch.setattr("services.gateway.parse_sync", Mock(
+        return_value=Mock(choices=[Mock(message=Mock(parsed=parsed))])))
+
+    result = resume_parser(Mock())
+
+    assert result.personal.phone == "+1 555 123 4567"
+    assert result.personal.email == "john@example.com"
+    assert result.skills.technical == ["Python"]
+
+
+def test_resume_parser_async_awaits_gateway(monkeypatch, mock_openai_response):
+    """The async parser extracts in a thread and awaits the gateway directly."""
+    import asyncio
+    from services import resume_parser_async
+
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value="John Doe\nSoftware Engineer"))
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(parsed=mock_openai_response))]
+    parse = Mock()
+
+    async def fake_parse(**kwargs):
+        parse(**kwargs)
+        return mock_response
+
+    monkeypatch.setattr("services.gateway.parse", fake_parse)
+    monkeypatch.setattr("services.gateway.parse_sync", Mock(
+        side_effect=AssertionError("sync path used")))
+
+    result = asyncio.run(resume_parser_async(Mock()))
+
+    assert result.personal.name == mock_openai_response.personal.name
+    parse.assert_called_once()
+
+
+def test_resume_parser_incremental_reparses_only_changed_sections(monkeypatch):
+    """With a previous content hash, only changed section groups go back to the model."""
+    from services import ProfileSection, ExperienceSection, SkillsSection, Experience, content_hash, parse_cache
+
+    monkeypatch.setattr("services.PARSE_MODE", "sectioned")
+    section_results = {
+        ProfileSection: ProfileSection(personal=Personal(name="John Doe"),
+                                       professional_summary="Experienced developer."),
+        ExperienceSection: ExperienceSection(experience=[Experience(company="ABC Corp")]),
+        SkillsSection: SkillsSection(skills=Skills(technical=["Python"])),
+    }
+    requested = []
+
+    async def fake_parse(response_format, **kwargs):
+        requested.append(response_format)
+        return Mock(choices=[Mock(message=Mock(parsed=section_results[response_format]))])
+
+    monkeypatch.setattr("services.gateway.parse", fake_parse)
+    monkeypatch.setattr("services.gateway.parse_sync", Mock(
+        side_effect=AssertionError("full parse used")))
+
+    monkeypatch.setattr("services._extract_text", Mock(return_value=SECTIONED_TEXT))
+    first = resume_parser(Mock())
+    previous = content_hash()
+    assert previous is not None and len(requested) == 3
+
+    # The user edits one line of the experience section and re-uploads.
+    requested.clear()
+    section_results[ExperienceSection] = ExperienceSection(experience=[Experience(company="XYZ Ltd")])
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value=SECTIONED_TEXT.replace("ABC Corp", "XYZ Ltd")))
+    second = resume_parser(Mock(), previous=previous)
+
+    assert requested == [ExperienceSection]
+    assert second.experience[0].company == "XYZ Ltd"
+    assert second.personal == first.personal
+    assert second.skills == first.skills
+    assert content_hash() != previous
+    # The texts live in their own cache and only the two parses count as lookups.
+    stats = parse_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 2, 2)
+
+
+def test_resume_parser_incremental_falls_back_to_full_parse(monkeypatch, mock_openai_response):
+    """An unknown previous hash runs a normal parse."""
+    monkeypatch.setattr("services._extract_text", Mock(return_value=SECTIONED_TEXT))
+    mock_parse = Mock(return_value=Mock(
+        choices=[Mock(message=Mock(parsed=mock_openai_response))]))
+    monkeypatch.setattr("services.gateway.parse_sync", mock_parse)
+
+    assert resume_parser(Mock(), previous="unknown") == mock_openai_response
+    mock_parse.assert_called_once()
+
+
+def test_warmup_prebuilds_every_request_schema():
+    """warmup() runs every step and leaves the schema of each request model variant cached."""
+    response_format_param.cache_clear()
+
+    timings = warmup()
+
+    assert list(timings) == ["imports", "schemas", "extraction", "validation"]
+    # Every subset of the locally extracted personal fields, with and without skills.
+    assert response_format_param.cache_info().currsize >= 2 ** len(LOCAL_PERSONAL_FIELDS) * 2
+
+
+def test_resume_parser_stream_yields_fields_before_result(monkeypatch):
+    """Local fields come first, then the model's fields as they stream, merged with local ones, then the result."""
+    import json
+    from services import resume_parser_stream
+
+    monkeypatch.setattr("services._extract_text", Mock(
+        return_value="John Doe\njohn@example.com\nSkills\nPython, Docker"))
+    answer = json.dumps({"personal": {"name": "John Doe", "job_title": "Engineer"},
+                         "professional_summary": "Builds things.",
+                         "experience": [{"company": "Acme"}, {"company": "Initech"}]})
+
+    async def fake_stream(response_format, **kwargs):
+        for start in range(0, len(answer), 5):
+            yield answer[start:start + 5]
+
+    monkeypatch.setattr("services.gateway.stream", fake_stream)
+
+    events = list(resume_parser_stream(Mock()))
+
+    assert [(event["event"], event["field"], event.get("source", event.get("index"))) for event in events[:-1]] == [
+        ("field", "personal", "local"),
+        ("field", "skills", "local"),
+        ("field", "personal", "model"),
+        ("field", "professional_summary", "model"),
+        ("item", "experience", 0),
+        ("item", "experience", 1),
+    ]
+    assert events[2]["data"]["email"] == "john@example.com"
+    assert events[2]["data"]["job_title"] == "Engineer"
+    result = events[-1]
+    assert result["event"] == "result"
+    assert result["data"]["personal"]["email"] == "john@example.com"
+    assert result["data"]["skills"]["technical"] == ["Python", "Docker"]
+    assert [job["company"] for job in result["data"]["experience"]] == ["Acme", "Initech"]
+
+
+def test_resume_parser_coalesces_identical_concurrent_uploads(monkeypatch, mock_openai_response):
+    """Identical uploads parsed at once share one LLM call, result and content hash."""
+    import io
+    import threading
+    import time
+    from services import content_hash
+
+    calls = []
+
+    def slow_parse(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.2)
+        return Mock(choices=[Mock(message=Mock(parsed=mock_openai_response))])
+
+    monkeypatch.setattr("services.gateway.parse_sync", slow_parse)
+    data = open(get_fixture_resume_path("resume.pdf"), "rb").read()
+    results = {}
+
+    def upload(name):
+        file = FileStorage(stream=io.BytesIO(data), filename=f"{name}.pdf", content_type="application/pdf")
+        results[name] = (resume_parser(file), content_hash())
+
+    threads = [threading.Thread(target=upload, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results["first"] == results["second"]
+    assert results["first"][1] is not None
+
+
+def test_resume_parser_async_coalesces_identical_concurrent_uploads(monkeypatch, mock_openai_response):
+    """The async parser shares one LLM call between identical uploads, as the sync one does."""
+    import asyncio
+    import io
+    from services import resume_parser_async
+
+    calls = []
+
+    async def slow_parse(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.2)
+        return Mock(choices=[Mock(message=Mock(parsed=mock_openai_response))])
+
+    monkeypatch.setattr("services.gateway.parse", slow_parse)
+    data = open(get_fixture_resume_path("resume.pdf"), "rb").read()
+
+    async def main():
+        files = [FileStorage(stream=io.BytesIO(data), filename=f"{name}.pdf", content_type="application/pdf")
+                 for name in ("first", "second")]
+        return await asyncio.gather(*(resume_parser_async(file) for file in files))
+
+    first, second = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert first == second
+
+
+def test_resume_parser_stream_coalesces_identical_concurrent_streams(monkeypatch):
+    """A stream of a text already being streamed waits for it and yields only its result."""
+    import asyncio
+    import json
+    from services import resume_parser_stream_async
+
+    monkeypatch.setattr("services._extract_text", Mock(return_value="John Doe\nEngineer"))
+    answer = json.dumps({"personal": {"name": "John Doe"}})
+    calls = []
+
+    async def slow_stream(response_format, **kwargs):
+        calls.append(response_format)
+        await asyncio.sleep(0.2)
+        yield answer
+
+    monkeypatch.setattr("services.gateway.stream", slow_stream)
+
+    async def consume():
+        return [event async for event in await resume_parser_stream_async(Mock())]
+
+    async def main():
+        first = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(first, consume())
+
+    first, second = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [event["event"] for event in second] == ["result"]
+    assert second[0] == first[-1]
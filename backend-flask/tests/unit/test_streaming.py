@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from streaming import FieldStream
+
+
+class Job(BaseModel):
+    title: str
+    years: int
+
+
+class Answer(BaseModel):
+    name: str
+    jobs: List[Job]
+    summary: Optional[str]
+
+
+DOCUMENT = '{"name":"Jane Doe","jobs":[{"title":"Engineer","years":3},{"title":"Lead","years":2}],"summary":"Builds things."}'
+
+
+def feed_all(stream: FieldStream, document: str, size: int) -> list:
+    events = []
+    for start in range(0, len(document), size):
+        events.append(stream.feed(document[start:start + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 7, len(DOCUMENT)])
+def test_reports_each_value_once_in_order(size):
+    """Fields and list entries are reported once each, in document order, whatever the chunking."""
+    stream = FieldStream(Answer)
+    reported = [field for fields in feed_all(stream, DOCUMENT, size) for field in fields]
+    parsed, remaining = stream.finish()
+
+    assert reported + remaining == [
+        ("name", None, "Jane Doe"),
+        ("jobs", 0, {"title": "Engineer", "years": 3}),
+        ("jobs", 1, {"title": "Lead", "years": 2}),
+        ("summary", None, "Builds things."),
+    ]
+    assert parsed == Answer.model_validate_json(DOCUMENT)
+
+
+def test_reports_values_before_the_document_ends():
+    """A field is reported once the next one starts; a list entry once the next entry starts."""
+    stream = FieldStream(Answer)
+
+    assert stream.feed('{"name":"Jane') == []
+    assert stream.feed(' Doe","jobs":[{"title":"Engineer","years":3}') == [("name", None, "Jane Doe")]
+    assert stream.feed(',{"title":"Le') == [("jobs", 0, {"title": "Engineer", "years": 3})]
+    assert stream.feed('ad","years":2}],') == []
+    assert stream.feed('"summary":"Bu') == [("jobs", 1, {"title": "Lead", "years": 2})]
+
+
+def test_invalid_values_are_skipped_and_finish_raises():
+    """A value that fails validation is not reported, and finish raises ValidationError."""
+    stream = FieldStream(Answer)
+    reported = stream.feed('{"name":"Jane","jobs":[{"title":"Engineer","years":"many"},')
+
+    assert reported == [("name", None, "Jane")]
+    stream.feed('{"title":"Lead","years":2}],"summary":null}')
+    with pytest.raises(ValidationError):
+        stream.finish()
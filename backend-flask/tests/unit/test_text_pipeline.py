@@ -0,0 +1,64 @@
+from text_pipeline import compact_lines, estimate_tokens, iter_within_budget, strip_page_furniture
+
+
+def test_estimate_tokens():
+    """Short words cost one token each and punctuation is counted separately."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("John Doe") == 2
+    assert estimate_tokens("React, Node.js") == 5
+
+
+def test_strip_page_furniture_removes_repeated_headers_and_page_numbers():
+    """Headers repeated across pages and page numbers are dropped; the first header is kept."""
+    pages = [
+        "John Doe - Resume\nExperience\nSoftware Engineer\nPage 1 of 2",
+        "John Doe - Resume\nProjects\nResume Parser\nPage 2 of 2",
+    ]
+
+    result = list(strip_page_furniture(pages))
+
+    assert result == [
+        "John Doe - Resume\nExperience\nSoftware Engineer",
+        "Projects\nResume Parser",
+    ]
+
+
+def test_strip_page_furniture_keeps_body_lines():
+    """Lines outside the page edges are never treated as furniture."""
+    pages = ["Header\nSkills\nPython\nSQL\nGo\nContact\nFooter",
+             "Other\nTools\nPython\nSQL\nGo\nLinks\nEnd"]
+
+    assert "\nPython\nSQL\nGo\n" in list(strip_page_furniture(pages))[1]
+
+
+def test_iter_within_budget_stops_consuming_source():
+    """Once the budget is reached, later chunks are never pulled from the source."""
+    pulled = []
+
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield f"line {i}"
+
+    lines = list(iter_within_budget(chunks(), budget=10))
+
+    assert lines == ["line 0", "line 1", "line 2"]
+    assert len(pulled) == 4
+
+
+def test_iter_within_budget_unlimited():
+    """A budget of zero yields every non-empty line."""
+    assert list(iter_within_budget(["a\n\nb", "c"], budget=0)) == ["a", "b", "c"]
+
+
+def test_compact_lines_normalizes_bullets_whitespace_and_repeats():
+    """Bullets become "- ", lone bullets join the next line, and repeated or empty lines are dropped."""
+    chunks = [
+        "Experience\n•   Built   the\tAPI\n\uf0b7\nLed a team of 4\n",
+        "Led a team of 4\n\n* Wrote tests\n-3 years\n– Present",
+    ]
+
+    assert list(compact_lines(chunks)) == [
+        "Experience", "- Built the API", "- Led a team of 4", "Led a team of 4",
+        "- Wrote tests", "-3 years", "- Present",
+    ]
@@ -0,0 +1,80 @@
+import mmap
+import pytest
+import tempfile
+from pathlib import Path
+from werkzeug.datastructures import FileStorage
+
+from uploads import UploadSpool, mapped, spool_copy
+from services import _extract_text_from_pdf
+from exceptions import InvalidFileTypeError
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "resumes"
+
+
+def spooled(data: bytes, mimetype: str = "application/pdf", max_size: int = 1024) -> UploadSpool:
+    spool = UploadSpool(mimetype, max_size=max_size)
+    for start in range(0, len(data), 256):
+        spool.write(data[start:start + 256])
+    spool.seek(0)
+    return spool
+
+
+def test_spool_rolls_over_to_disk():
+    """Uploads stay in memory up to max_size and move to a temporary file past it."""
+    small = spooled(b"%PDF-" + b"x" * 100)
+    large = spooled(b"%PDF-" + b"x" * 5000)
+
+    assert not small.on_disk
+    assert large.on_disk
+    assert large.read() == b"%PDF-" + b"x" * 5000
+
+
+def test_spool_rejects_content_not_matching_declared_type():
+    """The first bytes are checked against the declared mimetype as they arrive."""
+    with pytest.raises(InvalidFileTypeError):
+        spooled(b"MZ not a pdf at all")
+
+    # Types without a known signature are not checked.
+    assert spooled(b"plain text", mimetype="text/plain").read() == b"plain text"
+
+
+def test_mapped_uses_mmap_for_spooled_files():
+    """On-disk uploads are memory-mapped; in-memory ones are read as bytes."""
+    with mapped(FileStorage(spooled(b"%PDF-" + b"x" * 5000))) as data:
+        assert isinstance(data, mmap.mmap)
+        assert data[:5] == b"%PDF-"
+
+    with mapped(FileStorage(spooled(b"%PDF-small"))) as data:
+        assert data == b"%PDF-small"
+
+
+def test_mapped_keeps_small_spooled_temporary_files_in_memory():
+    """Mapping an unrolled SpooledTemporaryFile (ASGI uploads) does not force it to disk."""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024)
+    spool.write(b"%PDF-small")
+
+    with mapped(FileStorage(spool)) as data:
+        assert data == b"%PDF-small"
+    assert not spool._rolled
+
+
+def test_extract_text_from_mapped_pdf():
+    """PDF extraction gives the same text from a memory-mapped spool as from memory."""
+    data = (FIXTURES / "resume.pdf").read_bytes()
+
+    on_disk = _extract_text_from_pdf(FileStorage(spooled(data, max_size=1024)))
+    in_memory = _extract_text_from_pdf(FileStorage(spooled(data, max_size=len(data))))
+
+    assert on_disk == in_memory
+    assert "John Doe" in on_disk
+
+
+def test_spool_copy():
+    original = FileStorage(spooled(b"%PDF-" + b"x" * 5000), filename="resume.pdf",
+                           content_type="application/pdf")
+
+    copy = spool_copy(original)
+
+    assert copy.filename == "resume.pdf"
+    assert copy.mimetype == "application/pdf"
+    assert copy.read() == b"%PDF-" + b"x" * 5000
@@ -0,0 +1,161 @@
+"""
+Streaming post-processing for extracted resume text.
+
+Extractors yield pages (PDF) or paragraphs (DOCX) lazily; the helpers here
+consume them one at a time so that long documents cost bounded memory and
+extraction stops as soon as the prompt token budget is used up:
+
+    - strip_page_furniture: drops page numbers and headers/footers that repeat
+      across pages.
+    - compact_lines: collapses whitespace, unifies bullet glyphs and drops
+      repeated lines, so the prompt carries no tokens the model does not need.
+    - iter_within_budget: yields lines until a token budget is reached.
+    - estimate_tokens: a local, dependency-free approximation of the model's
+      tokenizer.
+"""
+
+import math
+import re
+from typing import Iterable, Iterator
+
+# Matches "3", "- 3 -", "Page 3", "Page 3 of 5", "3/5".
+_PAGE_NUMBER_RE = re.compile(
+    r"^[\s\-–—]*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?[\s\-–—]*$", re.IGNORECASE)
+
+_TOKEN_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+
+_DIGITS_RE = re.compile(r"\d+")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# A leading bullet: a bullet glyph (including the private-use glyphs of
+# Symbol/Wingdings fonts that PDF extraction often yields), or a dash or
+# asterisk followed by a space.
+_BULLET_RE = re.compile(
+    r"^(?:[•●▪■□◦‣∙·○►▸➢➤✓✔❖\uf0a7\uf0b7\uf076\uf0d8\uf0fc]+|[-*–—](?=\s|$))\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many model tokens `text` costs.
+
+    Approximates BPE tokenizers such as o200k: one token per punctuation mark,
+    one per three digits, and one per started six characters of each word
+    (common English words are a single token).
+
+    Args:
+        text (str): Any text.
+
+    Returns:
+        int: The estimated token count.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 6)
+        else:
+            tokens += 1
+    return tokens
+
+
+def _furniture_key(line: str) -> str:
+    # Running headers often carry the page number ("John Doe - Page 2"), so
+    # digits are masked before lines are compared.
+    return _DIGITS_RE.sub("#", line.strip().lower())
+
+
+def strip_page_furniture(pages: Iterable[str], edge_lines: int = 2) -> Iterator[str]:
+    """
+    Remove page numbers and repeated headers/footers from a stream of pages.
+
+    A line within `edge_lines` of the top or bottom of a page is dropped if it
+    looks like a page number, or if the same line (ignoring digits) was already
+    seen at the edge of an earlier page. The first occurrence is kept, so a
+    name printed as the header of every page survives on page one.
+
+    Args:
+        pages (Iterable[str]): Page texts in document order.
+        edge_lines (int): How many lines at each edge count as header/footer.
+
+    Yields:
+        str: Each page's text with furniture removed.
+    """
+    seen_edges = set()
+    for page in pages:
+        lines = page.split("\n")
+        edges = set(range(min(edge_lines, len(lines))))
+        edges.update(range(max(len(lines) - edge_lines, 0), len(lines)))
+
+        kept = []
+        page_edges = set()
+        for index, line in enumerate(lines):
+            if index in edges and line.strip():
+                key = _furniture_key(line)
+                if _PAGE_NUMBER_RE.match(line) or key in seen_edges:
+                    continue
+                page_edges.add(key)
+            kept.append(line)
+
+        seen_edges.update(page_edges)
+        yield "\n".join(kept)
+
+
+def compact_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Normalize extracted lines to the compact form sent to the model.
+
+    Runs of whitespace collapse to one space, every bullet style becomes
+    "- ", a bullet left alone on its line is joined to the next line, and a
+    line repeating the one before it (as overlapping text layers and
+    duplicated DOCX runs produce) is dropped. Empty lines are dropped.
+
+    Args:
+        chunks (Iterable[str]): Pages or paragraphs in document order.
+
+    Yields:
+        str: Compacted, non-empty lines.
+    """
+    previous = None
+    bullet = ""
+    for chunk in chunks:
+        for line in chunk.split("\n"):
+            line = _WHITESPACE_RE.sub(" ", line).strip()
+            match = _BULLET_RE.match(line)
+            if match:
+                line = line[match.end():]
+                bullet = "- "
+            if not line:
+                continue
+            line = bullet + line
+            bullet = ""
+            if line != previous:
+                previous = line
+                yield line
+
+
+def iter_within_budget(chunks: Iterable[str], budget: int) -> Iterator[str]:
+    """
+    Yield lines from `chunks` until the token budget is used up.
+
+    The source iterator is not consumed past the chunk that exhausts the
+    budget, so upstream extraction stops early.
+
+    Args:
+        chunks (Iterable[str]): Pages or paragraphs in document order.
+        budget (int): Maximum estimated tokens; 0 or less disables the limit.
+
+    Yields:
+        str: Non-empty lines whose cumulative token estimate fits the budget.
+    """
+    used = 0
+    for chunk in chunks:
+        for line in chunk.split("\n"):
+            if not line.strip():
+                continue
+            if budget > 0:
+                used += estimate_tokens(line) + 1
+                if used > budget:
+                    return
+            yield line
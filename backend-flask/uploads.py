@@ -0,0 +1,232 @@
+"""
+Bounded-memory handling of uploaded files.
+
+Multipart file parts are written to an `UploadSpool`, which keeps small
+uploads in memory and moves larger ones to an anonymous temporary file. The
+first bytes of each part are checked against the signature of its declared
+type as they arrive, so a mislabelled upload is rejected before the rest of
+the body is buffered. Extractors then read spooled files through `mapped`,
+which memory-maps on-disk uploads instead of copying them into the heap.
+"""
+
+import gc
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+from flask import Request
+from werkzeug.datastructures import FileStorage
+
+from exceptions import InvalidFileTypeError
+
+PDF_MIMETYPE = "application/pdf"
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+ZIP_MIMETYPES = {"application/zip", "application/x-zip-compressed"}
+
+# Leading bytes each declared type must start with. DOCX files are ZIP archives.
+SIGNATURES = {
+    PDF_MIMETYPE: b"%PDF-",
+    DOCX_MIMETYPE: b"PK\x03\x04",
+    **{mimetype: b"PK\x03\x04" for mimetype in ZIP_MIMETYPES},
+}
+
+# Uploads larger than this are moved from memory to a temporary file.
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+
+_COPY_CHUNK_BYTES = 64 * 1024
+
+
+def check_signature(head: bytes, mimetype: Optional[str]) -> None:
+    """
+    Check that a file's leading bytes match its declared mimetype.
+
+    Types without a known signature are not checked.
+
+    Raises:
+        InvalidFileTypeError: If the content does not match the declared type.
+    """
+    signature = SIGNATURES.get(mimetype)
+    if signature is not None and not head.startswith(signature):
+        raise InvalidFileTypeError(
+            "File content does not match its type. Please upload a valid PDF or DOCX file.")
+
+
+class UploadSpool(io.RawIOBase):
+    """
+    A writable, seekable buffer that rolls over to disk past `max_size` bytes.
+
+    Args:
+        mimetype (str, optional): Declared type, checked against the first bytes written.
+        max_size (int): Bytes kept in memory before moving to a temporary file.
+    """
+
+    def __init__(self, mimetype: Optional[str] = None, max_size: int = UPLOAD_SPOOL_BYTES):
+        self.mimetype = mimetype
+        self.max_size = max_size
+        self._file: BinaryIO = io.BytesIO()
+        self._on_disk = False
+        self._head: Optional[bytes] = b"" if mimetype in SIGNATURES else None
+
+    @property
+    def on_disk(self) -> bool:
+        return self._on_disk
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        if self._head is not None:
+            self._head += bytes(data[:8 - len(self._head)])
+            if len(self._head) >= len(SIGNATURES[self.mimetype]):
+                check_signature(self._head, self.mimetype)
+                self._head = None
+        if not self._on_disk and self._file.tell() + len(data) > self.max_size:
+            self._rollover()
+        return self._file.write(data)
+
+    def _rollover(self) -> None:
+        disk = tempfile.TemporaryFile()
+        position = self._file.tell()
+        disk.write(self._file.getbuffer())
+        disk.seek(position)
+        self._file = disk
+        self._on_disk = True
+
+    def readinto(self, buffer) -> int:
+        return self._file.readinto(buffer)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def fileno(self) -> int:
+        if not self._on_disk:
+            raise io.UnsupportedOperation("in-memory upload has no file descriptor")
+        return self._file.fileno()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class UploadRequest(Request):
+    """Request class that spools file uploads through `UploadSpool`."""
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> BinaryIO:
+        return UploadSpool(content_type)
+
+
+def spool_copy(file: FileStorage) -> FileStorage:
+    """
+    Copy an upload into a new spool, e.g. so it outlives the request.
+
+    Returns:
+        FileStorage: A copy backed by an `UploadSpool`, positioned at the start.
+    """
+    spool = UploadSpool()
+    file.seek(0)
+    shutil.copyfileobj(file.stream, spool, _COPY_CHUNK_BYTES)
+    spool.seek(0)
+    return FileStorage(spool, filename=file.filename, content_type=file.mimetype)
+
+
+class MappedReader(io.RawIOBase):
+    """An independent read-only stream over a memory mapping, without copying it."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        self._view = memoryview(buffer)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+@contextmanager
+def mapped(file: Union[FileStorage, BinaryIO]) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Expose an upload's contents without holding a second copy on the heap.
+
+    Uploads spooled to disk (or any real file) are memory-mapped copy-on-write,
+    so pages are shared with the page cache and can be handed to C libraries
+    as writable buffers. In-memory uploads are small and are read as bytes.
+
+    Args:
+        file (FileStorage | BinaryIO): The upload.
+
+    Yields:
+        bytes | mmap.mmap: The file contents. A mapping is closed on exit.
+    """
+    stream = getattr(file, "stream", file)
+    # fileno() would force an in-memory SpooledTemporaryFile (as used by
+    # Starlette's uploads) onto disk.
+    if getattr(stream, "_rolled", True) is False:
+        stream = None
+    try:
+        fileno = stream.fileno()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        size = 0
+
+    if not size:
+        file.seek(0)
+        yield file.read()
+        return
+
+    mapping = mmap.mmap(fileno, size, access=mmap.ACCESS_COPY)
+    try:
+        yield mapping
+    finally:
+        _close_mapping(mapping)
+
+
+def _close_mapping(mapping: mmap.mmap) -> None:
+    try:
+        mapping.close()
+    except BufferError:
+        # A buffer exported to a C library is still referenced, typically
+        # from a reference cycle in its wrapper objects. Collect and retry;
+        # failing that, the mapping is released once its last exporter is.
+        gc.collect()
+        try:
+            mapping.close()
+        except BufferError:
+            pass
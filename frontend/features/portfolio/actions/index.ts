@@ -1,6 +1,7 @@
 "use server";
 
 import { revalidatePath } from "next/cache";
+import { headers } from "next/headers";
 import axios, { isAxiosError } from "axios";
 import { currentUser } from "@clerk/nextjs/server";
 import OpenAI, { APIError } from "openai";
@@ -33,8 +34,16 @@ export async function parseResumeAction(formData: FormData): Action<ParsedResume
   }
 
   try {
+    // The parser rate-limits per caller; tell it who this upload is for (signed-in
+    // user, else the visitor's address as set by nginx) rather than this server.
+    const user = await currentUser();
+    const clientIp = (await headers()).get("x-real-ip");
+    const identity: Record<string, string> = {};
+    if (user?.id) identity["X-User-Id"] = user.id;
+    if (clientIp) identity["X-Forwarded-For"] = clientIp;
+
     const response = await axios.post(`${flaskApiUrl}/parse-resume`, formData, {
-      headers: { "Content-Type": "multipart/form-data" },
+      headers: { "Content-Type": "multipart/form-data", ...identity },
     });
 
     return { success: true, data: response.data };